@@ -5,6 +5,7 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt  # ADD THIS LINE
 import os
+from app.config import Config
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -20,6 +21,12 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///kenfuse.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key-here')
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = Config.JWT_ACCESS_TOKEN_EXPIRES
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = Config.JWT_REFRESH_TOKEN_EXPIRES
+    
+    # orjson-backed app.json, with ISO 8601 dates
+    from app.utils import json_provider
+    json_provider.init_app(app)
     
     # Initialize extensions with app
     CORS(app)
@@ -32,13 +39,71 @@ def create_app():
     from app.routes.auth import auth_bp
     from app.routes.memorials import memorials_bp
     from app.routes.wills import wills_bp
+    from app.routes.pdf_jobs import pdf_jobs_bp
+    from app.routes.exports import exports_bp
+    from app.routes.fundraisers import fundraisers_bp
+    from app.routes.vendors import vendors_bp
+    from app.routes.payments import payments_bp
+    from app.routes.admin import admin_bp
+    from app.routes.search import search_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(memorials_bp, url_prefix='/api')
     app.register_blueprint(wills_bp, url_prefix='/api')
+    app.register_blueprint(pdf_jobs_bp, url_prefix='/api/pdf-jobs')
+    app.register_blueprint(exports_bp, url_prefix='/api/exports')
+    app.register_blueprint(fundraisers_bp, url_prefix='/api/fundraisers')
+    app.register_blueprint(vendors_bp, url_prefix='/api/vendors')
+    app.register_blueprint(payments_bp, url_prefix='/api/payments')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(search_bp, url_prefix='/api/search')
     
     # Create tables
     with app.app_context():
         db.create_all()
     
+    # gzip/brotli by Accept-Encoding; registered first so it runs after the other after_request hooks
+    from app.utils import compression
+    compression.init_app(app)
+    
+    # Request rates, latency histograms and DB pool gauges at /metrics
+    from app.services import metrics
+    metrics.init_app(app)
+    
+    # Query count, DB time and N+1 warnings per request
+    from app.services import query_stats
+    query_stats.init_app(app)
+    
+    # ETags for JSON GET responses that do not set their own
+    from app.utils import conditional
+    conditional.init_app(app)
+    
+    # Reject access tokens whose user was deactivated or changed role/plan
+    from app.services.auth_tokens import token_versions
+    token_versions.init_app(app)
+    
+    # Used refresh tokens and logged-out sessions, mirrored in a bloom filter
+    from app.services.token_revocation import token_revocations
+    token_revocations.init_app(app)
+    
+    # Create the full-text index on first start; it is then kept current on every flush
+    from app.services.search import search_index
+    search_index.init_app(app)
+    
+    # Precompile PDF page templates and load font metrics once per process
+    from app.utils.pdf_engine import pdf_engine
+    pdf_engine.warm()
+    
+    # Apply queued M-Pesa callbacks in the background
+    from app.services.mpesa_callbacks import mpesa_callback_consumer
+    mpesa_callback_consumer.init_app(app)
+    
+    # Group commit writer for donations (used when DONATION_GROUP_COMMIT is on)
+    from app.services.donations import donation_batcher
+    donation_batcher.init_app(app)
+    
+    # Close fundraisers past their end date (one node at a time)
+    from app.services.fundraiser_sweeper import fundraiser_sweeper
+    fundraiser_sweeper.init_app(app)
+    
     return app
\ No newline at end of file
@@ -16,23 +16,119 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    TOKEN_VERSION_CACHE_TTL = int(os.environ.get('TOKEN_VERSION_CACHE_TTL', 30))  # seconds before another worker's revocation is seen
+    TOKEN_VERSION_CACHE_SIZE = int(os.environ.get('TOKEN_VERSION_CACHE_SIZE', 10000))  # users kept in memory per worker
+    REVOCATION_BLOOM_CAPACITY = int(os.environ.get('REVOCATION_BLOOM_CAPACITY', 100000))  # grows to 2x the live rows on compaction
+    REVOCATION_BLOOM_ERROR_RATE = float(os.environ.get('REVOCATION_BLOOM_ERROR_RATE', 0.001))  # share of checks that need a query
+    REVOCATION_SYNC_INTERVAL = int(os.environ.get('REVOCATION_SYNC_INTERVAL', 5))  # seconds before another worker's revocation is seen
+    REVOCATION_COMPACT_INTERVAL = int(os.environ.get('REVOCATION_COMPACT_INTERVAL', 3600))  # seconds between purges of expired rows
+    
+    # Password hashing
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))  # existing hashes are upgraded on next login
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))  # 0 = one per CPU
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 0))  # 0 = 8 per worker; beyond this login returns 503
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 30))  # seconds a request waits for its hash
     
     # File Uploads
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', './uploads')
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16777216))
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
     
+    # PDF artifact cache
+    PDF_CACHE_BACKEND = os.environ.get('PDF_CACHE_BACKEND', 'local')
+    PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR', './uploads/pdf_cache')
+    PDF_PRECOMPRESS = os.environ.get('PDF_PRECOMPRESS', 'br,gzip')  # variants stored next to each PDF; empty = none
+    
+    # Background PDF rendering
+    PDF_JOB_WORKERS = int(os.environ.get('PDF_JOB_WORKERS', 2))
+    PDF_JOB_TIMEOUT = int(os.environ.get('PDF_JOB_TIMEOUT', 300))  # seconds before a job is re-queued
+    EXPORT_MAX_IN_FLIGHT = int(os.environ.get('EXPORT_MAX_IN_FLIGHT', 4))  # renders per bulk export
+    EXPORT_RENDER_TIMEOUT = int(os.environ.get('EXPORT_RENDER_TIMEOUT', 120))  # seconds before a member is listed in errors.txt
+    
     # M-Pesa
     MPESA_CONSUMER_KEY = os.environ.get('MPESA_CONSUMER_KEY')
     MPESA_CONSUMER_SECRET = os.environ.get('MPESA_CONSUMER_SECRET')
     MPESA_SHORTCODE = os.environ.get('MPESA_SHORTCODE')
     MPESA_PASSKEY = os.environ.get('MPESA_PASSKEY')
     MPESA_CALLBACK_URL = os.environ.get('MPESA_CALLBACK_URL')
+    MPESA_BASE_URL = os.environ.get('MPESA_BASE_URL', 'https://sandbox.safaricom.co.ke')
+    MPESA_TOKEN_REFRESH_MARGIN = int(os.environ.get('MPESA_TOKEN_REFRESH_MARGIN', 60))  # seconds
+    MPESA_TOKEN_RETRY_BACKOFF = float(os.environ.get('MPESA_TOKEN_RETRY_BACKOFF', 5))  # seconds after a failed refresh, doubling
+    MPESA_TOKEN_CACHE_FILE = os.environ.get('MPESA_TOKEN_CACHE_FILE')  # share the token across workers
+    MPESA_CALLBACK_CONSUMER = os.environ.get('MPESA_CALLBACK_CONSUMER', 'true').lower() == 'true'  # apply callbacks in this process
+    MPESA_CALLBACK_BATCH_SIZE = int(os.environ.get('MPESA_CALLBACK_BATCH_SIZE', 100))
+    MPESA_CALLBACK_POLL_INTERVAL = float(os.environ.get('MPESA_CALLBACK_POLL_INTERVAL', 2))  # seconds
+    MPESA_CALLBACK_MATCH_WINDOW = int(os.environ.get('MPESA_CALLBACK_MATCH_WINDOW', 300))  # seconds to wait for the payment row
+    MPESA_CALLBACK_CLAIM_TIMEOUT = int(os.environ.get('MPESA_CALLBACK_CLAIM_TIMEOUT', 60))  # seconds before a claimed batch is retried
     
     # Stripe
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
     STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY')
     STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
+    STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE', 'https://api.stripe.com')
+    
+    # Donations
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 86400))  # seconds a key is remembered
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', 10000))  # keys kept in memory per worker
+    DONATION_GROUP_COMMIT = os.environ.get('DONATION_GROUP_COMMIT', 'false').lower() == 'true'
+    DONATION_GROUP_COMMIT_WINDOW_MS = float(os.environ.get('DONATION_GROUP_COMMIT_WINDOW_MS', 5))
+    DONATION_GROUP_COMMIT_MAX_BATCH = int(os.environ.get('DONATION_GROUP_COMMIT_MAX_BATCH', 100))
+    DONATION_GROUP_COMMIT_TIMEOUT = float(os.environ.get('DONATION_GROUP_COMMIT_TIMEOUT', 30))  # seconds a request waits
+    
+    # Fundraiser expiry
+    FUNDRAISER_SWEEPER = os.environ.get('FUNDRAISER_SWEEPER', 'true').lower() == 'true'
+    FUNDRAISER_SWEEP_INTERVAL = int(os.environ.get('FUNDRAISER_SWEEP_INTERVAL', 60))  # seconds
+    FUNDRAISER_SWEEP_BATCH_SIZE = int(os.environ.get('FUNDRAISER_SWEEP_BATCH_SIZE', 500))
+    
+    # Listings
+    PAGINATION_MAX_PER_PAGE = int(os.environ.get('PAGINATION_MAX_PER_PAGE', 100))  # cursor mode only
+    PAGINATION_COUNT_TTL = int(os.environ.get('PAGINATION_COUNT_TTL', 30))  # seconds a listing total is cached
+    PAGINATION_COUNT_CACHE_SIZE = int(os.environ.get('PAGINATION_COUNT_CACHE_SIZE', 1000))  # listing totals kept per worker
+    
+    # Per-request SQL instrumentation
+    QUERY_STATS = os.environ.get('QUERY_STATS', 'true').lower() == 'true'
+    QUERY_STATS_HEADER = os.environ.get('QUERY_STATS_HEADER', 'false').lower() == 'true'  # X-Query-Stats on every response
+    QUERY_STATS_SLOWEST = int(os.environ.get('QUERY_STATS_SLOWEST', 3))  # statements kept per request
+    QUERY_STATS_N_PLUS_ONE_THRESHOLD = int(os.environ.get('QUERY_STATS_N_PLUS_ONE_THRESHOLD', 5))  # repeats of one shape
+    QUERY_STATS_SLOW_REQUEST_MS = int(os.environ.get('QUERY_STATS_SLOW_REQUEST_MS', 500))  # log the slowest statements above this
+    
+    # Response encoding
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')  # orjson, standard; falls back to standard if orjson is missing
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_ENCODINGS = os.environ.get('COMPRESSION_ENCODINGS', 'br,gzip')  # server preference; br needs the brotli package
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # bytes; smaller bodies are sent as is
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))  # 1-9
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))  # 0-11
+    
+    # Full-text search (SQLite FTS5 or PostgreSQL tsvector, picked from DATABASE_URL)
+    SEARCH_ENABLED = os.environ.get('SEARCH_ENABLED', 'true').lower() == 'true'
+    SEARCH_POSTGRES_CONFIG = os.environ.get('SEARCH_POSTGRES_CONFIG', 'simple')  # text search config; simple keeps names unstemmed
+    SEARCH_PREFIX_MIN_LENGTH = int(os.environ.get('SEARCH_PREFIX_MIN_LENGTH', 2))  # shorter terms must match a whole word
+    SEARCH_MAX_TERMS = int(os.environ.get('SEARCH_MAX_TERMS', 8))  # extra words in q are ignored
+    SEARCH_MAX_PER_PAGE = int(os.environ.get('SEARCH_MAX_PER_PAGE', 50))
+    
+    # Prometheus metrics at GET /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')  # shared by gunicorn workers; unset = this process only
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))  # seconds between worker snapshots
+    METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN')  # bearer token the scraper must send, if set
+    
+    # Public response cache
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')  # memory (per worker), redis (shared), none
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))  # memory backend only
+    RESPONSE_CACHE_LISTING_TTL = int(os.environ.get('RESPONSE_CACHE_LISTING_TTL', 30))  # seconds
+    RESPONSE_CACHE_DETAIL_TTL = int(os.environ.get('RESPONSE_CACHE_DETAIL_TTL', 60))  # seconds
+    
+    # Outbound HTTP to payment providers
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+    HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 20))
+    HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))  # keep-alive connections per host
+    HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+    HTTP_RETRY_BACKOFF = float(os.environ.get('HTTP_RETRY_BACKOFF', 0.25))  # seconds, doubled per attempt
+    HTTP_RETRY_BUDGET = float(os.environ.get('HTTP_RETRY_BUDGET', 0.2))  # retries allowed per request
+    HTTP_BREAKER_THRESHOLD = int(os.environ.get('HTTP_BREAKER_THRESHOLD', 5))  # consecutive failures
+    HTTP_BREAKER_RESET = int(os.environ.get('HTTP_BREAKER_RESET', 30))  # seconds before a probe
     
     # Admin
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@kenfuse.com')
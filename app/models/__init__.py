@@ -1,15 +1,25 @@
 from .user import User
 from .will import Will
 from .memorial import Memorial, Tribute
-from .fundraiser import Fundraiser, Donation
+from .fundraiser import Fundraiser, FundraiserStatusChange, Donation
 from .vendor import VendorProfile, VendorService
 from .payment import Payment
+from .pdf_job import PDFJob
+from .mpesa_callback import MpesaCallback
+from .idempotency_key import IdempotencyKey
+from .scheduler_lease import SchedulerLease
+from .revoked_token import RevokedToken
 
 __all__ = [
     'User',
     'Will',
     'Memorial', 'Tribute',
-    'Fundraiser', 'Donation',
+    'Fundraiser', 'FundraiserStatusChange', 'Donation',
     'VendorProfile', 'VendorService',
-    'Payment'
+    'Payment',
+    'PDFJob',
+    'MpesaCallback',
+    'IdempotencyKey',
+    'SchedulerLease',
+    'RevokedToken'
 ]
@@ -1,19 +1,20 @@
 from app import db
+from app.utils.serializers import Serializable
 from datetime import datetime
 import uuid
 
-class Fundraiser(db.Model):
+class Fundraiser(Serializable, db.Model):
     __tablename__ = 'fundraisers'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
     memorial_id = db.Column(db.String(36), db.ForeignKey('memorials.id'), nullable=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     target_amount = db.Column(db.Float, nullable=False)
     current_amount = db.Column(db.Float, default=0.0)
     currency = db.Column(db.String(3), default='KES')
-    status = db.Column(db.String(20), default='active')  # draft, active, completed, cancelled
+    status = db.Column(db.String(20), default='active')  # draft, active, completed, expired, cancelled
     cover_image = db.Column(db.String(500), nullable=True)
     end_date = db.Column(db.DateTime, nullable=False)
     is_verified = db.Column(db.Boolean, default=False)
@@ -23,24 +24,41 @@ class Fundraiser(db.Model):
     # Relationships
     donations = db.relationship('Donation', backref='fundraiser', lazy=True)
     
-    def to_dict(self):
+    __table_args__ = (
+        # Public listing by status, newest first
+        db.Index('ix_fundraisers_status_verified_created_at', 'status', 'is_verified', 'created_at', 'id'),
+        # Listing with status=all and the admin queue of unverified fundraisers
+        db.Index('ix_fundraisers_verified_created_at', 'is_verified', 'created_at', 'id'),
+        # Lets the expiry sweep range-scan active fundraisers by end_date
+        db.Index('ix_fundraisers_status_end_date', 'status', 'end_date'),
+    )
+    
+    @property
+    def progress_percentage(self):
         progress = (self.current_amount / self.target_amount * 100) if self.target_amount > 0 else 0
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'target_amount': self.target_amount,
-            'current_amount': self.current_amount,
-            'currency': self.currency,
-            'status': self.status,
-            'cover_image': self.cover_image,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'is_verified': self.is_verified,
-            'progress_percentage': min(100, progress),
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        return min(100, progress)
+    
+    serialize_fields = (
+        'id', 'title', 'description', 'target_amount', 'current_amount', 'currency', 'status',
+        'cover_image', 'end_date', 'is_verified', 'progress_percentage', 'created_at'
+    )
+    serialize_depends = {'progress_percentage': ('current_amount', 'target_amount')}
+
+class FundraiserStatusChange(Serializable, db.Model):
+    __tablename__ = 'fundraiser_status_changes'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    fundraiser_id = db.Column(db.String(36), db.ForeignKey('fundraisers.id'), nullable=False, index=True)
+    from_status = db.Column(db.String(20), nullable=False)
+    to_status = db.Column(db.String(20), nullable=False)
+    reason = db.Column(db.String(50), nullable=True)  # expired
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    serialize_fields = (
+        'id', 'fundraiser_id', 'from_status', 'to_status', 'reason', 'created_at'
+    )
 
-class Donation(db.Model):
+class Donation(Serializable, db.Model):
     __tablename__ = 'donations'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -57,15 +75,12 @@ class Donation(db.Model):
     is_anonymous = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'amount': self.amount,
-            'currency': self.currency,
-            'payment_method': self.payment_method,
-            'donor_name': self.donor_name,
-            'donor_email': self.donor_email,
-            'message': self.message,
-            'is_anonymous': self.is_anonymous,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    # Recent donations for a fundraiser
+    __table_args__ = (
+        db.Index('ix_donations_fundraiser_created_at', 'fundraiser_id', 'created_at'),
+    )
+    
+    serialize_fields = (
+        'id', 'amount', 'currency', 'payment_method', 'donor_name', 'donor_email', 'message',
+        'is_anonymous', 'created_at'
+    )
@@ -0,0 +1,13 @@
+from app import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+    
+    id = db.Column(db.String(64), primary_key=True)  # sha256 of scope and client key
+    scope = db.Column(db.String(50), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the original request
+    status_code = db.Column(db.Integer, nullable=False)
+    response = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -1,12 +1,13 @@
 from app import db
+from app.utils.serializers import Serializable
 from datetime import datetime
 import uuid
 
-class Memorial(db.Model):
+class Memorial(Serializable, db.Model):
     __tablename__ = 'memorials'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
     deceased_name = db.Column(db.String(100), nullable=False)
     date_of_birth = db.Column(db.Date, nullable=False)
     date_of_passing = db.Column(db.Date, nullable=False)
@@ -23,23 +24,12 @@ class Memorial(db.Model):
     # Relationships
     tributes = db.relationship('Tribute', backref='memorial', lazy=True)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'deceased_name': self.deceased_name,
-            'date_of_birth': self.date_of_birth.isoformat() if self.date_of_birth else None,
-            'date_of_passing': self.date_of_passing.isoformat() if self.date_of_passing else None,
-            'biography': self.biography,
-            'photo_url': self.photo_url,
-            'visibility': self.visibility,
-            'location': self.location,
-            'obituary': self.obituary,
-            'funeral_details': self.funeral_details,
-            'is_featured': self.is_featured,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    serialize_fields = (
+        'id', 'deceased_name', 'date_of_birth', 'date_of_passing', 'biography', 'photo_url', 'visibility',
+        'location', 'obituary', 'funeral_details', 'is_featured', 'created_at'
+    )
 
-class Tribute(db.Model):
+class Tribute(Serializable, db.Model):
     __tablename__ = 'tributes'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -51,12 +41,6 @@ class Tribute(db.Model):
     is_anonymous = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'message': self.message,
-            'author_name': self.author_name,
-            'relationship': self.relationship,
-            'is_anonymous': self.is_anonymous,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    serialize_fields = (
+        'id', 'memorial_id', 'message', 'author_name', 'relationship', 'is_anonymous', 'created_at'
+    )
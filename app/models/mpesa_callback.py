@@ -0,0 +1,20 @@
+from app import db
+from app.utils.serializers import Serializable
+from datetime import datetime
+import uuid
+
+class MpesaCallback(Serializable, db.Model):
+    __tablename__ = 'mpesa_callbacks'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    checkout_request_id = db.Column(db.String(100), nullable=True, index=True)
+    payload = db.Column(db.JSON, nullable=True)
+    status = db.Column(db.String(20), default='pending', index=True)  # pending, processing, applied, duplicate, unmatched, invalid
+    claim_token = db.Column(db.String(36), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    
+    serialize_fields = (
+        'id', 'checkout_request_id', 'status', 'received_at', 'processed_at'
+    )
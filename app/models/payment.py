@@ -1,8 +1,9 @@
 from app import db
+from app.utils.serializers import Serializable
 from datetime import datetime
 import uuid
 
-class Payment(db.Model):
+class Payment(Serializable, db.Model):
     __tablename__ = 'payments'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -16,18 +17,10 @@ class Payment(db.Model):
     stripe_payment_intent = db.Column(db.String(100), nullable=True)
     description = db.Column(db.String(500), nullable=True)
     payment_data = db.Column(db.JSON, nullable=True)  # Store additional payment data
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'amount': self.amount,
-            'currency': self.currency,
-            'payment_method': self.payment_method,
-            'status': self.status,
-            'transaction_id': self.transaction_id,
-            'mpesa_receipt': self.mpesa_receipt,
-            'description': self.description,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    serialize_fields = (
+        'id', 'amount', 'currency', 'payment_method', 'status', 'transaction_id', 'mpesa_receipt',
+        'description', 'created_at'
+    )
@@ -0,0 +1,23 @@
+from app import db
+from app.utils.serializers import Serializable
+from datetime import datetime
+import uuid
+
+class PDFJob(Serializable, db.Model):
+    __tablename__ = 'pdf_jobs'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    document_type = db.Column(db.String(20), nullable=False)  # will, memorial
+    document_id = db.Column(db.String(36), nullable=False)
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed, failed
+    result_key = db.Column(db.String(64), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    
+    serialize_fields = (
+        'id', 'document_type', 'document_id', 'status', 'error', 'attempts', 'created_at', 'completed_at'
+    )
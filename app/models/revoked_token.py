@@ -0,0 +1,11 @@
+from app import db
+from datetime import datetime
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+    
+    key = db.Column(db.String(36), primary_key=True)  # token jti, or the family id of a login session
+    kind = db.Column(db.String(10), nullable=False)  # jti (used refresh token or logged-out access token), family
+    user_id = db.Column(db.String(36), nullable=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # row can be dropped once every token it covers has expired
@@ -1,8 +1,10 @@
-from app import db, bcrypt
+from app import db
+from app.utils.serializers import Serializable
+from app.services.password_hasher import password_hasher
 from datetime import datetime
 import uuid
 
-class User(db.Model):
+class User(Serializable, db.Model):
     __tablename__ = 'users'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -16,30 +18,37 @@ class User(db.Model):
     subscription_expiry = db.Column(db.DateTime, nullable=True)
     is_verified = db.Column(db.Boolean, default=False)
     is_active = db.Column(db.Boolean, default=True)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # bumped to revoke issued tokens
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Admin user listing, with and without a role filter
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+        db.Index('ix_users_role_created_at_id', 'role', 'created_at', 'id'),
+    )
+    
     # Relationships
     wills = db.relationship('Will', backref='user', lazy=True)
     memorials = db.relationship('Memorial', backref='user', lazy=True)
     fundraisers = db.relationship('Fundraiser', backref='user', lazy=True)
     vendor_profile = db.relationship('VendorProfile', backref='user', uselist=False)
     
+    # Both run on the bounded hashing pool and may raise HasherBusy
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'email': self.email,
-            'phone': self.phone,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'role': self.role,
-            'subscription_plan': self.subscription_plan,
-            'is_verified': self.is_verified,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
+    
+    def revoke_tokens(self):
+        """Invalidate every token issued so far, e.g. after a role, plan or status change"""
+        self.token_version = (self.token_version or 0) + 1
+    
+    serialize_fields = (
+        'id', 'email', 'phone', 'first_name', 'last_name', 'role', 'subscription_plan', 'is_verified',
+        'created_at'
+    )
@@ -1,8 +1,9 @@
 from app import db
+from app.utils.serializers import Serializable
 from datetime import datetime
 import uuid
 
-class VendorProfile(db.Model):
+class VendorProfile(Serializable, db.Model):
     __tablename__ = 'vendor_profiles'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -31,27 +32,19 @@ class VendorProfile(db.Model):
     # Relationships
     services = db.relationship('VendorService', backref='vendor', lazy=True)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'business_name': self.business_name,
-            'category': self.category,
-            'description': self.description,
-            'county': self.county,
-            'town': self.town,
-            'phone': self.phone,
-            'email': self.email,
-            'website': self.website,
-            'logo_url': self.logo_url,
-            'status': self.status,
-            'is_featured': self.is_featured,
-            'rating': self.rating,
-            'review_count': self.review_count,
-            'commission_rate': self.commission_rate,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    # Marketplace filters in equality order, then the rating sort
+    __table_args__ = (
+        db.Index('ix_vendor_profiles_marketplace', 'status', 'is_featured', 'category', 'county', 'rating', 'id'),
+        # Unfiltered marketplace, already in rating order
+        db.Index('ix_vendor_profiles_featured_rating', 'status', 'is_featured', 'rating', 'id'),
+    )
+    
+    serialize_fields = (
+        'id', 'business_name', 'category', 'description', 'county', 'town', 'phone', 'email', 'website',
+        'logo_url', 'status', 'is_featured', 'rating', 'review_count', 'commission_rate', 'created_at'
+    )
 
-class VendorService(db.Model):
+class VendorService(Serializable, db.Model):
     __tablename__ = 'vendor_services'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -65,14 +58,10 @@ class VendorService(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'price': self.price,
-            'currency': self.currency,
-            'duration': self.duration,
-            'is_available': self.is_available,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    __table_args__ = (
+        db.Index('ix_vendor_services_vendor_available', 'vendor_id', 'is_available'),
+    )
+    
+    serialize_fields = (
+        'id', 'name', 'description', 'price', 'currency', 'duration', 'is_available', 'created_at'
+    )
@@ -1,13 +1,14 @@
 from app import db
+from app.utils.serializers import Serializable
 from datetime import datetime
 import uuid
 import json
 
-class Will(db.Model):
+class Will(Serializable, db.Model):
     __tablename__ = 'wills'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     status = db.Column(db.String(20), default='draft')
@@ -17,14 +18,6 @@ class Will(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'content': self.content,
-            'status': self.status,
-            'beneficiaries': self.beneficiaries,
-            'pdf_url': self.pdf_url,
-            'pdf_generated_at': self.pdf_generated_at.isoformat() if self.pdf_generated_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    serialize_fields = (
+        'id', 'title', 'content', 'status', 'beneficiaries', 'pdf_url', 'pdf_generated_at', 'created_at'
+    )
@@ -2,6 +2,12 @@
 from .auth import auth_bp
 from .wills import wills_bp
 from .memorials import memorials_bp
+from .pdf_jobs import pdf_jobs_bp
+from .exports import exports_bp
+from .fundraisers import fundraisers_bp
+from .vendors import vendors_bp
+from .payments import payments_bp
+from .admin import admin_bp
 
 # Export blueprints
-__all__ = ['auth_bp', 'wills_bp', 'memorials_bp']
+__all__ = ['auth_bp', 'wills_bp', 'memorials_bp', 'pdf_jobs_bp', 'exports_bp', 'fundraisers_bp', 'vendors_bp', 'payments_bp', 'admin_bp']
@@ -1,23 +1,21 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import User, VendorProfile, Fundraiser, Memorial, Payment
+from app.services.auth_tokens import claims_required, token_versions
+from app.services.http_client import provider_http
+from app.services.query_stats import endpoint_query_stats
+from app.utils.fieldsets import FieldsetError, requested_fields, with_fields
+from app.utils.pagination import CursorError, keyset_paginate, wants_cursor
 
 admin_bp = Blueprint('admin', __name__)
 
-def is_admin():
-    """Check if current user is admin"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    return user and user.role == 'admin'
+# Checked against the token's role claim, without loading the user
+admin_required = claims_required(roles=('admin',))
 
 @admin_bp.route('/dashboard', methods=['GET'])
-@jwt_required()
+@admin_required
 def dashboard():
     try:
-        if not is_admin():
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         # Get statistics
         total_users = User.query.count()
         total_vendors = VendorProfile.query.count()
@@ -43,67 +41,72 @@ def dashboard():
                 'total_fundraisers': total_fundraisers,
                 'total_memorials': total_memorials
             },
-            'recent_payments': [payment.to_dict() for payment in recent_payments],
-            'pending_vendors': [vendor.to_dict() for vendor in pending_vendors]
+            'recent_payments': Payment.dump(recent_payments),
+            'pending_vendors': VendorProfile.dump(pending_vendors)
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/users', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_users():
     try:
-        if not is_admin():
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         role = request.args.get('role')
+        fields = requested_fields(User)
         
-        query = User.query
+        query = with_fields(User.query, User, fields, User.created_at)
         
         if role:
             query = query.filter_by(role=role)
         
+        if wants_cursor():
+            users = keyset_paginate(query, (User.created_at, User.id), per_page, count_key=('admin_users', role))
+            return jsonify({
+                'users': User.dump(users.items, fields),
+                **users.meta
+            }), 200
+        
         users = query.order_by(User.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         return jsonify({
-            'users': [user.to_dict() for user in users.items],
+            'users': User.dump(users.items, fields),
             'total': users.total,
             'pages': users.pages,
             'current_page': page
         }), 200
         
+    except (CursorError, FieldsetError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/vendors/pending', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_pending_vendors():
     try:
-        if not is_admin():
-            return jsonify({'error': 'Unauthorized'}), 403
+        fields = requested_fields(VendorProfile)
         
-        pending_vendors = VendorProfile.query.filter_by(status='pending').all()
+        pending_vendors = with_fields(VendorProfile.query, VendorProfile, fields).filter_by(status='pending').all()
         
         return jsonify({
-            'vendors': [vendor.to_dict() for vendor in pending_vendors],
+            'vendors': VendorProfile.dump(pending_vendors, fields),
             'count': len(pending_vendors)
         }), 200
         
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/vendors/<vendor_id>/approve', methods=['PUT'])
-@jwt_required()
+@admin_required
 def approve_vendor(vendor_id):
     try:
-        if not is_admin():
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         vendor = VendorProfile.query.get(vendor_id)
         
         if not vendor:
@@ -121,12 +124,9 @@ def approve_vendor(vendor_id):
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/vendors/<vendor_id>/reject', methods=['PUT'])
-@jwt_required()
+@admin_required
 def reject_vendor(vendor_id):
     try:
-        if not is_admin():
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         data = request.get_json()
         
         vendor = VendorProfile.query.get(vendor_id)
@@ -149,29 +149,27 @@ def reject_vendor(vendor_id):
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/fundraisers/pending', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_pending_fundraisers():
     try:
-        if not is_admin():
-            return jsonify({'error': 'Unauthorized'}), 403
+        fields = requested_fields(Fundraiser)
         
-        pending_fundraisers = Fundraiser.query.filter_by(is_verified=False).all()
+        pending_fundraisers = with_fields(Fundraiser.query, Fundraiser, fields).filter_by(is_verified=False).all()
         
         return jsonify({
-            'fundraisers': [fundraiser.to_dict() for fundraiser in pending_fundraisers],
+            'fundraisers': Fundraiser.dump(pending_fundraisers, fields),
             'count': len(pending_fundraisers)
         }), 200
         
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/fundraisers/<fundraiser_id>/verify', methods=['PUT'])
-@jwt_required()
+@admin_required
 def verify_fundraiser(fundraiser_id):
     try:
-        if not is_admin():
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         fundraiser = Fundraiser.query.get(fundraiser_id)
         
         if not fundraiser:
@@ -189,19 +187,18 @@ def verify_fundraiser(fundraiser_id):
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/users/<user_id>/toggle-status', methods=['PUT'])
-@jwt_required()
+@admin_required
 def toggle_user_status(user_id):
     try:
-        if not is_admin():
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         user = User.query.get(user_id)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
         user.is_active = not user.is_active
+        user.revoke_tokens()
         db.session.commit()
+        token_versions.invalidate(user.id)
         
         status = 'activated' if user.is_active else 'deactivated'
         
@@ -212,3 +209,25 @@ def toggle_user_status(user_id):
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/providers/stats', methods=['GET'])
+@admin_required
+def get_provider_stats():
+    try:
+        # Latency, error and circuit breaker state per M-Pesa/Stripe host
+        return jsonify({'hosts': provider_http.stats()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/query-stats', methods=['GET'])
+@admin_required
+def get_query_stats():
+    try:
+        # Queries and DB time per endpoint since this worker started
+        return jsonify({'endpoints': endpoint_query_stats.snapshot()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
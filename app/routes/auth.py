@@ -1,10 +1,22 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from datetime import datetime
 from app import db
+from app.config import Config
 from app.models import User
+from app.services.auth_tokens import issue_tokens
+from app.services.password_hasher import HasherBusy
+from app.services.token_revocation import token_revocations
+from app.utils.conditional import conditional, not_modified, resource_etag
 
 auth_bp = Blueprint('auth', __name__)
 
+def hasher_busy(e):
+    """503 with Retry-After when the password hashing pool is saturated"""
+    response = jsonify({'error': str(e)})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     try:
@@ -30,15 +42,17 @@ def register():
         db.session.add(user)
         db.session.commit()
         
-        # Pass user ID (string) to JWT, not the User object
-        access_token = create_access_token(identity=user.id)
+        # User ID as identity, with role/plan claims so handlers need not reload the user
+        tokens = issue_tokens(user)
         
         return jsonify({
             'message': 'User registered successfully',
             'user': user.to_dict(),
-            'access_token': access_token
+            **tokens
         }), 201
         
+    except HasherBusy as e:
+        return hasher_busy(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -55,15 +69,72 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
         
-        # Pass user ID (string) to JWT, not the User object
-        access_token = create_access_token(identity=user.id)
+        if not user.is_active:
+            return jsonify({'error': 'Account is deactivated'}), 403
+        
+        # Move the hash to the current BCRYPT_LOG_ROUNDS; skipped when the hashing pool is busy
+        if user.password_needs_rehash():
+            try:
+                user.set_password(data['password'])
+                db.session.commit()
+            except HasherBusy:
+                pass
+        
+        # User ID as identity, with role/plan claims so handlers need not reload the user
+        tokens = issue_tokens(user)
         
         return jsonify({
             'message': 'Login successful',
             'user': user.to_dict(),
-            'access_token': access_token
+            **tokens
         }), 200
         
+    except HasherBusy as e:
+        return hasher_busy(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """Swap a refresh token for a new access/refresh pair; each refresh token works once"""
+    try:
+        claims = get_jwt()
+        user_id = get_jwt_identity()
+        family = claims.get('fam')
+        
+        # A refresh token presented twice has leaked: end the whole login session
+        if not token_revocations.claim(claims['jti'], user_id, datetime.utcfromtimestamp(claims['exp'])):
+            token_revocations.revoke(family, 'family', user_id,
+                                     datetime.utcnow() + Config.JWT_REFRESH_TOKEN_EXPIRES)
+            return jsonify({'error': 'Refresh token reuse detected, please log in again'}), 401
+        
+        # Reload so the new access token carries the current role and plan
+        user = User.query.get(user_id)
+        
+        if not user or not user.is_active:
+            return jsonify({'error': 'Account is deactivated'}), 401
+        
+        return jsonify(issue_tokens(user, family)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """Revoke the login session of the presented access or refresh token"""
+    try:
+        claims = get_jwt()
+        user_id = get_jwt_identity()
+        
+        token_revocations.revoke(claims['jti'], 'jti', user_id, datetime.utcfromtimestamp(claims['exp']))
+        if claims.get('fam'):
+            token_revocations.revoke(claims['fam'], 'family', user_id,
+                                     datetime.utcnow() + Config.JWT_REFRESH_TOKEN_EXPIRES)
+        
+        return jsonify({'message': 'Logged out successfully'}), 200
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -77,7 +148,12 @@ def get_current_user():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify({'user': user.to_dict()}), 200
+        etag = resource_etag(user.id, user.updated_at)
+        unchanged = not_modified(etag, user.updated_at)
+        if unchanged:
+            return unchanged
+        
+        return conditional((jsonify({'user': user.to_dict()}), 200), etag, user.updated_at)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,45 @@
+from flask import Blueprint, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.utils import secure_filename
+from app.models import Will, Memorial, User
+from app.routes.wills import will_job_snapshot
+from app.routes.memorials import memorial_job_snapshot
+from app.services.document_export import stream_documents_zip
+
+exports_bp = Blueprint('exports', __name__)
+
+@exports_bp.route('/documents', methods=['GET'])
+@jwt_required()
+def export_all_documents():
+    """Download every will and memorial of the current user as one ZIP"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        wills = Will.query.filter_by(user_id=current_user_id).all()
+        memorials = Memorial.query.filter_by(user_id=current_user_id).all()
+        
+        # Snapshot everything up front so rendering never touches the session
+        documents = []
+        for will in wills:
+            will_data, user_data, key = will_job_snapshot(will, user)
+            name = secure_filename(will.title) or 'will'
+            documents.append((f"wills/{name}_{will.id[:8]}.pdf", 'will', will_data, user_data, key))
+        
+        for memorial in memorials:
+            memorial_data, _, key = memorial_job_snapshot(memorial)
+            name = secure_filename(memorial.deceased_name) or 'memorial'
+            documents.append((f"memorials/{name}_{memorial.id[:8]}.pdf", 'memorial', memorial_data, None, key))
+        
+        response = Response(
+            stream_with_context(stream_documents_zip(documents)),
+            mimetype='application/zip'
+        )
+        response.headers.set('Content-Disposition', 'attachment', filename='kenfuse_documents.zip')
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,24 +1,27 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import Fundraiser, Donation, User
+from app.config import Config
+from app.models import Fundraiser, Donation
+from app.services.auth_tokens import claims_required
+from app.services.donations import record_donation
+from app.services.idempotency import idempotent
+from app.services.response_cache import response_cache
+from app.utils.conditional import conditional, not_modified, resource_etag
+from app.utils.fieldsets import FieldsetError, requested_fields, with_fields
+from app.utils.pagination import CursorError, keyset_paginate, wants_cursor
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+import uuid
 
 fundraisers_bp = Blueprint('fundraisers', __name__)
 
 @fundraisers_bp.route('/', methods=['POST'])
-@jwt_required()
+@claims_required(plans=('standard', 'premium'),
+                 error='Free users cannot create fundraisers. Upgrade to Standard or Premium.')
 def create_fundraiser():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        # Check subscription
-        if user.subscription_plan == 'free':
-            return jsonify({'error': 'Free users cannot create fundraisers. Upgrade to Standard or Premium.'}), 403
         
         data = request.get_json()
         
@@ -61,56 +64,86 @@ def create_fundraiser():
         return jsonify({'error': str(e)}), 500
 
 @fundraisers_bp.route('/', methods=['GET'])
+@response_cache.cached(Config.RESPONSE_CACHE_LISTING_TTL, tags=lambda: ['fundraisers'])
 def get_fundraisers():
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         status = request.args.get('status', 'active')
+        fields = requested_fields(Fundraiser)
         
-        query = Fundraiser.query
+        query = with_fields(Fundraiser.query, Fundraiser, fields, Fundraiser.created_at)
         
         if status != 'all':
             query = query.filter_by(status=status)
         
+        # Hide campaigns that have ended but not been swept yet
+        if status == 'active':
+            query = query.filter(Fundraiser.end_date > datetime.utcnow())
+        
         query = query.filter_by(is_verified=True)
         
+        if wants_cursor():
+            fundraisers = keyset_paginate(
+                query, (Fundraiser.created_at, Fundraiser.id), per_page, count_key=('fundraisers', status)
+            )
+            return jsonify({
+                'fundraisers': Fundraiser.dump(fundraisers.items, fields),
+                **fundraisers.meta
+            }), 200
+        
         fundraisers = query.order_by(Fundraiser.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         return jsonify({
-            'fundraisers': [fundraiser.to_dict() for fundraiser in fundraisers.items],
+            'fundraisers': Fundraiser.dump(fundraisers.items, fields),
             'total': fundraisers.total,
             'pages': fundraisers.pages,
             'current_page': page
         }), 200
         
+    except (CursorError, FieldsetError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @fundraisers_bp.route('/<fundraiser_id>', methods=['GET'])
+@response_cache.cached(Config.RESPONSE_CACHE_DETAIL_TTL, tags=lambda fundraiser_id: [f"fundraiser:{fundraiser_id}"])
 def get_fundraiser(fundraiser_id):
     try:
-        fundraiser = Fundraiser.query.get(fundraiser_id)
+        fields = requested_fields(Fundraiser, extra=('recent_donations',))
+        fundraiser = with_fields(Fundraiser.query, Fundraiser, fields, Fundraiser.updated_at).get(fundraiser_id)
         
         if not fundraiser:
             return jsonify({'error': 'Fundraiser not found'}), 404
         
-        # Get recent donations
-        donations = Donation.query.filter_by(fundraiser_id=fundraiser_id)\
-            .order_by(Donation.created_at.desc())\
-            .limit(10)\
-            .all()
+        # Every donation moves updated_at, so it also covers recent_donations
+        etag = resource_etag(fundraiser.id, fundraiser.updated_at, *(fields or ()))
+        unchanged = not_modified(etag, fundraiser.updated_at)
+        if unchanged:
+            return unchanged
         
-        fundraiser_data = fundraiser.to_dict()
-        fundraiser_data['recent_donations'] = [donation.to_dict() for donation in donations]
+        fundraiser_data = fundraiser.to_dict(fields)
+        
+        # Get recent donations
+        if fields is None or 'recent_donations' in fields:
+            donations = Donation.query.filter_by(fundraiser_id=fundraiser_id)\
+                .order_by(Donation.created_at.desc())\
+                .limit(10)\
+                .all()
+            fundraiser_data['recent_donations'] = Donation.dump(donations)
         
-        return jsonify(fundraiser_data), 200
+        return conditional((jsonify(fundraiser_data), 200), etag, fundraiser.updated_at)
         
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @fundraisers_bp.route('/<fundraiser_id>/donate', methods=['POST'])
+@jwt_required(optional=True)
+@idempotent('donate')
 def donate(fundraiser_id):
     try:
         fundraiser = Fundraiser.query.get(fundraiser_id)
@@ -118,7 +151,8 @@ def donate(fundraiser_id):
         if not fundraiser:
             return jsonify({'error': 'Fundraiser not found'}), 404
         
-        if fundraiser.status != 'active':
+        # Past its end date but not yet swept
+        if fundraiser.status != 'active' or fundraiser.end_date <= datetime.utcnow():
             return jsonify({'error': 'This fundraiser is not accepting donations'}), 400
         
         data = request.get_json()
@@ -128,15 +162,19 @@ def donate(fundraiser_id):
             if field not in data:
                 return jsonify({'error': f'Missing field: {field}'}), 400
         
-        current_user_id = get_jwt_identity() if request.headers.get('Authorization') else None
+        amount = float(data['amount'])
+        if amount <= 0:
+            return jsonify({'error': 'Amount must be greater than zero'}), 400
+        
+        current_user_id = get_jwt_identity()
         
         # Generate transaction ID
         transaction_id = f"TXN{datetime.utcnow().strftime('%Y%m%d%H%M%S')}{str(uuid.uuid4())[:8]}"
         
-        donation = Donation(
+        donation_fields = dict(
             fundraiser_id=fundraiser_id,
             donor_id=current_user_id,
-            amount=float(data['amount']),
+            amount=amount,
             payment_method=data['payment_method'],
             transaction_id=transaction_id,
             donor_name=data['donor_name'],
@@ -146,22 +184,16 @@ def donate(fundraiser_id):
             is_anonymous=data.get('is_anonymous', False)
         )
         
-        # Update fundraiser total
-        fundraiser.current_amount += float(data['amount'])
-        
-        # Check if target reached
-        if fundraiser.current_amount >= fundraiser.target_amount:
-            fundraiser.status = 'completed'
-        
-        db.session.add(donation)
-        db.session.commit()
+        # Insert the donation and update the fundraiser total in one transaction
+        result = record_donation(donation_fields, idempotency=g.idempotency)
+        if result is None:
+            return jsonify({'error': 'This fundraiser is not accepting donations'}), 400
         
-        return jsonify({
-            'message': 'Donation recorded successfully',
-            'donation': donation.to_dict(),
-            'transaction_id': transaction_id
-        }), 201
+        return jsonify(result), 201
         
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'A donation with this Idempotency-Key was recorded by another request'}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -171,12 +203,16 @@ def get_user_fundraisers():
     try:
         current_user_id = get_jwt_identity()
         
-        fundraisers = Fundraiser.query.filter_by(user_id=current_user_id).all()
+        fields = requested_fields(Fundraiser)
+        
+        fundraisers = with_fields(Fundraiser.query, Fundraiser, fields).filter_by(user_id=current_user_id).all()
         
         return jsonify({
-            'fundraisers': [fundraiser.to_dict() for fundraiser in fundraisers],
+            'fundraisers': Fundraiser.dump(fundraisers, fields),
             'count': len(fundraisers)
         }), 200
         
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
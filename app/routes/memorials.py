@@ -1,33 +1,76 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from io import BytesIO
 from app import db
 from app.models import Memorial, Tribute
-from app.utils.pdf_generator import PDFGenerator
+from app.utils.pdf_engine import pdf_engine
+from app.services.pdf_cache import client_encodings, memorial_cache_key, pdf_artifact_cache, pdf_response
+from app.services.pdf_jobs import pdf_job_queue
+from app.utils.conditional import conditional, not_modified, resource_etag
+from app.utils.fieldsets import FieldsetError, requested_fields, with_fields
 
 memorials_bp = Blueprint('memorials', __name__)
 
+def memorial_pdf_data(memorial):
+    """Data passed to the memorial PDF renderer"""
+    return {
+        'title': f"In Loving Memory of {memorial.deceased_name}",
+        'name': memorial.deceased_name,
+        'birth_date': memorial.date_of_birth.isoformat() if memorial.date_of_birth else None,
+        'death_date': memorial.date_of_passing.isoformat() if memorial.date_of_passing else None,
+        'biography': memorial.biography
+    }
+
+def memorial_job_snapshot(memorial):
+    """Picklable copy of a memorial for background rendering"""
+    memorial_data = memorial_pdf_data(memorial)
+    return memorial_data, None, memorial_cache_key(memorial_data)
+
+def load_memorial_job(memorial_id, user_id):
+    """Snapshot a memorial for background rendering"""
+    memorial = Memorial.query.filter_by(id=memorial_id, user_id=user_id).first()
+    
+    if not memorial:
+        return None
+    
+    return memorial_job_snapshot(memorial)
+
+pdf_job_queue.register_loader('memorial', load_memorial_job)
+
 @memorials_bp.route('/memorials', methods=['GET'])
 @jwt_required()
 def get_memorials():
     """Get all memorials for current user"""
     current_user_id = get_jwt_identity()
-    memorials = Memorial.query.filter_by(user_id=current_user_id).all()
-    return jsonify([m.to_dict() for m in memorials]), 200
+    try:
+        fields = requested_fields(Memorial)
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
+    memorials = with_fields(Memorial.query, Memorial, fields).filter_by(user_id=current_user_id).all()
+    return jsonify(Memorial.dump(memorials, fields)), 200
 
-@memorials_bp.route('/memorials/<int:memorial_id>', methods=['GET'])
+@memorials_bp.route('/memorials/<memorial_id>', methods=['GET'])
 @jwt_required()
 def get_memorial(memorial_id):
     """Get a single memorial"""
     current_user_id = get_jwt_identity()
-    memorial = Memorial.query.filter_by(id=memorial_id, user_id=current_user_id).first()
+    try:
+        fields = requested_fields(Memorial)
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
+    memorial = with_fields(Memorial.query, Memorial, fields, Memorial.updated_at)\
+        .filter_by(id=memorial_id, user_id=current_user_id).first()
     
     if not memorial:
         return jsonify({'error': 'Memorial not found'}), 404
     
-    return jsonify(memorial.to_dict()), 200
+    etag = resource_etag(memorial.id, memorial.updated_at, *(fields or ()))
+    unchanged = not_modified(etag, memorial.updated_at)
+    if unchanged:
+        return unchanged
+    
+    return conditional((jsonify(memorial.to_dict(fields)), 200), etag, memorial.updated_at)
 
-@memorials_bp.route('/memorials/<int:memorial_id>/pdf', methods=['GET'])
+@memorials_bp.route('/memorials/<memorial_id>/pdf', methods=['GET'])
 @jwt_required()
 def generate_memorial_pdf(memorial_id):
     """Generate a PDF for a memorial"""
@@ -39,25 +82,41 @@ def generate_memorial_pdf(memorial_id):
         return jsonify({'error': 'Memorial not found'}), 404
     
     # Prepare data for PDF generation
-    memorial_data = {
-        'title': memorial.title,
-        'name': memorial.name,
-        'birth_date': memorial.birth_date.isoformat() if memorial.birth_date else None,
-        'death_date': memorial.death_date.isoformat() if memorial.death_date else None,
-        'biography': memorial.biography
-    }
+    memorial_data = memorial_pdf_data(memorial)
+    key = memorial_cache_key(memorial_data)
+    
+    # The cache key hashes everything rendered, so a match means the client's copy is current
+    etag = f'W/"{key}"'
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    
+    # Stream the PDF, or serve it from the artifact cache if unchanged
+    pdf_body, pdf_size, pdf_encoding = pdf_artifact_cache.fetch(
+        key,
+        lambda: pdf_engine.stream_memorial(memorial_data),
+        client_encodings()
+    )
     
-    # Generate PDF
-    pdf_content = PDFGenerator.generate_memorial_pdf(memorial_data)
+    return conditional(pdf_response(
+        pdf_body,
+        f'memorial_{memorial_id}_{memorial.deceased_name.replace(" ", "_")}.pdf',
+        pdf_size,
+        pdf_encoding
+    ), etag)
+
+@memorials_bp.route('/memorials/<memorial_id>/pdf/jobs', methods=['POST'])
+@jwt_required()
+def enqueue_memorial_pdf(memorial_id):
+    """Render a memorial PDF in the background"""
+    current_user_id = get_jwt_identity()
     
-    # Create BytesIO object from PDF content
-    pdf_file = BytesIO(pdf_content)
-    pdf_file.seek(0)
+    job = pdf_job_queue.enqueue(current_user_id, 'memorial', memorial_id)
+    
+    if not job:
+        return jsonify({'error': 'Memorial not found'}), 404
     
-    # Send the PDF as a file download
-    return send_file(
-        pdf_file,
-        as_attachment=True,
-        download_name=f'memorial_{memorial_id}_{memorial.name.replace(" ", "_")}.pdf',
-        mimetype='application/pdf'
-    )
\ No newline at end of file
+    return jsonify({
+        'message': 'PDF render queued',
+        'job': job.to_dict()
+    }), 202
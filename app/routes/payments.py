@@ -1,17 +1,24 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 import stripe
-import requests
 import base64
 from datetime import datetime
 from app import db
 from app.models import Payment, User
 from app.config import Config
+from app.services.auth_tokens import create_user_token, token_versions
+from app.services.token_cache import AccessTokenCache, FileTokenStore
+from app.services.http_client import provider_http
+from app.services.mpesa_callbacks import record_callback, mpesa_callback_consumer
 
 payments_bp = Blueprint('payments', __name__)
 
 # Initialize Stripe
 stripe.api_key = Config.STRIPE_SECRET_KEY
+stripe.api_base = Config.STRIPE_API_BASE
+# Share the provider connection pool; retries go through its retry budget
+stripe.default_http_client = stripe.RequestsClient(session=provider_http, timeout=provider_http.timeout)
+stripe.max_network_retries = 0
 
 class MpesaService:
     def __init__(self):
@@ -20,22 +27,38 @@ class MpesaService:
         self.shortcode = Config.MPESA_SHORTCODE
         self.passkey = Config.MPESA_PASSKEY
         self.callback_url = Config.MPESA_CALLBACK_URL
+        self.base_url = Config.MPESA_BASE_URL.rstrip('/')
+        self.http = provider_http
+        
+        # Reuse the OAuth token until it is about to expire
+        token_store = FileTokenStore(Config.MPESA_TOKEN_CACHE_FILE) if Config.MPESA_TOKEN_CACHE_FILE else None
+        self.token_cache = AccessTokenCache(
+            self.fetch_access_token,
+            refresh_margin=Config.MPESA_TOKEN_REFRESH_MARGIN,
+            store=token_store,
+            retry_backoff=Config.MPESA_TOKEN_RETRY_BACKOFF
+        )
     
-    def get_access_token(self):
-        """Get M-Pesa access token"""
-        url = "https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
+    def fetch_access_token(self):
+        """Request a new M-Pesa access token, returning (token, expires_in)"""
+        url = f"{self.base_url}/oauth/v1/generate?grant_type=client_credentials"
         auth_string = f"{self.consumer_key}:{self.consumer_secret}"
         encoded_auth = base64.b64encode(auth_string.encode()).decode()
         
         headers = {'Authorization': f'Basic {encoded_auth}'}
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self.http.get(url, headers=headers)
             response.raise_for_status()
-            return response.json()['access_token']
+            data = response.json()
+            return data['access_token'], int(data.get('expires_in', 3599))
         except Exception as e:
             raise Exception(f"M-Pesa token error: {str(e)}")
     
+    def get_access_token(self):
+        """Get M-Pesa access token"""
+        return self.token_cache.get()
+    
     def stk_push(self, phone, amount, reference, description):
         """Initiate STK Push"""
         token = self.get_access_token()
@@ -45,7 +68,7 @@ class MpesaService:
             f"{self.shortcode}{self.passkey}{timestamp}".encode()
         ).decode()
         
-        url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
+        url = f"{self.base_url}/mpesa/stkpush/v1/processrequest"
         
         headers = {
             'Authorization': f'Bearer {token}',
@@ -67,7 +90,12 @@ class MpesaService:
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers)
+            response = self.http.post(url, json=payload, headers=headers)
+            if response.status_code == 401:
+                # Token revoked before its expiry - fetch a new one and retry once
+                self.token_cache.invalidate()
+                headers['Authorization'] = f'Bearer {self.get_access_token()}'
+                response = self.http.post(url, json=payload, headers=headers)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -80,10 +108,6 @@ mpesa_service = MpesaService()
 def initiate_mpesa_payment():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
         
         data = request.get_json()
         
@@ -152,10 +176,6 @@ def initiate_mpesa_payment():
 def create_card_payment():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
         
         data = request.get_json()
         
@@ -200,29 +220,11 @@ def create_card_payment():
 @payments_bp.route('/mpesa/callback', methods=['POST'])
 def mpesa_callback():
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
-        # Process M-Pesa callback
-        result_code = data.get('Body', {}).get('stkCallback', {}).get('ResultCode')
-        checkout_request_id = data.get('Body', {}).get('stkCallback', {}).get('CheckoutRequestID')
-        
-        # Find payment by checkout request ID
-        payment = Payment.query.filter_by(transaction_id=checkout_request_id).first()
-        
-        if payment:
-            if result_code == 0:
-                payment.status = 'completed'
-                # Extract M-Pesa receipt number
-                callback_metadata = data.get('Body', {}).get('stkCallback', {}).get('CallbackMetadata', {}).get('Item', [])
-                for item in callback_metadata:
-                    if item.get('Name') == 'MpesaReceiptNumber':
-                        payment.mpesa_receipt = item.get('Value')
-                        break
-            else:
-                payment.status = 'failed'
-            
-            payment.payment_data = data
-            db.session.commit()
+        # Store the raw callback and acknowledge; the consumer applies it to the payment
+        record_callback(data)
+        mpesa_callback_consumer.notify()
         
         return jsonify({'status': 'ok'}), 200
         
@@ -256,11 +258,14 @@ def upgrade_subscription():
         # If free plan, just update
         if plan_price == 0:
             user.subscription_plan = plan
+            user.revoke_tokens()
             db.session.commit()
+            token_versions.invalidate(user.id)
             
             return jsonify({
                 'message': f'Subscription updated to {plan}',
-                'user': user.to_dict()
+                'user': user.to_dict(),
+                'access_token': create_user_token(user, get_jwt().get('fam'))
             }), 200
         
         # For paid plans, require payment
@@ -283,11 +288,15 @@ def upgrade_subscription():
             
             if payment_response.get('ResponseCode') == '0':
                 user.subscription_plan = plan
+                user.revoke_tokens()
                 db.session.commit()
+                token_versions.invalidate(user.id)
                 
+                # The old token still carries the previous plan
                 return jsonify({
                     'message': f'Subscription upgraded to {plan}',
-                    'user': user.to_dict()
+                    'user': user.to_dict(),
+                    'access_token': create_user_token(user, get_jwt().get('fam'))
                 }), 200
             else:
                 return jsonify({
@@ -0,0 +1,57 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models import PDFJob
+from app.services.pdf_cache import client_encodings, pdf_artifact_cache, pdf_response
+from app.services.pdf_jobs import pdf_job_queue
+
+pdf_jobs_bp = Blueprint('pdf_jobs', __name__)
+
+@pdf_jobs_bp.route('/<job_id>', methods=['GET'])
+@jwt_required()
+def get_pdf_job(job_id):
+    """Poll the status of a background PDF render"""
+    try:
+        current_user_id = get_jwt_identity()
+        
+        job = PDFJob.query.filter_by(id=job_id, user_id=current_user_id).first()
+        
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        # Re-queue jobs orphaned by a worker restart
+        job = pdf_job_queue.refresh(job)
+        
+        return jsonify({'job': job.to_dict()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@pdf_jobs_bp.route('/<job_id>/download', methods=['GET'])
+@jwt_required()
+def download_pdf_job(job_id):
+    """Download the PDF produced by a completed job"""
+    try:
+        current_user_id = get_jwt_identity()
+        
+        job = PDFJob.query.filter_by(id=job_id, user_id=current_user_id).first()
+        
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        if job.status != 'completed':
+            return jsonify({'error': 'PDF not ready', 'job': job.to_dict()}), 409
+        
+        pdf_file, pdf_size, pdf_encoding = pdf_artifact_cache.open_encoded(job.result_key, client_encodings())
+        
+        if pdf_file is None:
+            return jsonify({'error': 'PDF no longer available'}), 410
+        
+        return pdf_response(
+            pdf_file,
+            f"kenfuse_{job.document_type}_{job.document_id[:8]}.pdf",
+            pdf_size,
+            pdf_encoding
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
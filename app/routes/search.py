@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify
+from app.config import Config
+from app.services.search import SearchQueryError, search_index
+from app.utils.fieldsets import FieldsetError, requested_fields
+
+search_bp = Blueprint('search', __name__)
+
+@search_bp.route('/', methods=['GET'])
+def search():
+    """Ranked full-text search: ?q=wanjiku nyeri&type=memorials|tributes|fundraisers"""
+    try:
+        if search_index.backend is None:
+            return jsonify({'error': 'Search is not available'}), 503
+        
+        search_type = request.args.get('type', 'memorials')
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), Config.SEARCH_MAX_PER_PAGE)
+        
+        kind = search_index.kind(search_type)
+        fields = requested_fields(kind.model)
+        
+        results = search_index.search(search_type, request.args.get('q'), page, per_page, fields)
+        
+        return jsonify({
+            search_type: kind.dump(results.items, fields),
+            'total': results.total,
+            'pages': results.pages,
+            'current_page': page
+        }), 200
+        
+    except (SearchQueryError, FieldsetError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
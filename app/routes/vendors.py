@@ -1,28 +1,28 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app import db
+from app.config import Config
 from app.models import VendorProfile, VendorService, User
+from app.services.auth_tokens import claims_required, create_user_token, token_versions
+from app.services.response_cache import response_cache
+from app.utils.conditional import conditional, not_modified, resource_etag
+from app.utils.fieldsets import FieldsetError, requested_fields, with_fields
+from app.utils.pagination import CursorError, keyset_paginate, wants_cursor
 
 vendors_bp = Blueprint('vendors', __name__)
 
 @vendors_bp.route('/register', methods=['POST'])
-@jwt_required()
+@claims_required(plans=('premium',), error='Premium subscription required for vendor marketplace')
 def register_vendor():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        # Check subscription
-        if user.subscription_plan != 'premium':
-            return jsonify({'error': 'Premium subscription required for vendor marketplace'}), 403
         
         # Check if already a vendor
-        if user.role == 'vendor' or VendorProfile.query.filter_by(user_id=current_user_id).first():
+        if get_jwt()['role'] == 'vendor' or VendorProfile.query.filter_by(user_id=current_user_id).first():
             return jsonify({'error': 'User is already registered as a vendor'}), 409
         
+        user = User.query.get(current_user_id)
+        
         data = request.get_json()
         
         required_fields = [
@@ -34,8 +34,9 @@ def register_vendor():
             if field not in data:
                 return jsonify({'error': f'Missing field: {field}'}), 400
         
-        # Update user role
+        # Update user role; tokens carrying the old role stop working
         user.role = 'vendor'
+        user.revoke_tokens()
         
         # Create vendor profile
         vendor = VendorProfile(
@@ -56,24 +57,29 @@ def register_vendor():
         
         db.session.add(vendor)
         db.session.commit()
+        token_versions.invalidate(current_user_id)
         
         return jsonify({
             'message': 'Vendor registration submitted successfully. Awaiting admin approval.',
-            'vendor': vendor.to_dict()
+            'vendor': vendor.to_dict(),
+            'access_token': create_user_token(user, get_jwt().get('fam'))
         }), 201
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @vendors_bp.route('/marketplace', methods=['GET'])
+@response_cache.cached(Config.RESPONSE_CACHE_LISTING_TTL, tags=lambda: ['vendors'])
 def get_vendors():
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         category = request.args.get('category')
         county = request.args.get('county')
+        fields = requested_fields(VendorProfile)
         
-        query = VendorProfile.query.filter_by(status='verified', is_featured=True)
+        query = with_fields(VendorProfile.query, VendorProfile, fields, VendorProfile.rating)\
+            .filter_by(status='verified', is_featured=True)
         
         if category:
             query = query.filter_by(category=category)
@@ -81,24 +87,38 @@ def get_vendors():
         if county:
             query = query.filter_by(county=county)
         
+        if wants_cursor():
+            vendors = keyset_paginate(
+                query, (VendorProfile.rating, VendorProfile.id), per_page, count_key=('marketplace', category, county)
+            )
+            return jsonify({
+                'vendors': VendorProfile.dump(vendors.items, fields),
+                **vendors.meta
+            }), 200
+        
         vendors = query.order_by(VendorProfile.rating.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         return jsonify({
-            'vendors': [vendor.to_dict() for vendor in vendors.items],
+            'vendors': VendorProfile.dump(vendors.items, fields),
             'total': vendors.total,
             'pages': vendors.pages,
             'current_page': page
         }), 200
         
+    except (CursorError, FieldsetError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @vendors_bp.route('/<vendor_id>', methods=['GET'])
+@response_cache.cached(Config.RESPONSE_CACHE_DETAIL_TTL, tags=lambda vendor_id: [f"vendor:{vendor_id}"])
 def get_vendor(vendor_id):
     try:
-        vendor = VendorProfile.query.get(vendor_id)
+        fields = requested_fields(VendorProfile, extra=('services',))
+        vendor = with_fields(VendorProfile.query, VendorProfile, fields, VendorProfile.status, VendorProfile.updated_at)\
+            .get(vendor_id)
         
         if not vendor:
             return jsonify({'error': 'Vendor not found'}), 404
@@ -107,13 +127,26 @@ def get_vendor(vendor_id):
             return jsonify({'error': 'Vendor not verified'}), 403
         
         # Get vendor services
-        services = VendorService.query.filter_by(vendor_id=vendor_id, is_available=True).all()
-        
-        vendor_data = vendor.to_dict()
-        vendor_data['services'] = [service.to_dict() for service in services]
-        
-        return jsonify(vendor_data), 200
-        
+        services = []
+        if fields is None or 'services' in fields:
+            services = VendorService.query.filter_by(vendor_id=vendor_id, is_available=True).all()
+        
+        parts = [vendor.id, vendor.updated_at, *(fields or ())]
+        parts += [(service.id, service.updated_at) for service in services]
+        last_modified = max(filter(None, [vendor.updated_at] + [service.updated_at for service in services]), default=None)
+        etag = resource_etag(*parts)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
+        
+        vendor_data = vendor.to_dict(fields)
+        if fields is None or 'services' in fields:
+            vendor_data['services'] = VendorService.dump(services)
+        
+        return conditional((jsonify(vendor_data), 200), etag, last_modified)
+        
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
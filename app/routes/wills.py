@@ -2,132 +2,62 @@ from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import Will, User
+from app.services.pdf_cache import client_encodings, pdf_artifact_cache, pdf_response, will_cache_key
+from app.services.pdf_jobs import pdf_job_queue
+from app.utils.conditional import conditional, not_modified
+from app.utils.fieldsets import FieldsetError, requested_fields, with_fields
+from app.utils.pdf_engine import pdf_engine
 from io import BytesIO
-from fpdf import FPDF
+from types import SimpleNamespace
 import os
 
 wills_bp = Blueprint('wills', __name__)
 
 
-class WillPDF(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, 'KENFUSE - End of Life Planning Platform', 0, 1, 'C')
-        self.ln(5)
-    
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-
-
 def generate_will_pdf(will, user):
     """Generate a real PDF for a will"""
-    from datetime import datetime
-    
-    pdf = WillPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    
-    # Title
-    pdf.set_font('Arial', 'B', 16)
-    pdf.cell(0, 10, 'LAST WILL AND TESTAMENT', 0, 1, 'C')
-    pdf.ln(5)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(10)
-    
-    # Testator Information
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'TESTATOR INFORMATION', 0, 1)
-    pdf.set_font('Arial', '', 11)
-    pdf.cell(0, 8, f"Name: {user.first_name} {user.last_name}", 0, 1)
-    pdf.cell(0, 8, f"Email: {user.email}", 0, 1)
-    if user.phone:
-        pdf.cell(0, 8, f"Phone: {user.phone}", 0, 1)
-    pdf.ln(5)
-    
-    # Will Details
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'WILL DETAILS', 0, 1)
-    pdf.set_font('Arial', '', 11)
-    pdf.cell(0, 8, f"Title: {will.title}", 0, 1)
-    pdf.cell(0, 8, f"Created: {will.created_at.strftime('%d %B, %Y')}", 0, 1)
-    pdf.cell(0, 8, f"Status: {will.status.upper()}", 0, 1)
-    pdf.cell(0, 8, f"Document ID: {str(will.id)[:8].upper()}", 0, 1)
-    pdf.ln(10)
-    
-    # Declaration
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'DECLARATION', 0, 1)
-    pdf.set_font('Arial', '', 11)
-    declaration = (f"I, {user.first_name} {user.last_name}, being of sound mind and memory, "
-                   f"do hereby make, publish, and declare this to be my Last Will and Testament, "
-                   f"hereby revoking all former Wills and Codicils by me made.")
-    pdf.multi_cell(0, 8, declaration)
-    pdf.ln(10)
-    
-    # Will Content
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'WILL CONTENT', 0, 1)
-    pdf.set_font('Arial', '', 11)
-    pdf.multi_cell(0, 8, will.content or 'No content provided.')
-    pdf.ln(10)
-    
-    # Beneficiaries
-    if will.beneficiaries:
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 10, 'BENEFICIARIES', 0, 1)
-        pdf.set_font('Arial', '', 11)
-        for beneficiary in will.beneficiaries:
-            name = beneficiary.get('name', 'N/A')
-            relationship = beneficiary.get('relationship', 'N/A')
-            share = beneficiary.get('share', 'N/A')
-            pdf.cell(0, 8, f"- {name} ({relationship}): {share}", 0, 1)
-        pdf.ln(10)
-    
-    # Signatures
-    pdf.add_page()
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'SIGNATURES', 0, 1)
-    pdf.ln(10)
-    
-    pdf.set_font('Arial', '', 11)
-    pdf.cell(0, 8, 'Testator:', 0, 1)
-    pdf.cell(0, 15, '_' * 50, 0, 1)
-    pdf.cell(0, 8, f"{user.first_name} {user.last_name}", 0, 1)
-    pdf.cell(0, 8, f"Date: _______________", 0, 1)
-    pdf.ln(15)
-    
-    pdf.cell(0, 8, 'Witness 1:', 0, 1)
-    pdf.cell(0, 15, '_' * 50, 0, 1)
-    pdf.cell(0, 8, 'Name: _________________________', 0, 1)
-    pdf.cell(0, 8, 'ID: ___________________________', 0, 1)
-    pdf.ln(15)
-    
-    pdf.cell(0, 8, 'Witness 2:', 0, 1)
-    pdf.cell(0, 15, '_' * 50, 0, 1)
-    pdf.cell(0, 8, 'Name: _________________________', 0, 1)
-    pdf.cell(0, 8, 'ID: ___________________________', 0, 1)
+    return pdf_engine.render_will(will, user)
+
+
+def will_job_snapshot(will, user):
+    """Picklable copy of a will and its testator for background rendering"""
+    will_data = SimpleNamespace(
+        id=will.id,
+        title=will.title,
+        content=will.content,
+        status=will.status,
+        beneficiaries=will.beneficiaries,
+        created_at=will.created_at
+    )
+    user_data = SimpleNamespace(
+        first_name=user.first_name,
+        last_name=user.last_name,
+        email=user.email,
+        phone=user.phone
+    )
+    return will_data, user_data, will_cache_key(will, user)
+
+
+def load_will_job(will_id, user_id):
+    """Snapshot a will and its testator for background rendering"""
+    will = Will.query.filter_by(id=will_id, user_id=user_id).first()
+    user = User.query.get(user_id)
     
-    # Footer info
-    pdf.set_y(-30)
-    pdf.set_font('Arial', 'I', 8)
-    pdf.cell(0, 5, f"Generated by KENFUSE on {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}", 0, 1, 'C')
-    pdf.cell(0, 5, f"Document ID: {will.id}", 0, 1, 'C')
+    if not will or not user:
+        return None
     
-    # Return PDF as bytes
-    return pdf.output(dest='S').encode('latin-1')
+    return will_job_snapshot(will, user)
+
+
+pdf_job_queue.register_loader('will', load_will_job)
 
 
 @wills_bp.route('/', methods=['POST'])
 @jwt_required()
 def create_will():
     try:
+        # The token is only accepted while its user exists and is active
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
         
         data = request.get_json()
         
@@ -163,13 +93,18 @@ def get_wills():
     try:
         current_user_id = get_jwt_identity()
         
-        wills = Will.query.filter_by(user_id=current_user_id).all()
+        # ?fields=id,title,status keeps content out of the SELECT
+        fields = requested_fields(Will)
+        
+        wills = with_fields(Will.query, Will, fields).filter_by(user_id=current_user_id).all()
         
         return jsonify({
-            'wills': [will.to_dict() for will in wills],
+            'wills': Will.dump(wills, fields),
             'count': len(wills)
         }), 200
         
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -186,23 +121,43 @@ def export_will_pdf(will_id):
         if not will or not user:
             return jsonify({'error': 'Will not found'}), 404
         
-        # Generate real PDF
-        pdf_content = generate_will_pdf(will, user)
+        # The cache key hashes everything rendered, so a match means the client's copy is current
+        etag = f'W/"{will_cache_key(will, user)}"'
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
         
-        # Create BytesIO buffer
-        buffer = BytesIO(pdf_content)
-        buffer.seek(0)
+        # Serve from the artifact cache (precompressed if the client accepts it), streaming a fresh render on a miss
+        pdf_body, pdf_size, pdf_encoding = pdf_artifact_cache.fetch_will(
+            will, user, pdf_engine.stream_will, client_encodings()
+        )
         
         # Generate filename with .pdf extension
         filename = f"kenfuse_will_{will.title.replace(' ', '_')}.pdf"
         
         # Return as downloadable PDF
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/pdf'
-        )
+        return conditional(pdf_response(pdf_body, filename, pdf_size, pdf_encoding), etag)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@wills_bp.route('/<will_id>/pdf/jobs', methods=['POST'])
+@jwt_required()
+def enqueue_will_pdf(will_id):
+    """Render a will PDF in the background"""
+    try:
+        current_user_id = get_jwt_identity()
+        
+        job = pdf_job_queue.enqueue(current_user_id, 'will', will_id)
+        
+        if not job:
+            return jsonify({'error': 'Will not found'}), 404
+        
+        return jsonify({
+            'message': 'PDF render queued',
+            'job': job.to_dict()
+        }), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -212,19 +167,7 @@ def export_will_pdf(will_id):
 def test_pdf():
     """Test endpoint without authentication"""
     try:
-        from datetime import datetime
-        
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font('Arial', 'B', 16)
-        pdf.cell(0, 10, 'KENFUSE TEST PDF', 0, 1, 'C')
-        pdf.ln(10)
-        pdf.set_font('Arial', '', 12)
-        pdf.cell(0, 10, f'Generated: {datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")}', 0, 1)
-        pdf.ln(5)
-        pdf.multi_cell(0, 10, 'This is a test PDF document from KENFUSE.')
-        
-        pdf_content = pdf.output(dest='S').encode('latin-1')
+        pdf_content = pdf_engine.render_test()
         buffer = BytesIO(pdf_content)
         buffer.seek(0)
         
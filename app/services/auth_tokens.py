@@ -0,0 +1,114 @@
+from collections import OrderedDict
+from functools import wraps
+import threading
+import time
+import uuid
+from flask import jsonify
+from flask_jwt_extended import create_access_token, create_refresh_token, verify_jwt_in_request, get_jwt
+from app import db, jwt
+from app.config import Config
+from app.models import User
+from app.services.token_revocation import token_revocations
+
+
+def user_claims(user):
+    """Signed claims that let handlers authorize without loading the user"""
+    return {
+        'role': user.role,
+        'plan': user.subscription_plan or 'free',
+        'active': bool(user.is_active),
+        'ver': user.token_version or 0
+    }
+
+
+def create_user_token(user, family=None):
+    """Access token; family ties it to the login session so logout or refresh reuse revokes it"""
+    claims = user_claims(user)
+    if family:
+        claims['fam'] = family
+    return create_access_token(identity=user.id, additional_claims=claims)
+
+
+def issue_tokens(user, family=None):
+    """Access and refresh token pair; a new login starts a new family"""
+    family = family or str(uuid.uuid4())
+    return {
+        'access_token': create_user_token(user, family),
+        'refresh_token': create_refresh_token(identity=user.id, additional_claims={'fam': family})
+    }
+
+
+class TokenVersionCache:
+    """Current token_version of recently seen users, per worker.
+
+    Every authenticated request compares the token's 'ver' claim with the
+    user's token_version. Versions are cached for TOKEN_VERSION_CACHE_TTL
+    seconds in a bounded LRU, so a busy user costs one narrow query per TTL
+    instead of one per request. A revocation made in this worker is seen at
+    once; one made in another worker within the TTL.
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        jwt.token_in_blocklist_loader(self.is_revoked)
+
+    def get(self, user_id):
+        """token_version of an active user, or None if the user is gone or deactivated"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                return entry[0]
+
+        row = db.session.execute(
+            db.select(User.token_version, User.is_active).where(User.id == user_id)
+        ).first()
+        version = (row.token_version or 0) if row is not None and row.is_active else None
+
+        with self._lock:
+            self._entries[user_id] = (version, now + (self.ttl or Config.TOKEN_VERSION_CACHE_TTL))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > (self.max_entries or Config.TOKEN_VERSION_CACHE_SIZE):
+                self._entries.popitem(last=False)
+        return version
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def is_revoked(self, jwt_header, jwt_payload):
+        if jwt_payload.get('type') != 'access':
+            # A used refresh token is caught by the refresh endpoint as reuse
+            return token_revocations.is_revoked(jwt_payload.get('fam'))
+        if 'ver' not in jwt_payload:
+            # Issued before tokens carried claims
+            return True
+        if token_revocations.is_revoked(jwt_payload.get('jti'), jwt_payload.get('fam')):
+            return True
+        version = self.get(jwt_payload['sub'])
+        return version is None or version != jwt_payload['ver']
+
+
+token_versions = TokenVersionCache()
+
+
+def claims_required(roles=None, plans=None, error='Unauthorized'):
+    """jwt_required() that also checks the role/plan claims, without a database hit"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            claims = get_jwt()
+            if roles is not None and claims.get('role') not in roles:
+                return jsonify({'error': error}), 403
+            if plans is not None and claims.get('plan') not in plans:
+                return jsonify({'error': error}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
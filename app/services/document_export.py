@@ -0,0 +1,113 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime
+import io
+import time
+import zipfile
+from app.config import Config
+from app.services.pdf_cache import pdf_artifact_cache
+from app.services.pdf_jobs import pdf_job_queue
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ZipSink(io.RawIOBase):
+    """Unseekable file that hands written bytes back through drain().
+
+    zipfile detects that it cannot seek and writes data descriptors after
+    each member instead, which lets the archive be streamed as it is built.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self):
+        chunks = self._chunks
+        self._chunks = []
+        return chunks
+
+
+def stream_documents_zip(documents, max_in_flight=None):
+    """Yield a ZIP archive of rendered PDFs.
+    
+    documents is a list of (arcname, document_type, document, user, key)
+    snapshots as produced by the job loaders. Missing artifacts are rendered
+    on the PDF job pool, at most max_in_flight at a time, and each member is
+    copied into the archive from the artifact store as soon as it is ready.
+    A render that has not finished EXPORT_RENDER_TIMEOUT seconds after it
+    was submitted is given up on and listed in errors.txt.
+    """
+    limit = max_in_flight or Config.EXPORT_MAX_IN_FLIGHT
+    store = pdf_artifact_cache.store
+    
+    pending = deque(documents)
+    ready = deque()
+    in_flight = {}
+    errors = []
+    
+    sink = ZipSink()
+    archive = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+    
+    def write_member(arcname, key):
+        pdf_file = store.open(key)
+        if pdf_file is None:
+            errors.append(f"{arcname}: rendered file missing from store")
+            return
+        info = zipfile.ZipInfo(arcname, date_time=datetime.utcnow().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with pdf_file, archive.open(info, 'w') as member:
+            while True:
+                chunk = pdf_file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                member.write(chunk)
+                yield from sink.drain()
+    
+    while pending or ready or in_flight:
+        # Keep the pool busy without letting one export monopolise it
+        while pending and len(in_flight) < limit:
+            item = pending.popleft()
+            arcname, document_type, document, user, key = item
+            if store.exists(key):
+                ready.append(item)
+            else:
+                future = pdf_job_queue.submit_render(document_type, document, user, key)
+                in_flight[future] = (item, time.monotonic() + Config.EXPORT_RENDER_TIMEOUT)
+        
+        if ready:
+            arcname, _, _, _, key = ready.popleft()
+            yield from write_member(arcname, key)
+            yield from sink.drain()
+            continue
+        
+        timeout = max(min(deadline for _, deadline in in_flight.values()) - time.monotonic(), 0)
+        done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            item, _ = in_flight.pop(future)
+            try:
+                future.result()
+                ready.append(item)
+            except Exception as e:
+                errors.append(f"{item[0]}: {e}")
+        
+        # A hung render must not hold the download or its slot forever
+        now = time.monotonic()
+        for future, (item, deadline) in list(in_flight.items()):
+            if deadline <= now:
+                future.cancel()
+                del in_flight[future]
+                errors.append(f"{item[0]}: render timed out after {Config.EXPORT_RENDER_TIMEOUT}s")
+    
+    if errors:
+        archive.writestr('errors.txt', '\n'.join(errors) + '\n')
+    
+    archive.close()
+    yield from sink.drain()
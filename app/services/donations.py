@@ -0,0 +1,151 @@
+from concurrent.futures import Future
+from datetime import datetime
+import queue
+import threading
+import time
+from app import db
+from app.config import Config
+from app.models import Fundraiser, Donation
+from app.services.idempotency import idempotency_store
+
+
+def add_to_fundraiser_total(fundraiser_id, amount):
+    """Atomically add amount to an active fundraiser's total.
+
+    The increment and the switch to 'completed' on reaching the target are a
+    single UPDATE evaluated against the current row, so concurrent donations
+    cannot overwrite each other. Returns False if the fundraiser was not
+    active or has passed its end date. Runs in the caller's transaction.
+    """
+    now = datetime.utcnow()
+    new_total = db.func.coalesce(Fundraiser.current_amount, 0) + amount
+    result = db.session.execute(
+        db.update(Fundraiser)
+        .where(Fundraiser.id == fundraiser_id, Fundraiser.status == 'active', Fundraiser.end_date > now)
+        .values(
+            current_amount=new_total,
+            status=db.case((new_total >= Fundraiser.target_amount, 'completed'), else_=Fundraiser.status),
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def donation_result(donation):
+    return {
+        'message': 'Donation recorded successfully',
+        'donation': donation.to_dict(),
+        'transaction_id': donation.transaction_id
+    }
+
+
+def _apply_donation(fields, idempotency):
+    """Stage one donation in the current transaction; None if the fundraiser is closed"""
+    if not add_to_fundraiser_total(fields['fundraiser_id'], fields['amount']):
+        return None
+
+    donation = Donation(**fields)
+    db.session.add(donation)
+    db.session.flush()
+
+    result = donation_result(donation)
+    if idempotency:
+        idempotency_store.stage(idempotency, result, 201)
+    return result
+
+
+def record_donation(fields, idempotency=None):
+    """Insert a donation and add it to the fundraiser's total.
+
+    Returns the response body, or None if the fundraiser is no longer
+    accepting donations. With DONATION_GROUP_COMMIT the write is handed to
+    donation_batcher and shares a transaction with other donations.
+    """
+    if Config.DONATION_GROUP_COMMIT:
+        # Hand this request's connection back to the pool while the writer runs
+        db.session.close()
+        return donation_batcher.submit(fields, idempotency).result(timeout=Config.DONATION_GROUP_COMMIT_TIMEOUT)
+
+    result = _apply_donation(fields, idempotency)
+    if result is None:
+        db.session.rollback()
+        return None
+    db.session.commit()
+    return result
+
+
+class DonationBatcher:
+    """Group commit for donations.
+
+    Request threads queue their donation and wait; a single writer thread
+    collects everything that arrives within DONATION_GROUP_COMMIT_WINDOW_MS
+    (up to DONATION_GROUP_COMMIT_MAX_BATCH) and commits it as one
+    transaction. If the batch fails, its donations are retried one per
+    transaction so a single bad row only fails its own request.
+    """
+
+    def __init__(self, window_ms=None, max_batch=None):
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    def submit(self, fields, idempotency=None):
+        future = Future()
+        self._queue.put((fields, idempotency, future))
+        self._start()
+        return future
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='donation-batcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            max_batch = self.max_batch or Config.DONATION_GROUP_COMMIT_MAX_BATCH
+            deadline = time.monotonic() + (self.window_ms or Config.DONATION_GROUP_COMMIT_WINDOW_MS) / 1000
+            while len(batch) < max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            with self.app.app_context():
+                try:
+                    self._commit(batch)
+                finally:
+                    db.session.remove()
+
+    def _commit(self, batch):
+        try:
+            results = [_apply_donation(fields, idempotency) for fields, idempotency, _ in batch]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            for fields, idempotency, future in batch:
+                try:
+                    result = _apply_donation(fields, idempotency)
+                    db.session.commit()
+                    future.set_result(result)
+                except Exception as e:
+                    db.session.rollback()
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+donation_batcher = DonationBatcher()
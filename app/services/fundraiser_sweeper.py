@@ -0,0 +1,114 @@
+from datetime import datetime
+import threading
+from app import db
+from app.config import Config
+from app.models import Fundraiser, FundraiserStatusChange
+from app.services.leases import Lease
+from app.services.response_cache import response_cache
+
+
+class FundraiserSweeper:
+    """Moves active fundraisers whose end_date has passed to 'expired'.
+    
+    Every FUNDRAISER_SWEEP_INTERVAL seconds each node tries to take the
+    'fundraiser-expiry' lease and only the holder sweeps. Expired rows are
+    found through the (status, end_date) index in batches of
+    FUNDRAISER_SWEEP_BATCH_SIZE, so a sweep costs time proportional to the
+    number of expiring fundraisers rather than the size of the table. Each
+    transition is recorded in fundraiser_status_changes.
+    """
+    
+    lease_name = 'fundraiser-expiry'
+    
+    def __init__(self, interval=None, batch_size=None):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.app = None
+        self.lease = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def init_app(self, app):
+        self.app = app
+        interval = self.interval or Config.FUNDRAISER_SWEEP_INTERVAL
+        # Outlive a couple of missed runs before another node takes over
+        self.lease = Lease(self.lease_name, ttl=interval * 3)
+        if Config.FUNDRAISER_SWEEPER:
+            self.start()
+    
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='fundraiser-sweeper', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        interval = self.interval or Config.FUNDRAISER_SWEEP_INTERVAL
+        while not self._stop.wait(interval):
+            with self.app.app_context():
+                try:
+                    if self.lease.acquire():
+                        self.sweep()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"Fundraiser sweep failed: {str(e)}")
+                finally:
+                    db.session.remove()
+    
+    def sweep(self, now=None):
+        """Expire every overdue fundraiser; returns how many were expired"""
+        now = now or datetime.utcnow()
+        batch_size = self.batch_size or Config.FUNDRAISER_SWEEP_BATCH_SIZE
+        total = 0
+        
+        while True:
+            examined, expired = self.sweep_batch(now, batch_size)
+            total += expired
+            if examined < batch_size:
+                return total
+            # Stop if another node has taken over while we were busy
+            if self.lease is not None and not self.lease.acquire():
+                return total
+    
+    def sweep_batch(self, now, batch_size):
+        """Expire one batch; returns (rows examined, rows expired)"""
+        ids = [
+            row.id for row in Fundraiser.query
+            .with_entities(Fundraiser.id)
+            .filter(Fundraiser.status == 'active', Fundraiser.end_date <= now)
+            .order_by(Fundraiser.end_date)
+            .limit(batch_size)
+        ]
+        if not ids:
+            return 0, 0
+        
+        # Re-check the status so a fundraiser completed meanwhile is left alone.
+        # Repeating the end_date bound keeps planners that pick the status
+        # index on a range scan instead of reading every active row.
+        expired_ids = db.session.execute(
+            db.update(Fundraiser)
+            .where(Fundraiser.id.in_(ids), Fundraiser.status == 'active', Fundraiser.end_date <= now)
+            .values(status='expired', updated_at=now)
+            .returning(Fundraiser.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        
+        if expired_ids:
+            db.session.execute(db.insert(FundraiserStatusChange), [
+                {
+                    'fundraiser_id': fundraiser_id,
+                    'from_status': 'active',
+                    'to_status': 'expired',
+                    'reason': 'expired',
+                    'created_at': now
+                }
+                for fundraiser_id in expired_ids
+            ])
+        
+        db.session.commit()
+        # Bulk statements bypass the ORM, so tell the response cache directly
+        if expired_ids:
+            response_cache.invalidate(['fundraisers'] + [f"fundraiser:{fundraiser_id}" for fundraiser_id in expired_ids])
+        return len(ids), len(expired_ids)
+
+
+fundraiser_sweeper = FundraiserSweeper()
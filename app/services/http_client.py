@@ -0,0 +1,248 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import Config
+from app.services.metrics import provider_request_duration
+
+
+# Methods that may be repeated without side effects on the provider
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a host's breaker is open"""
+
+
+class CircuitBreaker:
+    """Fails fast after repeated errors from a host.
+
+    After failure_threshold consecutive failures the breaker opens and every
+    call is rejected for reset_timeout seconds. The first call after that is
+    let through as a probe: success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Only one probe at a time while half-open
+                self.state = 'half_open'
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """Caps retries to a fraction of traffic so retries cannot snowball.
+
+    Every request deposits ratio tokens and every retry spends one, so a
+    ratio of 0.2 allows at most one retry per five requests over time.
+    min_tokens keeps a few retries available for low-traffic hosts.
+    """
+
+    def __init__(self, ratio=0.2, min_tokens=10):
+        self.ratio = ratio
+        self.max_tokens = min_tokens
+        self.tokens = float(min_tokens)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class HostStats:
+    """Latency and error counters for one upstream host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency, error):
+        with self._lock:
+            self.requests += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            if error:
+                self.errors += 1
+
+    def count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'retries': self.retries,
+                'rejected': self.rejected,
+                'latency_avg_ms': round(self.latency_total / self.requests * 1000, 2) if self.requests else 0,
+                'latency_max_ms': round(self.latency_max * 1000, 2)
+            }
+
+
+class _Host:
+    def __init__(self, breaker, budget):
+        self.breaker = breaker
+        self.budget = budget
+        self.stats = HostStats()
+
+
+class ProviderSession(requests.Session):
+    """requests.Session for payment providers.
+
+    Keeps a pool of keep-alive connections per host and applies default
+    connect/read timeouts, jittered retries limited by a per-host retry
+    budget, and a per-host circuit breaker to every request.
+
+    Requests that are not idempotent (POST without an Idempotency-Key
+    header) are only retried when the connection was never established,
+    so a payment is never submitted twice.
+    """
+
+    def __init__(self, connect_timeout=None, read_timeout=None, max_retries=None,
+                 backoff=None, pool_size=None, breaker_threshold=None,
+                 breaker_reset=None, retry_budget=None):
+        super().__init__()
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else Config.HTTP_CONNECT_TIMEOUT,
+            read_timeout if read_timeout is not None else Config.HTTP_READ_TIMEOUT
+        )
+        self.max_retries = max_retries if max_retries is not None else Config.HTTP_MAX_RETRIES
+        self.backoff = backoff if backoff is not None else Config.HTTP_RETRY_BACKOFF
+        self.breaker_threshold = breaker_threshold or Config.HTTP_BREAKER_THRESHOLD
+        self.breaker_reset = breaker_reset if breaker_reset is not None else Config.HTTP_BREAKER_RESET
+        self.retry_budget = retry_budget if retry_budget is not None else Config.HTTP_RETRY_BUDGET
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+
+        # Retries are handled here, not by urllib3
+        adapter = HTTPAdapter(pool_maxsize=pool_size or Config.HTTP_POOL_SIZE, max_retries=0)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def host(self, netloc):
+        with self._hosts_lock:
+            if netloc not in self._hosts:
+                self._hosts[netloc] = _Host(
+                    CircuitBreaker(self.breaker_threshold, self.breaker_reset),
+                    RetryBudget(self.retry_budget)
+                )
+            return self._hosts[netloc]
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+
+        host = self.host(urlsplit(url).netloc)
+        host.budget.deposit()
+        idempotent = method.upper() in IDEMPOTENT_METHODS or self._has_idempotency_key(kwargs.get('headers'))
+
+        attempt = 0
+        while True:
+            if not host.breaker.allow():
+                host.stats.count('rejected')
+                raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+
+            started = time.perf_counter()
+            try:
+                response = super().request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self._record(host, url, time.perf_counter() - started, 'error')
+                host.breaker.record_failure()
+                if not (idempotent or self._never_sent(e)) or not self._may_retry(host, attempt):
+                    raise
+            except BaseException:
+                # Adapter, urllib3 or hook errors: still settle the breaker, or a half-open probe never ends
+                self._record(host, url, time.perf_counter() - started, 'error')
+                host.breaker.record_failure()
+                raise
+            else:
+                failed = response.status_code >= 500
+                self._record(host, url, time.perf_counter() - started, f"{response.status_code // 100}xx")
+                if failed:
+                    host.breaker.record_failure()
+                else:
+                    host.breaker.record_success()
+                if response.status_code not in RETRY_STATUSES or not idempotent or not self._may_retry(host, attempt):
+                    return response
+                response.close()
+
+            attempt += 1
+            host.stats.count('retries')
+            # Full jitter keeps clients from retrying in lockstep
+            time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def _record(host, url, latency, outcome):
+        host.stats.record(latency, error=outcome in ('error', '5xx'))
+        provider_request_duration.observe(latency, host=urlsplit(url).netloc, outcome=outcome)
+
+    def _may_retry(self, host, attempt):
+        # Hand back the real failure rather than CircuitOpenError once the breaker trips
+        if attempt >= self.max_retries or host.breaker.state == 'open':
+            return False
+        return host.budget.withdraw()
+
+    @staticmethod
+    def _has_idempotency_key(headers):
+        return bool(headers) and any(name.lower() == 'idempotency-key' for name in headers)
+
+    @staticmethod
+    def _never_sent(error):
+        """True if the request failed before any bytes reached the server"""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(error, requests.exceptions.ConnectionError):
+            reason = getattr(error.args[0], 'reason', None) if error.args else None
+            return isinstance(reason, requests.packages.urllib3.exceptions.NewConnectionError)
+        return False
+
+    def stats(self):
+        """Per-host counters and breaker state"""
+        with self._hosts_lock:
+            hosts = dict(self._hosts)
+        return {
+            netloc: dict(host.stats.to_dict(), circuit=host.breaker.state)
+            for netloc, host in hosts.items()
+        }
+
+
+provider_http = ProviderSession()
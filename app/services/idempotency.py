@@ -0,0 +1,177 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+import hashlib
+import itertools
+import threading
+import time
+from flask import request, jsonify, make_response, g
+from app import db
+from app.config import Config
+from app.models import IdempotencyKey
+
+
+class IdempotencyError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StoredResponse:
+    __slots__ = ('fingerprint', 'status_code', 'body', 'expires_at')
+
+    def __init__(self, fingerprint, status_code, body, expires_at):
+        self.fingerprint = fingerprint
+        self.status_code = status_code  # None while the first request is in flight
+        self.body = body
+        self.expires_at = expires_at
+
+
+class IdempotencyStore:
+    """Remembers the response to each Idempotency-Key for IDEMPOTENCY_KEY_TTL.
+
+    Recent keys live in a bounded in-process LRU, so a retry that reaches the
+    same worker is answered without a database round trip. Every stored
+    response is also written to idempotency_keys inside the transaction that
+    produced it; a retry landing on another worker finds it there, and the
+    primary key stops two workers from both committing the same key.
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stage_count = itertools.count(1)
+
+    @staticmethod
+    def digest(scope, key):
+        return hashlib.sha256(f"{scope}:{key}".encode('utf-8')).hexdigest()
+
+    def _ttl(self):
+        return self.ttl or Config.IDEMPOTENCY_KEY_TTL
+
+    def begin(self, scope, key, fingerprint):
+        """Return the StoredResponse for a repeated key, or None after marking it in flight"""
+        digest = self.digest(scope, key)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry.expires_at > now:
+                if entry.status_code is None:
+                    raise IdempotencyError('A request with this Idempotency-Key is already in progress', 409)
+                self._check(entry, fingerprint)
+                self._entries.move_to_end(digest)
+                return entry
+            self._entries[digest] = StoredResponse(fingerprint, None, None, now + self._ttl())
+
+        # Not seen by this worker - another one may have answered it
+        row = IdempotencyKey.query.get(digest)
+        if row is None:
+            return None
+        if row.expires_at <= datetime.utcnow():
+            db.session.delete(row)
+            db.session.commit()
+            return None
+
+        entry = StoredResponse(row.fingerprint, row.status_code, row.response,
+                               now + (row.expires_at - datetime.utcnow()).total_seconds())
+        try:
+            self._check(entry, fingerprint)
+        except IdempotencyError:
+            self.release(scope, key)
+            raise
+        self._remember(digest, entry)
+        return entry
+
+    def _check(self, entry, fingerprint):
+        if entry.fingerprint != fingerprint:
+            raise IdempotencyError('Idempotency-Key was already used for a different request', 422)
+
+    def stage(self, idempotency, body, status_code):
+        """Add the response for (scope, key, fingerprint) to the current transaction"""
+        scope, key, fingerprint = idempotency
+        now = datetime.utcnow()
+        db.session.add(IdempotencyKey(
+            id=self.digest(scope, key),
+            scope=scope,
+            fingerprint=fingerprint,
+            status_code=status_code,
+            response=body,
+            created_at=now,
+            expires_at=now + timedelta(seconds=self._ttl())
+        ))
+
+        # Expired keys are cleared out now and then by whoever is writing
+        if next(self._stage_count) % 1000 == 0:
+            IdempotencyKey.query.filter(IdempotencyKey.expires_at < now).delete(synchronize_session=False)
+
+    def complete(self, scope, key, fingerprint, body, status_code):
+        self._remember(self.digest(scope, key),
+                       StoredResponse(fingerprint, status_code, body, time.time() + self._ttl()))
+
+    def release(self, scope, key):
+        """Forget an in-flight key whose request did not produce a stored response"""
+        digest = self.digest(scope, key)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry.status_code is None:
+                del self._entries[digest]
+
+    def _remember(self, digest, entry):
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > (self.max_entries or Config.IDEMPOTENCY_CACHE_SIZE):
+                self._entries.popitem(last=False)
+
+
+idempotency_store = IdempotencyStore()
+
+
+def idempotent(scope):
+    """Replay the stored response when a request repeats its Idempotency-Key.
+
+    The view must pass g.idempotency to idempotency_store.stage() in the
+    transaction that commits its successful (2xx) response.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get('Idempotency-Key')
+            if not key:
+                g.idempotency = None
+                return view(*args, **kwargs)
+
+            if len(key) > 255:
+                return jsonify({'error': 'Idempotency-Key must be at most 255 characters'}), 400
+
+            fingerprint = hashlib.sha256(
+                request.method.encode() + request.path.encode() + b'\0' + request.get_data()
+            ).hexdigest()
+
+            try:
+                stored = idempotency_store.begin(scope, key, fingerprint)
+            except IdempotencyError as e:
+                return jsonify({'error': str(e)}), e.status_code
+
+            if stored is not None:
+                response = jsonify(stored.body)
+                response.status_code = stored.status_code
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+
+            g.idempotency = (scope, key, fingerprint)
+            completed = False
+            try:
+                response = make_response(view(*args, **kwargs))
+                if 200 <= response.status_code < 300:
+                    idempotency_store.complete(scope, key, fingerprint, response.get_json(), response.status_code)
+                    completed = True
+                return response
+            finally:
+                if not completed:
+                    idempotency_store.release(scope, key)
+        return wrapper
+    return decorator
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+import os
+import socket
+import uuid
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import SchedulerLease
+
+
+def lease_holder_id():
+    """Identifies this process as a lease holder"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease:
+    """Leader election for scheduled jobs through a row in scheduler_leases.
+    
+    acquire() takes the lease if it is free or expired, or renews it if
+    this holder already has it, with a single conditional UPDATE. Only one
+    node can win because the UPDATE is atomic and the first INSERT is
+    protected by the primary key. Holders must renew well within ttl;
+    node clocks are assumed to agree to within a small fraction of it.
+    """
+    
+    def __init__(self, name, ttl, holder=None):
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or lease_holder_id()
+    
+    def acquire(self):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        
+        updated = SchedulerLease.query.filter(
+            SchedulerLease.name == self.name,
+            db.or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now)
+        ).update({
+            'acquired_at': db.case((SchedulerLease.holder == self.holder, SchedulerLease.acquired_at), else_=now),
+            'holder': self.holder,
+            'expires_at': expires_at
+        }, synchronize_session=False)
+        
+        if updated:
+            db.session.commit()
+            return True
+        
+        if db.session.get(SchedulerLease, self.name) is not None:
+            db.session.rollback()
+            return False
+        
+        # First run anywhere - create the lease
+        try:
+            db.session.add(SchedulerLease(name=self.name, holder=self.holder, acquired_at=now, expires_at=expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+    
+    def release(self):
+        SchedulerLease.query.filter_by(name=self.name, holder=self.holder)\
+            .update({'expires_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
@@ -0,0 +1,423 @@
+import atexit
+from bisect import bisect_left
+from contextlib import contextmanager
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from flask import Response, request
+from app.config import Config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PDF_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROVIDER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+ARCHIVE_FILE = 'metrics_archive.json'
+
+
+class Metric:
+    """A named family of values, one per combination of label values"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """[(label values, value)] for the snapshot file"""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Current value; collect() is called at snapshot time for values read from elsewhere"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        if self.collect is not None:
+            for labels, value in self.collect():
+                self.set(value, **labels)
+        return super().samples()
+
+
+class Histogram(Metric):
+    """Fixed buckets; each value is [count per bucket (non-cumulative, +Inf last), sum]"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            return [[list(key), [list(counts), total]] for key, (counts, total) in self._values.items()]
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Process metrics, merged across workers when METRICS_MULTIPROC_DIR is set.
+
+    Each worker keeps its values in memory and writes them as a JSON
+    snapshot to <dir>/metrics_<pid>.json every METRICS_FLUSH_INTERVAL
+    seconds and at exit. A scrape on any worker flushes its own snapshot
+    and sums every file in the directory: counters and histograms include
+    workers that have exited so totals never go backwards, gauges only
+    count workers that are still running. Exited workers' counters are
+    folded into one archive file and their snapshots deleted, so worker
+    recycling does not leave files behind for every scrape to read. Clear
+    the directory when the master starts (gunicorn.conf.py does).
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._thread = None
+        self._stop = threading.Event()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), collect=None):
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self):
+        return {
+            metric.name: {
+                'kind': metric.kind,
+                'help': metric.documentation,
+                'labels': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'samples': metric.samples()
+            }
+            for metric in self.metrics.values()
+        }
+
+    # Multiprocess
+
+    def start(self):
+        if not Config.METRICS_MULTIPROC_DIR:
+            return
+        os.makedirs(Config.METRICS_MULTIPROC_DIR, exist_ok=True)
+        if self._thread is None:
+            # A snapshot under our pid was left by an exited worker that had it before
+            with self._directory_lock():
+                self._archive([self._path(os.getpid())])
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while not self._stop.wait(Config.METRICS_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def flush(self):
+        """Write this worker's snapshot where the other workers can read it"""
+        if not Config.METRICS_MULTIPROC_DIR:
+            return
+        path = self._path(os.getpid())
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def _path(pid):
+        return os.path.join(Config.METRICS_MULTIPROC_DIR, f"metrics_{pid}.json")
+
+    @contextmanager
+    def _directory_lock(self):
+        """Serializes archiving between workers so a snapshot is never counted twice"""
+        import fcntl
+        with open(os.path.join(Config.METRICS_MULTIPROC_DIR, 'metrics.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _archive(self, paths):
+        """Add the counters and histograms in paths to the archive file, then delete them"""
+        snapshots = [snapshot for snapshot in map(_read_snapshot, paths) if snapshot is not None]
+        if snapshots:
+            archive_path = os.path.join(Config.METRICS_MULTIPROC_DIR, ARCHIVE_FILE)
+            archived = _merge([(_read_snapshot(archive_path) or {}, False)] +
+                              [(snapshot, False) for snapshot in snapshots])
+            with open(f"{archive_path}.tmp", 'w') as f:
+                json.dump({
+                    name: {**metric, 'samples': [[list(key), value] for key, value in metric['samples'].items()]}
+                    for name, metric in archived.items()
+                }, f)
+            os.replace(f"{archive_path}.tmp", archive_path)
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _snapshots(self):
+        """(snapshot, worker alive) for every worker that has flushed, plus the archive of exited ones"""
+        if not Config.METRICS_MULTIPROC_DIR:
+            return [(self.snapshot(), True)]
+        self.flush()
+        with self._directory_lock():
+            workers = {}
+            for path in glob.glob(os.path.join(Config.METRICS_MULTIPROC_DIR, 'metrics_*.json')):
+                pid = os.path.basename(path)[len('metrics_'):-len('.json')]
+                if pid.isdigit():
+                    workers[path] = _alive(int(pid))
+            self._archive([path for path, alive in workers.items() if not alive])
+
+            snapshots = []
+            for path in [path for path, alive in workers.items() if alive] + \
+                    [os.path.join(Config.METRICS_MULTIPROC_DIR, ARCHIVE_FILE)]:
+                snapshot = _read_snapshot(path)
+                if snapshot is not None:
+                    snapshots.append((snapshot, path in workers))
+        return snapshots
+
+    def merged(self):
+        """Sum of every worker's snapshot, in snapshot format"""
+        return _merge(self._snapshots())
+
+    def exposition(self):
+        """Prometheus text format of merged()"""
+        lines = []
+        for name, metric in sorted(self.merged().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            for key, value in sorted(metric['samples'].items()):
+                if metric['kind'] != 'histogram':
+                    lines.append(f"{name}{_labels(metric['labels'], key)} {_number(value)}")
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(list(metric['buckets']) + [float('inf')], counts):
+                    cumulative += count
+                    le = (('le', _number(bound)),)
+                    lines.append(f"{name}_bucket{_labels(metric['labels'], key, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(metric['labels'], key)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(metric['labels'], key)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(snapshots):
+    """Sum of (snapshot, worker alive) pairs; gauges only from live workers"""
+    merged = {}
+    for snapshot, alive in snapshots:
+        for name, metric in snapshot.items():
+            if metric['kind'] == 'gauge' and not alive:
+                continue
+            entry = merged.setdefault(name, {**metric, 'samples': {}})
+            for labels, value in metric['samples']:
+                key = tuple(labels)
+                current = entry['samples'].get(key)
+                if metric['kind'] == 'histogram':
+                    if current is None:
+                        current = entry['samples'][key] = [[0] * len(value[0]), 0.0]
+                    current[0] = [a + b for a, b in zip(current[0], value[0])]
+                    current[1] += value[1]
+                else:
+                    entry['samples'][key] = (current or 0) + value
+    return merged
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests by route template and status', ('method', 'route', 'status')
+)
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Time from routing until the response body has been produced', ('method', 'route')
+)
+http_in_progress = registry.gauge('http_requests_in_progress', 'Requests being handled')
+pdf_renders = registry.counter('pdf_renders_total', 'PDF renders by document type and outcome', ('document', 'outcome'))
+pdf_render_bytes = registry.counter('pdf_render_bytes_total', 'PDF bytes produced', ('document',))
+pdf_render_duration = registry.histogram(
+    'pdf_render_duration_seconds', 'Time spent rendering a PDF, excluding waits on the client',
+    ('document',), PDF_BUCKETS
+)
+provider_request_duration = registry.histogram(
+    'provider_request_duration_seconds', 'M-Pesa/Stripe request latency per attempt',
+    ('host', 'outcome'), PROVIDER_BUCKETS
+)
+
+
+def observe_pdf_render(document, pages):
+    """Wrap a PDF chunk generator, recording render time and size when it finishes"""
+    elapsed = 0.0
+    size = 0
+    outcome = 'error'
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = next(pages)
+            except StopIteration:
+                elapsed += time.perf_counter() - started
+                outcome = 'ok'
+                return
+            elapsed += time.perf_counter() - started
+            size += len(chunk)
+            yield chunk
+    except GeneratorExit:
+        outcome = 'aborted'
+        raise
+    finally:
+        pages.close()
+        pdf_renders.inc(document=document, outcome=outcome)
+        pdf_render_bytes.inc(size, document=document)
+        pdf_render_duration.observe(elapsed, document=document)
+
+
+def init_app(app):
+    """Request metrics and GET /metrics; see METRICS_* in Config"""
+    if not Config.METRICS_ENABLED:
+        return
+
+    from app import db
+    with app.app_context():
+        engine = db.engine
+
+    def pool_usage():
+        pool = engine.pool
+        for state, reading in (('size', 'size'), ('checked_out', 'checkedout'),
+                               ('idle', 'checkedin'), ('overflow', 'overflow')):
+            if hasattr(pool, reading):
+                yield {'state': state}, max(getattr(pool, reading)(), 0)
+
+    if 'db_pool_connections' not in registry.metrics:
+        registry.gauge('db_pool_connections', 'Database pool connections by state', ('state',), collect=pool_usage)
+
+    @app.before_request
+    def start_timer():
+        if request.endpoint != 'metrics':
+            request.environ['kenfuse.metrics_started'] = time.perf_counter()
+            http_in_progress.inc()
+
+    def record(started, method, route, status):
+        http_in_progress.dec()
+        http_requests.inc(method=method, route=route, status=status)
+        http_request_duration.observe(time.perf_counter() - started, method=method, route=route)
+
+    def request_route():
+        # Templates, not paths, so ids do not become label values
+        return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    @app.after_request
+    def keep_status(response):
+        request.environ['kenfuse.metrics_status'] = response.status_code
+        if response.is_streamed and not response.direct_passthrough and 'kenfuse.metrics_started' in request.environ:
+            # Generated bodies (PDF renders, ZIP exports) are still being produced after
+            # teardown; the server closes the response once the last chunk is sent
+            started = request.environ.pop('kenfuse.metrics_started')
+            method, route, status = request.method, request_route(), response.status_code
+            response.call_on_close(lambda: record(started, method, route, status))
+        return response
+
+    @app.teardown_request
+    def record_request(exc):
+        started = request.environ.pop('kenfuse.metrics_started', None)
+        if started is None:
+            return
+        status = request.environ.get('kenfuse.metrics_status', 500) if exc is None else 500
+        record(started, request.method, request_route(), status)
+
+    def metrics():
+        if Config.METRICS_AUTH_TOKEN:
+            supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not hmac.compare_digest(supplied.encode('utf-8'), Config.METRICS_AUTH_TOKEN.encode('utf-8')):
+                return Response('Unauthorized\n', 401, content_type='text/plain')
+        return Response(registry.exposition(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics, methods=['GET'])
+    registry.start()
@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+import threading
+import uuid
+from app import db
+from app.config import Config
+from app.models import MpesaCallback, Payment
+
+FINAL_STATUSES = ('completed', 'failed', 'refunded')
+
+
+def parse_stk_callback(payload):
+    """Return (checkout_request_id, result_code, receipt) from a Daraja callback"""
+    callback = (payload or {}).get('Body', {}).get('stkCallback', {})
+    receipt = None
+    for item in callback.get('CallbackMetadata', {}).get('Item', []):
+        if item.get('Name') == 'MpesaReceiptNumber':
+            receipt = item.get('Value')
+            break
+    return callback.get('CheckoutRequestID'), callback.get('ResultCode'), receipt
+
+
+def record_callback(payload):
+    """Append a raw callback to the inbox; the consumer applies it later"""
+    checkout_request_id, _, _ = parse_stk_callback(payload)
+    entry = MpesaCallback(checkout_request_id=checkout_request_id, payload=payload)
+    db.session.add(entry)
+    db.session.commit()
+    return entry
+
+
+class CallbackConsumer:
+    """Applies inbox callbacks to payments in batches on a background thread.
+    
+    Rows are claimed with a conditional UPDATE so several workers can run a
+    consumer against the same inbox. A callback for a payment that is no
+    longer pending is a Daraja replay and is marked duplicate without
+    touching the payment. Callbacks that arrive before the STK push response
+    has stored the CheckoutRequestID stay pending for
+    MPESA_CALLBACK_MATCH_WINDOW seconds before being marked unmatched.
+    """
+    
+    def __init__(self, batch_size=None, poll_interval=None):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.app = None
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        self.app = app
+        if Config.MPESA_CALLBACK_CONSUMER:
+            self.start()
+    
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='mpesa-callbacks', daemon=True)
+                self._thread.start()
+    
+    def notify(self):
+        """Wake the consumer after a callback has been recorded"""
+        self._wakeup.set()
+    
+    def _run(self):
+        poll_interval = self.poll_interval or Config.MPESA_CALLBACK_POLL_INTERVAL
+        while True:
+            self._wakeup.wait(poll_interval)
+            self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    # Keep going while full batches are coming back
+                    while self.drain() >= (self.batch_size or Config.MPESA_CALLBACK_BATCH_SIZE):
+                        pass
+            except Exception as e:
+                self.app.logger.error(f"M-Pesa callback consumer error: {str(e)}")
+            finally:
+                with self.app.app_context():
+                    db.session.remove()
+    
+    def drain(self):
+        """Apply one batch of pending callbacks; returns how many were claimed"""
+        batch = self._claim()
+        if not batch:
+            return 0
+        
+        now = datetime.utcnow()
+        match_deadline = now - timedelta(seconds=Config.MPESA_CALLBACK_MATCH_WINDOW)
+        
+        checkout_ids = {entry.checkout_request_id for entry in batch if entry.checkout_request_id}
+        payments = {}
+        if checkout_ids:
+            for payment in Payment.query.filter(Payment.transaction_id.in_(checkout_ids)):
+                payments[payment.transaction_id] = payment
+        
+        settled = set()
+        for entry in batch:
+            checkout_request_id, result_code, receipt = parse_stk_callback(entry.payload)
+            payment = payments.get(checkout_request_id)
+            
+            if not checkout_request_id:
+                entry.status = 'invalid'
+            elif payment is None:
+                if entry.received_at and entry.received_at > match_deadline:
+                    # The STK push may not have committed the CheckoutRequestID yet
+                    entry.status = 'pending'
+                    entry.claim_token = None
+                    continue
+                entry.status = 'unmatched'
+            elif payment.status in FINAL_STATUSES or checkout_request_id in settled:
+                entry.status = 'duplicate'
+            else:
+                changes = {
+                    'status': 'completed' if result_code == 0 else 'failed',
+                    'payment_data': entry.payload,
+                    'updated_at': now
+                }
+                if result_code == 0:
+                    changes['mpesa_receipt'] = receipt
+                # Conditional so a consumer in another worker cannot apply it twice
+                applied = Payment.query.filter(
+                    Payment.id == payment.id,
+                    Payment.status.notin_(FINAL_STATUSES)
+                ).update(changes, synchronize_session=False)
+                entry.status = 'applied' if applied else 'duplicate'
+                settled.add(checkout_request_id)
+            
+            entry.processed_at = now
+        
+        db.session.commit()
+        return len(batch)
+    
+    def _claim(self):
+        batch_size = self.batch_size or Config.MPESA_CALLBACK_BATCH_SIZE
+        now = datetime.utcnow()
+        
+        # Release claims from a consumer that died mid-batch
+        stale = now - timedelta(seconds=Config.MPESA_CALLBACK_CLAIM_TIMEOUT)
+        MpesaCallback.query.filter(
+            MpesaCallback.status == 'processing',
+            MpesaCallback.claimed_at < stale
+        ).update({'status': 'pending', 'claim_token': None}, synchronize_session=False)
+        
+        # Unmatched callbacks wait a little before being looked at again
+        retry_after = now - timedelta(seconds=self.poll_interval or Config.MPESA_CALLBACK_POLL_INTERVAL)
+        candidate_ids = [
+            row.id for row in MpesaCallback.query
+            .with_entities(MpesaCallback.id)
+            .filter(MpesaCallback.status == 'pending')
+            .filter(db.or_(MpesaCallback.claimed_at.is_(None), MpesaCallback.claimed_at < retry_after))
+            .order_by(MpesaCallback.received_at)
+            .limit(batch_size)
+        ]
+        if not candidate_ids:
+            db.session.commit()
+            return []
+        
+        claim_token = str(uuid.uuid4())
+        MpesaCallback.query.filter(
+            MpesaCallback.id.in_(candidate_ids),
+            MpesaCallback.status == 'pending'
+        ).update({'status': 'processing', 'claim_token': claim_token, 'claimed_at': now}, synchronize_session=False)
+        db.session.commit()
+        
+        return MpesaCallback.query\
+            .filter_by(claim_token=claim_token, status='processing')\
+            .order_by(MpesaCallback.received_at)\
+            .all()
+
+
+mpesa_callback_consumer = CallbackConsumer()
@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+import math
+import os
+import threading
+import time
+from app import bcrypt
+from app.config import Config
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when PASSWORD_HASH_MAX_PENDING hashes are already waiting"""
+
+    def __init__(self, retry_after):
+        super().__init__('Too many sign-ins in progress, please retry shortly')
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated thread pool.
+
+    bcrypt releases the GIL while it hashes, so PASSWORD_HASH_WORKERS
+    threads keep that many cores busy while request threads just wait on
+    the result, and a login spike can never take more CPU than the pool
+    has. At most PASSWORD_HASH_MAX_PENDING hashes are queued or running;
+    past that callers get HasherBusy with a Retry-After estimate instead of
+    joining a queue they would time out in.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._average = None  # seconds per hash, moving average
+
+    @property
+    def workers(self):
+        return self.max_workers or Config.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+            return self._executor
+
+    def _run(self, fn, *args):
+        limit = self.max_pending or Config.PASSWORD_HASH_MAX_PENDING or self.workers * 8
+        with self._lock:
+            if self._pending >= limit:
+                raise HasherBusy(self.retry_after())
+            self._pending += 1
+        try:
+            return self.executor.submit(self._timed, fn, *args).result(timeout=Config.PASSWORD_HASH_TIMEOUT)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._average = elapsed if self._average is None else 0.9 * self._average + 0.1 * elapsed
+
+    def retry_after(self):
+        """Whole seconds for the current backlog to drain"""
+        per_hash = self._average or 0.25
+        return max(1, math.ceil(self._pending * per_hash / self.workers))
+
+    def hash(self, password):
+        return self._run(bcrypt.generate_password_hash, password, Config.BCRYPT_LOG_ROUNDS).decode('utf-8')
+
+    def verify(self, password_hash, password):
+        return self._run(bcrypt.check_password_hash, password_hash, password)
+
+    @staticmethod
+    def needs_rehash(password_hash):
+        """True if the hash was made with a different BCRYPT_LOG_ROUNDS"""
+        try:
+            return int(password_hash.split('$')[2]) != Config.BCRYPT_LOG_ROUNDS
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,322 @@
+import hashlib
+import json
+import os
+import tempfile
+from io import BytesIO
+from datetime import datetime
+from flask import Response, send_file, stream_with_context
+from app import db
+from app.config import Config
+from app.utils.compression import accepted_encodings, available_encodings, compressor
+
+# Artifacts are compressed once and served many times, so use the slowest, smallest settings
+PRECOMPRESS_LEVELS = {'gzip': 9, 'br': 11}
+
+
+class PDFStore:
+    """Base class for PDF artifact storage backends"""
+    scheme = None
+
+    def open(self, key):
+        """Return a readable binary file for key, or None if missing"""
+        raise NotImplementedError
+
+    def put(self, key, data):
+        raise NotImplementedError
+
+    def open_writer(self, key):
+        """Incremental writer; backends without one buffer and call put()"""
+        return BufferedWriter(self, key)
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def size(self, key):
+        raise NotImplementedError
+
+    def locator(self, key):
+        """Value stored in Will.pdf_url for an artifact"""
+        return f"{self.scheme}://{key}.pdf"
+
+
+class BufferedWriter:
+    """Collects chunks in memory and stores them on commit()"""
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+        self.buffer = BytesIO()
+
+    def write(self, data):
+        self.buffer.write(data)
+
+    def commit(self):
+        self.store.put(self.key, self.buffer.getvalue())
+
+    def abort(self):
+        self.buffer = BytesIO()
+
+
+class FileWriter:
+    """Streams chunks to a temp file that is renamed into place on commit()"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        self.file = os.fdopen(fd, 'wb')
+
+    def write(self, data):
+        self.file.write(data)
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class LocalDiskStore(PDFStore):
+    """Stores rendered PDFs as files under a local directory"""
+    scheme = 'local'
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or Config.PDF_CACHE_DIR)
+
+    def path(self, key):
+        # Shard by prefix so a single directory never grows too large
+        return os.path.join(self.root, key[:2], f"{key}.pdf")
+
+    def open(self, key):
+        try:
+            return open(self.path(key), 'rb')
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        writer = self.open_writer(key)
+        try:
+            writer.write(data)
+            writer.commit()
+        except Exception:
+            writer.abort()
+            raise
+
+    def open_writer(self, key):
+        # Write to a temp file first so readers never see a partial PDF
+        return FileWriter(self.path(key))
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            return None
+
+
+STORE_BACKENDS = {
+    'local': LocalDiskStore,
+}
+
+
+def register_store_backend(name, store_class):
+    """Make a custom PDFStore available through PDF_CACHE_BACKEND"""
+    STORE_BACKENDS[name] = store_class
+
+
+def will_cache_key(will, user):
+    """Content hash of everything that ends up in a rendered will"""
+    payload = {
+        'id': will.id,
+        'title': will.title,
+        'content': will.content,
+        'beneficiaries': will.beneficiaries or [],
+        'status': will.status,
+        'created_at': will.created_at.isoformat() if will.created_at else None,
+        'testator': {
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'email': user.email,
+            'phone': user.phone
+        }
+    }
+    return _hash_payload(payload)
+
+
+def memorial_cache_key(memorial_data):
+    """Content hash of the data passed to the memorial renderer"""
+    return _hash_payload({'memorial': memorial_data})
+
+
+def _hash_payload(payload):
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class PDFArtifactCache:
+    """Content-addressed cache for rendered will and memorial PDFs"""
+
+    def __init__(self, store=None):
+        self._store = store
+
+    @property
+    def store(self):
+        if self._store is None:
+            backend = STORE_BACKENDS.get(Config.PDF_CACHE_BACKEND)
+            if backend is None:
+                raise ValueError(f"Unknown PDF cache backend: {Config.PDF_CACHE_BACKEND}")
+            self._store = backend()
+        return self._store
+
+    def open(self, key):
+        """Return (file, size) for a stored artifact, or (None, None)"""
+        cached = self.store.open(key)
+        if cached is None:
+            return None, None
+        return cached, self.store.size(key)
+
+    def open_encoded(self, key, encodings=()):
+        """Return (file, size, encoding) for key, preferring the first stored variant in encodings.
+
+        encoding is None when the plain PDF is returned. A stored PDF
+        missing its variants (written before PDF_PRECOMPRESS was set, say)
+        gets them on this first request.
+        """
+        variant = self._open_variant(key, encodings)
+        if variant is not None:
+            return variant
+
+        cached, size = self.open(key)
+        if cached is None or not set(encodings).intersection(precompress_encodings()):
+            return cached, size, None
+
+        with cached:
+            data = cached.read()
+        self._put_variants(key, data)
+        return self._open_variant(key, encodings) or (BytesIO(data), len(data), None)
+
+    def _open_variant(self, key, encodings):
+        for encoding in encodings:
+            cached, size = self.open(variant_key(key, encoding))
+            if cached is not None:
+                return cached, size, encoding
+        return None
+
+    def put(self, key, data):
+        """Store a rendered PDF together with its precompressed variants"""
+        self._put_variants(key, data)
+        self.store.put(key, data)
+
+    def _put_variants(self, key, data):
+        for encoding in precompress_encodings():
+            stream = compressor(encoding, PRECOMPRESS_LEVELS.get(encoding))
+            self.store.put(variant_key(key, encoding), stream.compress(data) + stream.finish())
+
+    def fetch(self, key, render, encodings=(), stored=None):
+        """Return (body, size, encoding) for key; body is a file on a hit.
+
+        On a hit the first stored variant in encodings is served as is.
+        On a miss render() must return an iterable of PDF chunks. They are
+        passed through to the caller uncompressed and written to the store,
+        along with each precompressed variant, as they go, so the full
+        document is never held in memory; size and encoding are then None.
+        stored() is called once the artifact is in the store: at once on a
+        hit, after the last chunk on a miss, never if the render fails or
+        the client disconnects.
+        """
+        cached, size, encoding = self.open_encoded(key, encodings)
+        if cached is not None:
+            if stored is not None:
+                stored()
+            return cached, size, encoding
+        return self._tee(key, render(), stored), None, None
+
+    def _tee(self, key, chunks, stored=None):
+        variants = [
+            (self.store.open_writer(variant_key(key, encoding)), compressor(encoding, PRECOMPRESS_LEVELS.get(encoding)))
+            for encoding in precompress_encodings()
+        ]
+        writer = self.store.open_writer(key)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+                for variant, stream in variants:
+                    variant.write(stream.compress(chunk))
+                yield chunk
+            for variant, stream in variants:
+                variant.write(stream.finish())
+        except BaseException:
+            # Includes GeneratorExit when the client disconnects mid-download
+            writer.abort()
+            for variant, _ in variants:
+                variant.abort()
+            raise
+        # Variants first: once the PDF itself is visible, so are they
+        for variant, _ in variants:
+            variant.commit()
+        writer.commit()
+        if stored is not None:
+            stored()
+
+    def fetch_will(self, will, user, render, encodings=()):
+        """Return (body, size, encoding) for a will, streaming render(will, user) on a miss"""
+        key = will_cache_key(will, user)
+        locator = self.store.locator(key)
+
+        def record_locator():
+            # Only once the artifact exists, so pdf_url never points at a missing file
+            if will.pdf_url != locator:
+                will.pdf_url = locator
+                will.pdf_generated_at = datetime.utcnow()
+                db.session.commit()
+
+        return self.fetch(key, lambda: render(will, user), encodings, stored=record_locator)
+
+
+def variant_key(key, encoding):
+    """Store key of the encoding-compressed copy of an artifact"""
+    return f"{key}-{encoding}"
+
+
+def precompress_encodings():
+    """Encodings artifacts are stored in besides plain PDF (PDF_PRECOMPRESS, if importable)"""
+    return available_encodings(Config.PDF_PRECOMPRESS)
+
+
+def client_encodings():
+    """Precompressed encodings the current request accepts, best first"""
+    return accepted_encodings(precompress_encodings())
+
+
+def pdf_response(body, filename, size=None, encoding=None):
+    """Download response for a PDF file object or an iterable of chunks.
+
+    Files are sent with a Content-Length; chunk iterables are streamed with
+    chunked transfer encoding while the document is still being rendered.
+    encoding names the Content-Encoding of a precompressed body.
+    """
+    if hasattr(body, 'read'):
+        response = send_file(
+            body,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/pdf'
+        )
+        if size is not None:
+            response.content_length = size
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+        return response
+    
+    response = Response(stream_with_context(body), mimetype='application/pdf')
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    return response
+
+
+pdf_artifact_cache = PDFArtifactCache()
@@ -0,0 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from functools import partial
+import threading
+from flask import current_app
+from app import db
+from app.config import Config
+from app.models import PDFJob
+from app.services.pdf_cache import pdf_artifact_cache
+from app.utils.pdf_generator import PDFGenerator
+
+MAX_ATTEMPTS = 3
+
+
+def render_to_store(document_type, document, user, key):
+    """Runs inside a pool process: render the document and store the bytes"""
+    if document_type == 'will':
+        pdf_content = PDFGenerator.generate_will_pdf(document, user)
+    else:
+        pdf_content = PDFGenerator.generate_memorial_pdf(document)
+    
+    pdf_artifact_cache.put(key, pdf_content)
+    return len(pdf_content)
+
+
+class PDFJobQueue:
+    """Renders PDFs in a local process pool, tracking job state in the database.
+    
+    Loaders registered per document type turn (document_id, user_id) into a
+    picklable (document, user, cache_key) snapshot, or None if not found.
+    Because the job row is the source of truth, a job orphaned by a worker
+    restart is re-queued the next time its status is polled.
+    """
+    
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self.loaders = {}
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def register_loader(self, document_type, loader):
+        self.loaders[document_type] = loader
+    
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers or Config.PDF_JOB_WORKERS
+                )
+            return self._executor
+    
+    def enqueue(self, user_id, document_type, document_id):
+        """Create a job for a document, or return None if it does not exist"""
+        loaded = self.loaders[document_type](document_id, user_id)
+        if loaded is None:
+            return None
+        document, user, key = loaded
+        
+        job = PDFJob(
+            user_id=user_id,
+            document_type=document_type,
+            document_id=document_id,
+            result_key=key,
+            status='queued'
+        )
+        db.session.add(job)
+        
+        # Already rendered - nothing to do
+        if pdf_artifact_cache.store.exists(key):
+            job.status = 'completed'
+            job.completed_at = datetime.utcnow()
+            db.session.commit()
+            return job
+        
+        db.session.commit()
+        self._submit(job, document, user, key)
+        return job
+    
+    def refresh(self, job):
+        """Re-queue a job whose worker has not reported back within PDF_JOB_TIMEOUT"""
+        if job.status not in ('queued', 'running'):
+            return job
+        
+        deadline = datetime.utcnow() - timedelta(seconds=Config.PDF_JOB_TIMEOUT)
+        if job.updated_at and job.updated_at > deadline:
+            return job
+        
+        loaded = self.loaders[job.document_type](job.document_id, job.user_id)
+        if loaded is None or job.attempts >= MAX_ATTEMPTS:
+            job.status = 'failed'
+            job.error = 'Document not found' if loaded is None else 'Render timed out'
+            db.session.commit()
+            return job
+        
+        document, user, key = loaded
+        job.result_key = key
+        self._submit(job, document, user, key)
+        return job
+    
+    def _submit(self, job, document, user, key):
+        job.status = 'running'
+        job.attempts = (job.attempts or 0) + 1
+        db.session.commit()
+        
+        app = current_app._get_current_object()
+        future = self.submit_render(job.document_type, document, user, key)
+        future.add_done_callback(partial(self._finish, app, job.id))
+    
+    def submit_render(self, document_type, document, user, key):
+        """Render a snapshot into the artifact store on the pool; returns a Future"""
+        try:
+            return self.executor.submit(render_to_store, document_type, document, user, key)
+        except BrokenProcessPool:
+            # A pool process died - start a fresh pool and try once more
+            with self._lock:
+                self._executor = None
+            return self.executor.submit(render_to_store, document_type, document, user, key)
+    
+    def _finish(self, app, job_id, future):
+        with app.app_context():
+            job = PDFJob.query.get(job_id)
+            if not job:
+                return
+            
+            try:
+                future.result()
+                job.status = 'completed'
+                job.error = None
+                job.completed_at = datetime.utcnow()
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+            
+            db.session.commit()
+
+
+pdf_job_queue = PDFJobQueue()
@@ -0,0 +1,181 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+import re
+import threading
+import time
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import Config
+
+_current = ContextVar('query_stats', default=None)
+
+# Expanded IN lists and multi-row VALUES differ only in placeholder count
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """Statement text with IN lists collapsed, so repeats of one query compare equal"""
+    return _PLACEHOLDER_LIST.sub('(?...)', _WHITESPACE.sub(' ', statement).strip())
+
+
+class QueryStats:
+    """Queries run while a recorder is active (one request, or a block in a test)"""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+        self.slowest = []  # (seconds, statement), longest first
+
+    def record(self, statement, elapsed):
+        stats = self
+        while stats is not None:
+            stats._add(statement, elapsed)
+            stats = stats.parent
+
+    def _add(self, statement, elapsed):
+        self.count += 1
+        self.total_time += elapsed
+        self.shapes[statement_shape(statement)] += 1
+        if len(self.slowest) < Config.QUERY_STATS_SLOWEST or elapsed > self.slowest[-1][0]:
+            self.slowest.append((elapsed, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[Config.QUERY_STATS_SLOWEST:]
+
+    def repeated(self, threshold=None):
+        """Statement shapes run at least threshold times: likely N+1 loads"""
+        threshold = threshold or Config.QUERY_STATS_N_PLUS_ONE_THRESHOLD
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+    def header(self):
+        return f"count={self.count}; db_ms={self.total_time * 1000:.1f}; repeated={len(self.repeated())}"
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def record_queries():
+    """Collect every query run in this context (including inside nested requests)"""
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(limit):
+    """Fail with QueryBudgetExceeded if the block runs more than limit queries.
+
+        with query_budget(2):
+            client.get(f'/api/fundraisers/{fundraiser_id}')
+    """
+    with record_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        shapes = '\n'.join(f"  {count}x {shape}" for shape, count in stats.shapes.most_common())
+        raise QueryBudgetExceeded(f"{stats.count} queries, budget {limit}:\n{shapes}")
+
+
+class EndpointQueryStats:
+    """Per-endpoint totals across requests, for /api/admin/query-stats"""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, stats):
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {
+                'requests': 0, 'queries': 0, 'db_time': 0.0, 'max_queries': 0, 'n_plus_one_requests': 0
+            })
+            entry['requests'] += 1
+            entry['queries'] += stats.count
+            entry['db_time'] += stats.total_time
+            entry['max_queries'] = max(entry['max_queries'], stats.count)
+            if stats.repeated():
+                entry['n_plus_one_requests'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'requests': entry['requests'],
+                    'avg_queries': round(entry['queries'] / entry['requests'], 2),
+                    'max_queries': entry['max_queries'],
+                    'avg_db_ms': round(entry['db_time'] / entry['requests'] * 1000, 2),
+                    'n_plus_one_requests': entry['n_plus_one_requests']
+                }
+                for endpoint, entry in self._endpoints.items()
+            }
+
+
+endpoint_query_stats = EndpointQueryStats()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('query_stats_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get('query_stats_started')
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, 'handle_error')
+def _drop_timer(context):
+    # A failed statement never reaches after_cursor_execute
+    started = context.connection.info.get('query_stats_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def init_app(app):
+    """Record queries per request; see QUERY_STATS_* in Config"""
+    if not Config.QUERY_STATS:
+        return
+
+    @app.before_request
+    def start_recording():
+        request.environ['kenfuse.query_stats'] = QueryStats(parent=_current.get())
+        request.environ['kenfuse.query_stats_token'] = _current.set(request.environ['kenfuse.query_stats'])
+
+    @app.after_request
+    def finish_recording(response):
+        stats = request.environ.get('kenfuse.query_stats')
+        if stats is None:
+            return response
+
+        endpoint_query_stats.add(request.endpoint or 'unmatched', stats)
+        repeated = stats.repeated()
+        if repeated:
+            app.logger.warning(
+                f"Possible N+1 in {request.endpoint}: " +
+                '; '.join(f"{count}x {shape[:200]}" for shape, count in repeated.items())
+            )
+        if stats.total_time * 1000 >= Config.QUERY_STATS_SLOW_REQUEST_MS:
+            app.logger.warning(
+                f"{request.endpoint} spent {stats.total_time * 1000:.0f}ms in {stats.count} queries, slowest: " +
+                '; '.join(f"{elapsed * 1000:.1f}ms {statement[:200]}" for elapsed, statement in stats.slowest)
+            )
+        if Config.QUERY_STATS_HEADER:
+            response.headers['X-Query-Stats'] = stats.header()
+        return response
+
+    @app.teardown_request
+    def stop_recording(exc):
+        token = request.environ.pop('kenfuse.query_stats_token', None)
+        if token is not None:
+            _current.reset(token)
@@ -0,0 +1,226 @@
+from collections import OrderedDict
+from functools import wraps
+import json
+import threading
+import time
+from urllib.parse import urlencode
+from flask import request, make_response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.models import Fundraiser, Donation, VendorProfile, VendorService
+
+
+class CacheBackend:
+    """Base class for response cache storage"""
+
+    def get(self, key):
+        """Stored bytes for key, or None if missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def generations(self, tags):
+        """Current generation number of each tag"""
+        raise NotImplementedError
+
+    def bump(self, tags):
+        """Start a new generation for each tag, orphaning entries made under the old one"""
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU capped at RESPONSE_CACHE_MAX_BYTES; the stand-in for tests and single workers"""
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or Config.RESPONSE_CACHE_MAX_BYTES
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(key) + len(value)
+
+    def generations(self, tags):
+        with self._lock:
+            return [self._generations.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared by every worker; size it with Redis' maxmemory and an LRU eviction policy"""
+
+    def __init__(self, url=None):
+        import redis
+        self.redis = redis.Redis.from_url(url or Config.RESPONSE_CACHE_REDIS_URL)
+
+    def get(self, key):
+        return self.redis.get(key)
+
+    def set(self, key, value, ttl):
+        self.redis.set(key, value, ex=ttl)
+
+    def generations(self, tags):
+        return [int(value or 0) for value in self.redis.mget([f"gen:{tag}" for tag in tags])]
+
+    def bump(self, tags):
+        pipeline = self.redis.pipeline(transaction=False)
+        for tag in tags:
+            pipeline.incr(f"gen:{tag}")
+        pipeline.execute()
+
+
+class NullCacheBackend(CacheBackend):
+    """Disables caching"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def generations(self, tags):
+        return [0] * len(tags)
+
+    def bump(self, tags):
+        pass
+
+
+CACHE_BACKENDS = {
+    'memory': MemoryCacheBackend,
+    'redis': RedisCacheBackend,
+    'none': NullCacheBackend,
+}
+
+
+def register_cache_backend(name, backend_class):
+    """Make a custom CacheBackend available through RESPONSE_CACHE_BACKEND"""
+    CACHE_BACKENDS[name] = backend_class
+
+
+class ResponseCache:
+    """Caches whole GET responses of public endpoints.
+
+    Entries are keyed by endpoint, path and the sorted query string, and
+    carry tags such as 'fundraiser:<id>'. Each tag has a generation number
+    that is part of the key, so invalidating a tag just bumps its
+    generation and the old entries age out through TTL or LRU eviction.
+    Tags are bumped after any commit that wrote a tracked model, see
+    track().
+    """
+
+    # Validators set by the view, replayed on hits so conditional GETs still work
+    kept_headers = ('ETag', 'Last-Modified', 'Cache-Control')
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self.trackers = {}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            backend = CACHE_BACKENDS.get(Config.RESPONSE_CACHE_BACKEND)
+            if backend is None:
+                raise ValueError(f"Unknown response cache backend: {Config.RESPONSE_CACHE_BACKEND}")
+            self._backend = backend()
+        return self._backend
+
+    def cached(self, ttl, tags):
+        """Decorator for a GET view; tags(**view_args) names what its response depends on"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                view_tags = tags(**kwargs)
+                generations = self.backend.generations(view_tags)
+                query = urlencode(sorted(request.args.items(multi=True)))
+                key = ':'.join(
+                    ['rc', request.endpoint] + [f"{tag}@{n}" for tag, n in zip(view_tags, generations)]
+                ) + f":{request.path}?{query}"
+
+                stored = self.backend.get(key)
+                if stored is not None:
+                    head, _, body = stored.partition(b'\n')
+                    response = make_response(body, 200)
+                    head = json.loads(head)
+                    response.mimetype = head['mimetype']
+                    response.headers.extend(head['headers'])
+                    response.headers['X-Cache'] = 'HIT'
+                    return response.make_conditional(request)
+
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    head = {
+                        'mimetype': response.mimetype,
+                        'headers': {name: response.headers[name] for name in self.kept_headers if name in response.headers}
+                    }
+                    self.backend.set(key, json.dumps(head).encode('utf-8') + b'\n' + response.get_data(), ttl)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, tags):
+        if tags:
+            self.backend.bump(sorted(set(tags)))
+
+    def track(self, model, tags):
+        """Invalidate tags(instance) whenever an instance of model is committed"""
+        self.trackers[model] = tags
+
+
+response_cache = ResponseCache()
+
+response_cache.track(Fundraiser, lambda fundraiser: ['fundraisers', f"fundraiser:{fundraiser.id}"])
+response_cache.track(Donation, lambda donation: ['fundraisers', f"fundraiser:{donation.fundraiser_id}"])
+response_cache.track(VendorProfile, lambda vendor: ['vendors', f"vendor:{vendor.id}"])
+response_cache.track(VendorService, lambda service: [f"vendor:{service.vendor_id}"])
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_cache_tags(session, flush_context):
+    pending = session.info.setdefault('response_cache_tags', set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        tags = response_cache.trackers.get(type(instance))
+        if tags is not None:
+            pending.update(tags(instance))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    response_cache.invalidate(session.info.pop('response_cache_tags', None))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session):
+    session.info.pop('response_cache_tags', None)
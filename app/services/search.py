@@ -0,0 +1,439 @@
+from functools import reduce
+import math
+import re
+import sqlalchemy as sa
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.config import Config
+from app.models import Fundraiser, Memorial, Tribute
+from app.utils.fieldsets import load_fields
+
+
+class SearchQueryError(ValueError):
+    """Raised for a search string with nothing to match on, or an unknown search type"""
+
+
+class SearchKind:
+    """A model whose text columns are indexed.
+
+    columns maps column name -> weight, 'A' (highest) to 'D'. Only rows
+    matching where are indexed, so searches never have to join back to
+    filter out what the public may not see; watch names the other
+    columns where reads. private maps an indexed column to a boolean
+    column that, when true, keeps it out of the index and out of results.
+    follows maps another model to (its columns, fn(instance) -> select of
+    ids of this kind to re-index when they change).
+    """
+
+    def __init__(self, name, model, columns, where=None, watch=(), follows=None, private=None):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.where = where
+        self.private = private or {}
+        self.watch = tuple(columns) + tuple(watch) + tuple(self.private.values())
+        self.follows = follows or {}
+
+    @property
+    def table(self):
+        return self.model.__table__
+
+    def filters(self, ids=None):
+        """Conditions on table for the rows that belong in the index, limited to ids if given"""
+        filters = [] if self.where is None else [self.where]
+        if ids is not None:
+            filters.append(self.table.c.id.in_(ids))
+        return filters
+
+    def text(self, column):
+        """The text indexed for column: '' where it is missing or private"""
+        value = sa.func.coalesce(self.table.c[column], '')
+        if column in self.private:
+            value = sa.case((self.table.c[self.private[column]].is_(True), ''), else_=value)
+        return value
+
+    def dump(self, rows, fields=None):
+        """model.dump(rows, fields) with private columns blanked"""
+        dumped = self.model.dump(rows, fields)
+        for column, flag in self.private.items():
+            if fields is None or column in fields:
+                for row, item in zip(rows, dumped):
+                    if getattr(row, flag):
+                        item[column] = None
+        return dumped
+
+
+class SearchPage:
+    def __init__(self, items, total, page, per_page):
+        self.items = items
+        self.total = total
+        self.page = page
+        self.per_page = per_page
+
+    @property
+    def pages(self):
+        return math.ceil(self.total / self.per_page) if self.total else 0
+
+
+def documents_table(*columns):
+    """search_documents: one row per indexed instance, giving it an integer id; backends add columns"""
+    return sa.Table(
+        'search_documents', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('kind', sa.String(20), nullable=False),
+        sa.Column('doc_id', sa.String(36), nullable=False),
+        *columns,
+        sa.UniqueConstraint('kind', 'doc_id', name='uq_search_documents_kind_doc_id'),
+    )
+
+
+def search_terms(text):
+    """Lowercased words of a user's query, at most SEARCH_MAX_TERMS"""
+    terms = re.findall(r'\w+', (text or '').lower())[:Config.SEARCH_MAX_TERMS]
+    if not terms:
+        raise SearchQueryError('q must contain at least one letter or digit')
+    return terms
+
+
+def is_prefix(term):
+    """Terms long enough are prefix-matched, so 'wanj' finds Wanjiku"""
+    return len(term) >= Config.SEARCH_PREFIX_MIN_LENGTH
+
+
+class SearchBackend:
+    """Base class for full-text index storage; one per SQL dialect"""
+
+    def __init__(self, kinds):
+        self.kinds = kinds
+
+    def create(self, connection):
+        """Create missing index structures; returns the kinds whose index is new and needs filling"""
+        raise NotImplementedError
+
+    def index(self, connection, kind, ids=None):
+        """Re-index the rows of kind whose id is in ids (a list or a select), or every row.
+
+        Ids whose row is gone or no longer matches kind.where are removed.
+        """
+        raise NotImplementedError
+
+    def search(self, kind, terms, limit, offset):
+        """select of kind.model rows matching every term, best match first"""
+        raise NotImplementedError
+
+    def count(self, kind, terms):
+        """select of the number of rows matching every term"""
+        raise NotImplementedError
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """One FTS5 table per kind, keyed by search_documents.id.
+
+    The FTS tables keep their own copy of the text: rowids of tables with
+    string primary keys can change on VACUUM, so they cannot be
+    external-content tables over the source rows.
+    """
+
+    weights = {'A': 10.0, 'B': 4.0, 'C': 1.0, 'D': 0.5}
+
+    def __init__(self, kinds):
+        super().__init__(kinds)
+        self.documents = documents_table()
+        self._fts = {}
+
+    def fts(self, kind):
+        if kind.name not in self._fts:
+            self._fts[kind.name] = sa.table(
+                f"search_{kind.name}", sa.column('rowid'), *[sa.column(column) for column in kind.columns]
+            )
+        return self._fts[kind.name]
+
+    def create(self, connection):
+        self.documents.create(connection, checkfirst=True)
+        existing = set(sa.inspect(connection).get_table_names())
+        created = []
+        for kind in self.kinds.values():
+            if self.fts(kind).name in existing:
+                continue
+            self._create_fts(connection, kind)
+            created.append(kind)
+        return created
+
+    def _create_fts(self, connection, kind):
+        # prefix='2 3' answers short prefix queries from the index instead of scanning terms
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {self.fts(kind).name} USING fts5("
+            f"{', '.join(kind.columns)}, prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def index(self, connection, kind, ids=None):
+        fts, documents = self.fts(kind), self.documents
+        stale = documents.c.kind == kind.name
+        if ids is None:
+            # Much faster than deleting every row, which FTS5 does one at a time
+            connection.exec_driver_sql(f"DROP TABLE {fts.name}")
+            self._create_fts(connection, kind)
+        else:
+            stale = stale & documents.c.doc_id.in_(ids)
+            # One rowid at a time: FTS5 only looks rows up by rowid for an equality
+            rowids = connection.execute(sa.select(documents.c.id).where(stale)).scalars().all()
+            if rowids:
+                connection.execute(
+                    fts.delete().where(fts.c.rowid == sa.bindparam('doc_rowid')),
+                    [{'doc_rowid': rowid} for rowid in rowids]
+                )
+        connection.execute(documents.delete().where(stale))
+
+        table = kind.table
+        connection.execute(documents.insert().from_select(
+            ['kind', 'doc_id'], sa.select(sa.literal(kind.name), table.c.id).where(*kind.filters(ids))
+        ))
+        connection.execute(fts.insert().from_select(
+            ['rowid', *kind.columns],
+            sa.select(documents.c.id, *[kind.text(column) for column in kind.columns])
+            .join(table, table.c.id == documents.c.doc_id)
+            .where(stale, *kind.filters(ids))
+            # FTS5 builds its segments far faster from ascending rowids
+            .order_by(documents.c.id)
+        ))
+        if ids is None:
+            connection.exec_driver_sql(f"INSERT INTO {fts.name} ({fts.name}) VALUES ('optimize')")
+
+    def match(self, kind, terms):
+        # \w+ terms need no escaping once quoted
+        expression = ' '.join(f'"{term}"*' if is_prefix(term) else f'"{term}"' for term in terms)
+        return sa.literal_column(self.fts(kind).name).op('MATCH')(expression)
+
+    def search(self, kind, terms, limit, offset):
+        fts = self.fts(kind)
+        score = sa.literal_column(
+            f"bm25({fts.name}, {', '.join(str(self.weights[weight]) for weight in kind.columns.values())})"
+        ).label('score')
+        # Rank and page inside FTS5, then join only the page back to the model
+        ranked = (
+            sa.select(fts.c.rowid, score)
+            .where(self.match(kind, terms))
+            .order_by(score, fts.c.rowid)
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
+        return (
+            sa.select(kind.model)
+            .select_from(ranked)
+            .join(self.documents, self.documents.c.id == ranked.c.rowid)
+            .join(kind.model, kind.model.id == self.documents.c.doc_id)
+            .order_by(ranked.c.score, ranked.c.rowid)
+        )
+
+    def count(self, kind, terms):
+        return sa.select(sa.func.count()).select_from(self.fts(kind)).where(self.match(kind, terms))
+
+
+class PostgresSearchBackend(SearchBackend):
+    """A weighted tsvector per document in search_documents, with a partial GIN index per kind"""
+
+    def __init__(self, kinds):
+        super().__init__(kinds)
+        from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+        self.config = sa.cast(Config.SEARCH_POSTGRES_CONFIG, REGCONFIG)
+        self.documents = documents_table(sa.Column('document', TSVECTOR, nullable=False))
+        for kind in kinds.values():
+            sa.Index(
+                f"ix_search_documents_{kind.name}", self.documents.c.document,
+                postgresql_using='gin', postgresql_where=self.documents.c.kind == kind.name
+            )
+
+    def create(self, connection):
+        inspector = sa.inspect(connection)
+        existing = {index['name'] for index in inspector.get_indexes('search_documents')} \
+            if inspector.has_table('search_documents') else set()
+        self.documents.create(connection, checkfirst=True)
+        created = []
+        for index in self.documents.indexes:
+            if index.name not in existing:
+                index.create(connection, checkfirst=True)
+                created.append(self.kinds[index.name[len('ix_search_documents_'):]])
+        return created
+
+    def index(self, connection, kind, ids=None):
+        documents = self.documents
+        stale = documents.c.kind == kind.name
+        if ids is not None:
+            stale = stale & documents.c.doc_id.in_(ids)
+        connection.execute(documents.delete().where(stale))
+
+        table = kind.table
+        # setweight(to_tsvector(column), weight) || ... for each indexed column
+        document = reduce(lambda left, right: left.op('||')(right), [
+            sa.func.setweight(sa.func.to_tsvector(self.config, kind.text(column)), weight)
+            for column, weight in kind.columns.items()
+        ])
+        connection.execute(documents.insert().from_select(
+            ['kind', 'doc_id', 'document'],
+            sa.select(sa.literal(kind.name), table.c.id, document).where(*kind.filters(ids))
+        ))
+
+    def match(self, kind, terms):
+        # \w+ terms carry no tsquery operators
+        query = sa.func.to_tsquery(
+            self.config, ' & '.join(f"{term}:*" if is_prefix(term) else term for term in terms)
+        )
+        return query, (self.documents.c.kind == kind.name) & self.documents.c.document.op('@@')(query)
+
+    def search(self, kind, terms, limit, offset):
+        query, match = self.match(kind, terms)
+        score = sa.func.ts_rank_cd(self.documents.c.document, query).label('score')
+        ranked = (
+            sa.select(self.documents.c.doc_id, score)
+            .where(match)
+            .order_by(score.desc(), self.documents.c.doc_id)
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
+        return (
+            sa.select(kind.model)
+            .join(ranked, kind.model.id == ranked.c.doc_id)
+            .order_by(ranked.c.score.desc(), ranked.c.doc_id)
+        )
+
+    def count(self, kind, terms):
+        _, match = self.match(kind, terms)
+        return sa.select(sa.func.count()).select_from(self.documents).where(match)
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def register_search_backend(dialect, backend_class):
+    """Make a SearchBackend available for databases of another SQL dialect"""
+    SEARCH_BACKENDS[dialect] = backend_class
+
+
+class SearchIndex:
+    """Ranked full-text search over registered models.
+
+    The index lives in the application database and is written in the
+    same transaction as the rows it covers: after each flush, new and
+    deleted instances of a registered model are indexed or removed, and
+    updated ones are re-indexed if a watched column changed. Writes that
+    bypass the ORM are picked up by rebuild().
+    """
+
+    def __init__(self):
+        self.kinds = {}
+        self.backend = None
+
+    def register(self, name, model, columns, where=None, watch=(), follows=None, private=None):
+        self.kinds[name] = SearchKind(name, model, columns, where, watch, follows, private)
+
+    def init_app(self, app):
+        if not Config.SEARCH_ENABLED:
+            return
+        with app.app_context():
+            backend = SEARCH_BACKENDS.get(db.engine.dialect.name)
+            if backend is None:
+                app.logger.warning(f"Search disabled: no backend for {db.engine.dialect.name}")
+                return
+            backend = backend(self.kinds)
+            try:
+                with db.engine.begin() as connection:
+                    for kind in backend.create(connection):
+                        backend.index(connection, kind)
+            except sa.exc.OperationalError as e:
+                # e.g. an SQLite build without FTS5
+                app.logger.warning(f"Search disabled: {str(e)}")
+                return
+        self.backend = backend
+
+    def kind(self, name):
+        kind = self.kinds.get(name)
+        if kind is None:
+            raise SearchQueryError(f"Unknown search type: {name}. Available: {', '.join(self.kinds)}")
+        return kind
+
+    def search(self, name, text, page=1, per_page=10, fields=None):
+        """One page of kind name's indexed rows matching text, best match first"""
+        kind = self.kind(name)
+        terms = search_terms(text)
+
+        total = db.session.execute(self.backend.count(kind, terms)).scalar_one()
+        if not total:
+            return SearchPage([], 0, page, per_page)
+
+        select = self.backend.search(kind, terms, per_page, (page - 1) * per_page)
+        if fields is not None:
+            # Private flags are read by kind.dump() even when not requested
+            flags = [getattr(kind.model, flag) for flag in sorted(set(kind.private.values()))]
+            select = select.options(load_fields(kind.model, fields, *flags))
+        return SearchPage(db.session.execute(select).scalars().all(), total, page, per_page)
+
+    def rebuild(self, name=None):
+        """Re-index one kind, or all of them"""
+        kinds = [self.kind(name)] if name else list(self.kinds.values())
+        with db.engine.begin() as connection:
+            for kind in kinds:
+                self.backend.index(connection, kind)
+
+    def _index_flushed(self, session):
+        changed = {}
+        followed = []
+        flushed = [(instance, 'new') for instance in session.new] + \
+            [(instance, 'dirty') for instance in session.dirty] + \
+            [(instance, 'deleted') for instance in session.deleted]
+        for instance, change in flushed:
+            for kind in self.kinds.values():
+                if type(instance) is kind.model and self._touched(instance, change, kind.watch):
+                    changed.setdefault(kind.name, set()).add(instance.id)
+                follow = kind.follows.get(type(instance))
+                # Rows added in the same flush as a new instance are in session.new themselves
+                if follow and change != 'new' and self._touched(instance, change, follow[0]):
+                    followed.append((kind, follow[1](instance)))
+
+        if not changed and not followed:
+            return
+        # The rows were just flushed, so the index is rebuilt from what is in the table now
+        connection = session.connection()
+        for name, ids in changed.items():
+            self.backend.index(connection, self.kinds[name], sorted(ids))
+        for kind, ids in followed:
+            self.backend.index(connection, kind, ids)
+
+    @staticmethod
+    def _touched(instance, change, columns):
+        if change != 'dirty':
+            return True
+        state = inspect(instance)
+        return any(state.attrs[column].history.has_changes() for column in columns)
+
+
+search_index = SearchIndex()
+
+search_index.register(
+    'memorials', Memorial, {'deceased_name': 'A', 'location': 'B', 'obituary': 'C', 'biography': 'C'},
+    where=Memorial.visibility == 'public', watch=('visibility',)
+)
+search_index.register(
+    'tributes', Tribute, {'author_name': 'B', 'message': 'C'},
+    where=Tribute.memorial_id.in_(sa.select(Memorial.id).where(Memorial.visibility == 'public')),
+    watch=('memorial_id',),
+    private={'author_name': 'is_anonymous'},
+    follows={
+        Memorial: (('visibility',), lambda memorial: sa.select(Tribute.id).where(Tribute.memorial_id == memorial.id))
+    }
+)
+search_index.register(
+    'fundraisers', Fundraiser, {'title': 'A', 'description': 'C'},
+    where=Fundraiser.is_verified.is_(True), watch=('is_verified',)
+)
+
+
+@event.listens_for(Session, 'after_flush')
+def _index_flushed(session, flush_context):
+    if search_index.backend is not None:
+        search_index._index_flushed(session)
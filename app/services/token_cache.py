@@ -0,0 +1,148 @@
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+
+class FileTokenStore:
+    """Shares one access token between gunicorn workers through a JSON file.
+    
+    An flock on a sidecar lock file makes the refresh single-flight across
+    processes as well as threads.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+    
+    @contextmanager
+    def lock(self, blocking=True):
+        """Yields whether the lock is held; blocking=False gives up at once if another process has it"""
+        import fcntl
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def load(self):
+        try:
+            with open(self.path) as f:
+                entry = json.load(f)
+            return entry['access_token'], float(entry['expires_at'])
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def save(self, token, expires_at):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'access_token': token, 'expires_at': expires_at}, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.path)
+
+
+class AccessTokenCache:
+    """Caches an OAuth token until shortly before it expires.
+    
+    fetch() must return (token, expires_in_seconds). Tokens are refreshed
+    refresh_margin seconds ahead of expiry by a single caller while everyone
+    else keeps using the current one; if a refresh fails the old token is
+    served until it really expires. After a failure fetch() is not called
+    again for retry_backoff seconds, doubling up to max_backoff while the
+    failures continue.
+    """
+    
+    def __init__(self, fetch, refresh_margin=60, store=None, retry_backoff=5, max_backoff=60):
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.store = store
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._token = None
+        self._expires_at = 0
+        self._backoff = 0
+        self._retry_at = 0
+        self._error = None
+        self._lock = threading.Lock()
+    
+    def _fresh(self, expires_at, now):
+        return now < expires_at - self.refresh_margin
+    
+    def _valid(self, now):
+        return self._token and now < self._expires_at
+    
+    def get(self):
+        now = time.time()
+        if self._token and self._fresh(self._expires_at, now):
+            return self._token
+        
+        if self._valid(now):
+            # Still usable: one caller refreshes, the rest keep the current token instead of queueing
+            if now < self._retry_at or not self._lock.acquire(False):
+                return self._token
+        else:
+            self._lock.acquire()
+        
+        try:
+            # Another thread may have refreshed while we waited
+            now = time.time()
+            if self._token and self._fresh(self._expires_at, now):
+                return self._token
+            
+            if self.store is None:
+                return self._refresh(now)
+            
+            with self.store.lock(blocking=not self._valid(now)) as locked:
+                if not locked:
+                    # Another worker is refreshing
+                    return self._token
+                entry = self.store.load()
+                if entry and entry[1] > self._expires_at:
+                    self._token, self._expires_at = entry
+                    if self._fresh(entry[1], now):
+                        return self._token
+                token = self._refresh(now)
+                if self._error is None:
+                    self.store.save(self._token, self._expires_at)
+                return token
+        finally:
+            self._lock.release()
+    
+    def _refresh(self, now):
+        if now < self._retry_at:
+            # The last fetch failed moments ago; don't hammer a struggling token endpoint
+            if self._valid(now):
+                return self._token
+            raise self._error.with_traceback(None)
+        
+        try:
+            token, expires_in = self.fetch()
+        except Exception as e:
+            self._backoff = min(self._backoff * 2, self.max_backoff) if self._backoff else self.retry_backoff
+            self._retry_at = now + self._backoff
+            self._error = e
+            if self._valid(now):
+                return self._token
+            raise
+        self._backoff = 0
+        self._retry_at = 0
+        self._error = None
+        self._token = token
+        self._expires_at = now + float(expires_in)
+        return token
+    
+    def invalidate(self):
+        """Drop the cached token, e.g. after the provider rejected it"""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0
+            if self.store is not None:
+                with self.store.lock():
+                    self.store.save('', 0)
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+import hashlib
+import math
+import threading
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.config import Config
+from app.models import RevokedToken
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings; no false negatives"""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationStore:
+    """Revoked token ids and login families, checked in memory first.
+
+    Rows live in revoked_tokens; each worker mirrors their keys in a bloom
+    filter, so checking a token that was never revoked - nearly every
+    request - is a few hashes and no query. A bloom hit is confirmed
+    against the table. New rows from other workers are pulled in every
+    REVOCATION_SYNC_INTERVAL seconds, and every REVOCATION_COMPACT_INTERVAL
+    rows whose tokens have all expired are deleted and the filter rebuilt.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._bloom = None
+        self._synced_at = None
+        self._last_compaction = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        with app.app_context():
+            self.rebuild()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='token-revocation-sync', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(Config.REVOCATION_SYNC_INTERVAL):
+            with self.app.app_context():
+                try:
+                    if datetime.utcnow() - self._last_compaction >= timedelta(seconds=Config.REVOCATION_COMPACT_INTERVAL):
+                        self.compact()
+                    else:
+                        self.sync()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"Token revocation sync failed: {str(e)}")
+                finally:
+                    db.session.remove()
+
+    def rebuild(self):
+        """Reload every live key into a freshly sized filter"""
+        now = datetime.utcnow()
+        keys = db.session.execute(
+            db.select(RevokedToken.key).where(RevokedToken.expires_at > now)
+        ).scalars().all()
+        bloom = BloomFilter(max(Config.REVOCATION_BLOOM_CAPACITY, len(keys) * 2), Config.REVOCATION_BLOOM_ERROR_RATE)
+        for key in keys:
+            bloom.add(key)
+        with self._lock:
+            self._bloom = bloom
+            self._synced_at = now
+            self._last_compaction = now
+
+    def sync(self):
+        """Add keys revoked by other workers since the last sync"""
+        now = datetime.utcnow()
+        # Overlap the window so rows committed late with an earlier revoked_at are not missed
+        since = self._synced_at - timedelta(seconds=Config.REVOCATION_SYNC_INTERVAL)
+        keys = db.session.execute(
+            db.select(RevokedToken.key).where(RevokedToken.revoked_at > since)
+        ).scalars().all()
+        with self._lock:
+            for key in keys:
+                self._bloom.add(key)
+            self._synced_at = now
+
+    def compact(self):
+        db.session.execute(db.delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        db.session.commit()
+        self.rebuild()
+
+    def is_revoked(self, *keys):
+        """True if any of keys (jti, family) has been revoked"""
+        candidates = [key for key in keys if key and key in self._bloom]
+        if not candidates:
+            return False
+        return db.session.execute(
+            db.select(RevokedToken.key).where(RevokedToken.key.in_(candidates)).limit(1)
+        ).first() is not None
+
+    def _insert(self, key, kind, user_id, expires_at):
+        db.session.add(RevokedToken(key=key, kind=kind, user_id=user_id, expires_at=expires_at))
+        db.session.commit()
+        with self._lock:
+            self._bloom.add(key)
+
+    def claim(self, jti, user_id, expires_at):
+        """Mark a refresh token as used; False if it had been used already"""
+        try:
+            self._insert(jti, 'jti', user_id, expires_at)
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    def revoke(self, key, kind, user_id, expires_at):
+        try:
+            self._insert(key, kind, user_id, expires_at)
+        except IntegrityError:
+            db.session.rollback()
+
+
+token_revocations = RevocationStore()
@@ -0,0 +1,147 @@
+import zlib
+from flask import request
+from app.config import Config
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/pdf', 'application/javascript', 'application/xml',
+    'image/svg+xml', 'text/css', 'text/csv', 'text/html', 'text/plain',
+}
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        """Everything compressed so far, without ending the stream"""
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        import brotli
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+ENCODERS = {
+    'br': BrotliCompressor,
+    'gzip': GzipCompressor,
+}
+
+
+def register_encoder(name, compressor_class):
+    """Make another content coding available through COMPRESSION_ENCODINGS"""
+    ENCODERS[name] = compressor_class
+
+
+def _importable(encoding):
+    try:
+        ENCODERS[encoding](1)
+        return True
+    except ImportError:
+        return False
+
+
+_available = {}
+
+
+def available_encodings(names):
+    """The encodings in names (comma separated, preferred first) that can be used in this process"""
+    if names not in _available:
+        _available[names] = [
+            name for name in (name.strip() for name in names.split(','))
+            if name in ENCODERS and _importable(name)
+        ]
+    return _available[names]
+
+
+def level_for(encoding):
+    return Config.COMPRESSION_BROTLI_QUALITY if encoding == 'br' else Config.COMPRESSION_GZIP_LEVEL
+
+
+def compressor(encoding, level=None):
+    return ENCODERS[encoding](level_for(encoding) if level is None else level)
+
+
+def accepted_encodings(offered):
+    """offered encodings the client accepts, best first (client q-value, then our order)"""
+    accept = request.accept_encodings
+    ranked = [(accept.quality(encoding), -index, encoding) for index, encoding in enumerate(offered)]
+    return [encoding for quality, _, encoding in sorted(ranked, reverse=True) if quality > 0]
+
+
+def compress_stream(chunks, compressor, flush_each=True):
+    """Compress an iterable of chunks; flush_each sends every chunk on as soon as it is compressed"""
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if flush_each:
+                data += compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def init_app(app):
+    if not Config.COMPRESSION_ENABLED:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        """gzip/brotli for text-like responses; registered first so it runs after every other hook"""
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES or request.method == 'HEAD'
+                or response.status_code < 200 or response.status_code in (204, 206, 304)):
+            return response
+        if 'Content-Encoding' not in response.headers:
+            response.vary.add('Accept-Encoding')
+        else:
+            return response
+
+        accepted = accepted_encodings(available_encodings(Config.COMPRESSION_ENCODINGS))
+        if not accepted:
+            return response
+        encoding = accepted[0]
+
+        if not response.is_streamed:
+            data = response.get_data()
+            if len(data) < Config.COMPRESSION_MIN_SIZE:
+                return response
+            stream = compressor(encoding)
+            compressed = stream.compress(data) + stream.finish()
+            if len(compressed) >= len(data):
+                return response
+            response.set_data(compressed)
+        else:
+            if response.content_length is not None and response.content_length < Config.COMPRESSION_MIN_SIZE:
+                return response
+            # Files (send_file) are compressed in large blocks; generators chunk by chunk as they yield
+            response.response = compress_stream(
+                response.response, compressor(encoding), flush_each=not response.direct_passthrough
+            )
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+
+        response.headers['Content-Encoding'] = encoding
+        # The encoded body is a different representation, so a strong validator no longer fits
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
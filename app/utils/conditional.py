@@ -0,0 +1,53 @@
+import hashlib
+from flask import request, make_response
+from werkzeug.http import is_resource_modified
+
+
+def resource_etag(*parts):
+    """Weak validator for a resource built from its id, updated_at and anything else it embeds"""
+    digest = hashlib.sha1(
+        '|'.join(part.isoformat() if hasattr(part, 'isoformat') else str(part) for part in parts).encode('utf-8')
+    ).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def not_modified(etag, last_modified=None):
+    """A 304 response if the client's If-None-Match / If-Modified-Since still match, else None.
+
+    Call it before serializing or rendering so an unchanged resource costs
+    only the query that produced its validators.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    response = make_response('', 304)
+    _set_validators(response, etag, last_modified)
+    return response
+
+
+def conditional(rv, etag, last_modified=None):
+    """Attach ETag/Last-Modified to a view's return value"""
+    response = make_response(rv)
+    _set_validators(response, etag, last_modified)
+    return response
+
+
+def _set_validators(response, etag, last_modified):
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(microsecond=0)
+    # Clients may keep the body but must revalidate before using it
+    response.headers.setdefault('Cache-Control', 'no-cache')
+
+
+def init_app(app):
+    @app.after_request
+    def add_payload_etag(response):
+        """Hash-based ETag for JSON GETs that did not set one (mainly list endpoints)"""
+        if (request.method == 'GET' and response.status_code == 200 and not response.is_streamed
+                and response.mimetype == 'application/json' and 'ETag' not in response.headers):
+            digest = hashlib.sha1(response.get_data()).hexdigest()
+            response.headers['ETag'] = f'W/"{digest[:32]}"'
+            response.make_conditional(request)
+        return response
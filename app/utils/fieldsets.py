@@ -0,0 +1,51 @@
+from flask import request
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+
+class FieldsetError(ValueError):
+    """Raised for a ?fields= that names something the resource does not expose"""
+
+
+def requested_fields(model, extra=()):
+    """Fields named in ?fields=, in serialize_fields order; None when the parameter is absent.
+
+    Only names in model.serialize_fields (plus extra, for keys the view
+    adds itself such as embedded lists) are accepted, so the parameter
+    cannot reach columns a resource does not already return.
+    """
+    raw = request.args.get('fields')
+    if raw is None:
+        return None
+
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    allowed = tuple(model.serialize_fields) + tuple(extra)
+    unknown = names.difference(allowed)
+    if unknown:
+        raise FieldsetError(f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(allowed)}")
+    if not names:
+        raise FieldsetError('fields must name at least one field')
+    return tuple(field for field in allowed if field in names)
+
+
+def load_fields(model, fields, *also):
+    """load_only() for the columns fields are built from, plus also (columns the view reads itself).
+
+    The primary key is always loaded. Properties in fields are expanded
+    through model.serialize_depends.
+    """
+    columns = {attr.key for attr in inspect(model).column_attrs}
+    needed = set()
+    for field in fields:
+        if field in columns:
+            needed.add(field)
+        else:
+            needed.update(model.serialize_depends.get(field, ()))
+    return load_only(*[getattr(model, name) for name in sorted(needed)], *also)
+
+
+def with_fields(query, model, fields, *also):
+    """query limited to the columns needed for fields; unchanged when fields is None"""
+    if fields is None:
+        return query
+    return query.options(load_fields(model, fields, *also))
@@ -0,0 +1,80 @@
+import dataclasses
+from datetime import date, time
+from decimal import Decimal
+import uuid
+from flask.json.provider import DefaultJSONProvider
+from app.config import Config
+
+
+def _default(o):
+    """Types the encoders do not handle themselves; dates as ISO 8601 like Model.to_dict()"""
+    if isinstance(o, (date, time)):
+        return o.isoformat()
+    if isinstance(o, (uuid.UUID, Decimal)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class StandardJSONProvider(DefaultJSONProvider):
+    """Standard library json, with ISO 8601 dates instead of Flask's HTTP dates"""
+
+    default = staticmethod(_default)
+
+
+class OrjsonJSONProvider(StandardJSONProvider):
+    """orjson encoder; datetime, date and UUID are encoded natively in C.
+
+    Output matches StandardJSONProvider apart from non-ASCII text, which
+    is written as UTF-8 rather than \\u escapes.
+    """
+
+    def __init__(self, app):
+        import orjson
+        super().__init__(app)
+        self.orjson = orjson
+        self.option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+
+    def dumps(self, obj, **kwargs):
+        # Options only the standard library understands
+        if set(kwargs) - {'default', 'separators', 'indent', 'sort_keys', 'ensure_ascii'}:
+            return super().dumps(obj, **kwargs)
+        option = self.option | (self.orjson.OPT_INDENT_2 if kwargs.get('indent') else 0)
+        return self.orjson.dumps(obj, default=kwargs.get('default', _default), option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self.orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option | self.orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= self.orjson.OPT_INDENT_2
+        return self._app.response_class(self.orjson.dumps(obj, default=_default, option=option), mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {
+    'orjson': OrjsonJSONProvider,
+    'standard': StandardJSONProvider,
+}
+
+
+def register_json_provider(name, provider_class):
+    """Make a custom JSONProvider available through JSON_PROVIDER"""
+    JSON_PROVIDERS[name] = provider_class
+
+
+def init_app(app):
+    provider = JSON_PROVIDERS.get(Config.JSON_PROVIDER)
+    if provider is None:
+        raise ValueError(f"Unknown JSON provider: {Config.JSON_PROVIDER}")
+    try:
+        app.json = provider(app)
+    except ImportError as e:
+        app.logger.warning(f"JSON provider {Config.JSON_PROVIDER} unavailable ({str(e)}), using the standard library")
+        app.json = StandardJSONProvider(app)
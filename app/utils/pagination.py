@@ -0,0 +1,143 @@
+import base64
+from collections import OrderedDict
+import json
+import threading
+import time
+from datetime import datetime
+from flask import request
+from app import db
+from app.config import Config
+
+
+class CursorError(ValueError):
+    """Raised for a cursor that cannot be decoded"""
+
+
+def encode_cursor(values, direction):
+    payload = [direction] + [
+        {'dt': value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Return (values, direction) from a cursor made by encode_cursor()"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        direction, values = payload[0], payload[1:]
+        if direction not in ('next', 'prev') or len(values) != size:
+            raise ValueError(direction)
+        return [
+            datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+            for value in values
+        ], direction
+    except (ValueError, TypeError, KeyError, IndexError):
+        raise CursorError('Invalid cursor')
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, prev_cursor, per_page, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def meta(self):
+        meta = {
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'per_page': self.per_page
+        }
+        if self.total is not None:
+            meta['total'] = self.total
+        return meta
+
+
+class CountCache:
+    """Short-lived cache of listing totals so cursor pages skip COUNT(*).
+
+    Keys come from query-string filters, so entries are kept in a bounded
+    LRU of PAGINATION_COUNT_CACHE_SIZE.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, query):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        total = query.order_by(None).count()
+        with self._lock:
+            self._entries[key] = (total, now + Config.PAGINATION_COUNT_TTL)
+            self._entries.move_to_end(key)
+            while len(self._entries) > (self.max_entries or Config.PAGINATION_COUNT_CACHE_SIZE):
+                self._entries.popitem(last=False)
+        return total
+
+
+count_cache = CountCache()
+
+
+def wants_cursor():
+    """Cursor mode is used when the request has a cursor parameter (empty for the first page)"""
+    return 'cursor' in request.args
+
+
+def keyset_paginate(query, columns, per_page, count_key=None):
+    """Cursor pagination of query in descending order of columns.
+
+    The last column must be unique (normally the id) so every row has a
+    distinct position. Each page is a range scan from the cursor position
+    instead of an OFFSET, so deep pages cost the same as the first. The
+    total is only counted when ?include_total=true, and is then cached per
+    count_key for PAGINATION_COUNT_TTL seconds.
+    """
+    per_page = max(1, min(per_page, Config.PAGINATION_MAX_PER_PAGE))
+    token = request.args.get('cursor')
+
+    total = None
+    if count_key is not None and request.args.get('include_total', 'false').lower() == 'true':
+        total = count_cache.get(count_key, query)
+
+    key, direction = (None, 'next')
+    if token:
+        key, direction = decode_cursor(token, len(columns))
+
+    position = db.tuple_(*columns)
+    if direction == 'next':
+        if key is not None:
+            query = query.filter(position < db.tuple_(*key))
+        query = query.order_by(*[column.desc() for column in columns])
+    else:
+        # Walk backwards from the cursor, then flip the rows into display order
+        query = query.filter(position > db.tuple_(*key))
+        query = query.order_by(*[column.asc() for column in columns])
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+
+    def position_of(row):
+        return [getattr(row, column.key) for column in columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or direction == 'prev':
+            next_cursor = encode_cursor(position_of(rows[-1]), 'next')
+        if (direction == 'next' and key is not None) or (direction == 'prev' and has_more):
+            prev_cursor = encode_cursor(position_of(rows[0]), 'prev')
+
+    return KeysetPage(rows, next_cursor, prev_cursor, per_page, total)
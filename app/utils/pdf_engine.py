@@ -0,0 +1,517 @@
+from datetime import datetime, date
+from functools import lru_cache
+from types import SimpleNamespace
+import threading
+import zlib
+from fpdf import FPDF
+from app.services.metrics import observe_pdf_render
+
+# Every document registers the same fonts in the same order so that the
+# font references inside precompiled templates (/F1, /F2, ...) stay valid.
+FONTS = (('Arial', 'B'), ('Arial', ''), ('Arial', 'I'))
+
+WILL_BANNER = 'KENFUSE - End of Life Planning Platform'
+MEMORIAL_BANNER = 'KENFUSE - Memorial'
+
+
+# Character widths per font key, filled from FPDF's metric files on first use
+FONT_WIDTHS = {}
+
+
+def _register_fonts(pdf):
+    for family, style in FONTS:
+        pdf.set_font(family, style, 12)
+        fontkey = pdf.font_family + pdf.font_style
+        if fontkey not in FONT_WIDTHS:
+            FONT_WIDTHS[fontkey] = pdf.current_font['cw']
+    # Nothing selected yet - the first set_font on a page must emit
+    pdf.font_family = ''
+
+
+@lru_cache(maxsize=65536)
+def _word_width(fontkey, word):
+    """Width of a word in 1/1000 em; natural text repeats words constantly"""
+    cw = FONT_WIDTHS[fontkey]
+    return sum(cw.get(c, 0) for c in word)
+
+
+def _text(value):
+    """FPDF core fonts are latin-1 only; replace anything else"""
+    return str(value).encode('latin-1', 'replace').decode('latin-1')
+
+
+def _fields(data):
+    """Accept model instances, SimpleNamespaces or plain dicts"""
+    if data is None or not isinstance(data, dict):
+        return data
+    return SimpleNamespace(**data)
+
+
+class PageTemplate:
+    """Page content captured once and stamped onto later pages.
+
+    draw(pdf) is run a single time against a scratch document starting at
+    y; the content stream operators it produces are reused verbatim.
+    """
+
+    def __init__(self, draw, y=None):
+        pdf = FPDF()
+        _register_fonts(pdf)
+        # Footers sit inside the break margin; never spill onto a new page
+        pdf.set_auto_page_break(False)
+        pdf.add_page()
+        if y is not None:
+            pdf.set_y(y)
+        pdf.font_family = ''
+
+        start = len(pdf.pages[pdf.page])
+        draw(pdf)
+
+        self.ops = pdf.pages[pdf.page][start:]
+        self.end_y = pdf.y
+
+    def stamp(self, pdf):
+        pdf.pages[pdf.page] += self.ops
+        # The template changed the font behind FPDF's back
+        pdf.font_family = ''
+        pdf.x = pdf.l_margin
+        pdf.y = self.end_y
+
+
+class EnginePDF(FPDF):
+    """FPDF document whose header and footer come from precompiled templates"""
+
+    def __init__(self, engine, banner):
+        FPDF.__init__(self)
+        self.engine = engine
+        self.banner = banner
+        _register_fonts(self)
+        self.set_auto_page_break(auto=True, margin=15)
+        # Finished pages are serialised straight away and handed out through
+        # drain(), so only the page being laid out is ever held in memory.
+        self._chunks = []
+        self._flushed = 0
+
+    # Incremental output
+
+    def drain(self):
+        """Return the PDF bytes produced since the last call"""
+        chunks = self._chunks
+        self._chunks = []
+        return chunks
+
+    def _flush(self):
+        if self.buffer:
+            data = self.buffer.encode('latin-1')
+            self._chunks.append(data)
+            self._flushed += len(data)
+            self.buffer = ''
+
+    def _newobj(self):
+        # Offsets are absolute even though earlier bytes have been flushed
+        self.n += 1
+        self.offsets[self.n] = self._flushed + len(self.buffer)
+        self._out(str(self.n) + ' 0 obj')
+
+    def _beginpage(self, orientation):
+        if self.page == 0:
+            self._putheader()
+        FPDF._beginpage(self, orientation)
+
+    def _endpage(self):
+        FPDF._endpage(self)
+        n = self.page
+        content = self.pages[n].encode('latin-1')
+        if self.compress:
+            content = zlib.compress(content)
+            stream_filter = '/Filter /FlateDecode '
+        else:
+            stream_filter = ''
+
+        # Page n is object 1 + 2n and its content 2 + 2n, as in FPDF._putpages
+        self._newobj()
+        self._out('<</Type /Page')
+        self._out('/Parent 1 0 R')
+        self._out('/Resources 2 0 R')
+        self._out('/Contents ' + str(self.n + 1) + ' 0 R>>')
+        self._out('endobj')
+        self._newobj()
+        self._out('<<' + stream_filter + '/Length ' + str(len(content)) + '>>')
+        self._putstream(content)
+        self._out('endobj')
+
+        self.pages[n] = ''
+        self._flush()
+
+    def _putpages(self):
+        # Pages were written as they finished; only the page tree is left
+        w_pt, h_pt = self.fw_pt, self.fh_pt
+        self.offsets[1] = self._flushed + len(self.buffer)
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out('/Kids [' + ''.join(str(3 + 2 * i) + ' 0 R ' for i in range(self.page)) + ']')
+        self._out('/Count ' + str(self.page))
+        self._out('/MediaBox [0 0 %.2f %.2f]' % (w_pt, h_pt))
+        self._out('>>')
+        self._out('endobj')
+
+    def _putresources(self):
+        self._putfonts()
+        self._putimages()
+        self.offsets[2] = self._flushed + len(self.buffer)
+        self._out('2 0 obj')
+        self._out('<<')
+        self._putresourcedict()
+        self._out('>>')
+        self._out('endobj')
+
+    def _enddoc(self):
+        self._putpages()
+        self._putresources()
+        # Info
+        self._newobj()
+        self._out('<<')
+        self._putinfo()
+        self._out('>>')
+        self._out('endobj')
+        # Catalog
+        self._newobj()
+        self._out('<<')
+        self._putcatalog()
+        self._out('>>')
+        self._out('endobj')
+        # Cross-ref
+        xref_offset = self._flushed + len(self.buffer)
+        self._out('xref')
+        self._out('0 ' + str(self.n + 1))
+        self._out('0000000000 65535 f ')
+        for i in range(1, self.n + 1):
+            self._out('%010d 00000 n ' % self.offsets[i])
+        # Trailer
+        self._out('trailer')
+        self._out('<<')
+        self._puttrailer()
+        self._out('>>')
+        self._out('startxref')
+        self._out(xref_offset)
+        self._out('%%EOF')
+        self.state = 3
+        self._flush()
+
+    def finish(self):
+        """Close the document and return the remaining bytes"""
+        self.close()
+        return self.drain()
+
+    # Page furniture
+
+    def header(self):
+        self.engine.header_template(self.banner).stamp(self)
+
+    def flow_text(self, h, txt):
+        """Justified, wrapped text - same layout as multi_cell(0, h, txt).
+
+        FPDF's multi_cell measures one character at a time; this measures
+        whole words through a shared width cache and only falls back to
+        character splitting for words wider than the line. This is a
+        generator: it yields the bytes of each page it completes.
+        """
+        fontkey = self.font_family + self.font_style
+        w = self.w - self.r_margin - self.x
+        wmax = (w - 2 * self.c_margin) * 1000.0 / self.font_size
+        space = _word_width(fontkey, ' ')
+
+        text = txt.replace('\r', '')
+        if text.endswith('\n'):
+            text = text[:-1]
+
+        for paragraph in text.split('\n'):
+            line = []
+            width = 0
+            for word in paragraph.split(' '):
+                word_width = _word_width(fontkey, word)
+                if line:
+                    if width + space + word_width <= wmax:
+                        line.append(word)
+                        width += space + word_width
+                        continue
+                    # Break at the last space and justify the finished line
+                    self.ws = (wmax - width) / 1000.0 * self.font_size / (len(line) - 1) if len(line) > 1 else 0
+                    self._out('%.3f Tw' % (self.ws * self.k))
+                    self.cell(w, h, ' '.join(line), 0, 2, 'J')
+                    if self._chunks:
+                        yield from self.drain()
+
+                if word_width > wmax:
+                    word = self._split_long_word(fontkey, w, h, wmax, word)
+                    word_width = _word_width(fontkey, word)
+                line = [word]
+                width = word_width
+
+            self._reset_word_spacing()
+            self.cell(w, h, ' '.join(line), 0, 2, 'J')
+            if self._chunks:
+                yield from self.drain()
+
+        self.x = self.l_margin
+
+    def _split_long_word(self, fontkey, w, h, wmax, word):
+        """Emit full-width chunks of an over-long word, returning the remainder"""
+        cw = FONT_WIDTHS[fontkey]
+        start = 0
+        width = 0
+        i = 0
+        while i < len(word):
+            width += cw.get(word[i], 0)
+            if width > wmax:
+                if i == start:
+                    i += 1
+                self._reset_word_spacing()
+                self.cell(w, h, word[start:i], 0, 2, 'J')
+                start = i
+                width = 0
+                continue
+            i += 1
+        return word[start:]
+
+    def _reset_word_spacing(self):
+        if self.ws > 0:
+            self.ws = 0
+            self._out('0 Tw')
+
+    def footer(self):
+        self.engine.footer_template(self.page_no()).stamp(self)
+
+
+class PDFEngine:
+    """Single rendering path for will and memorial PDFs"""
+
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def _template(self, key, draw, y=None):
+        template = self._templates.get(key)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(key)
+                if template is None:
+                    template = PageTemplate(draw, y)
+                    self._templates[key] = template
+        return template
+
+    # Precompiled blocks
+
+    def header_template(self, banner):
+        def draw(pdf):
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(0, 10, banner, 0, 1, 'C')
+            pdf.ln(5)
+        return self._template(('header', banner), draw)
+
+    def footer_template(self, page_no):
+        def draw(pdf):
+            pdf.set_y(-15)
+            pdf.set_font('Arial', 'I', 8)
+            pdf.cell(0, 10, f'Page {page_no}', 0, 0, 'C')
+        return self._template(('footer', page_no), draw)
+
+    def will_title_template(self):
+        def draw(pdf):
+            pdf.set_font('Arial', 'B', 16)
+            pdf.cell(0, 10, 'LAST WILL AND TESTAMENT', 0, 1, 'C')
+            pdf.ln(5)
+            pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+            pdf.ln(10)
+        y = self.header_template(WILL_BANNER).end_y
+        return self._template('will_title', draw, y)
+
+    def signature_templates(self):
+        """Static parts of the signature page, around the testator's name"""
+        def draw_top(pdf):
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(0, 10, 'SIGNATURES', 0, 1)
+            pdf.ln(10)
+            pdf.set_font('Arial', '', 11)
+            pdf.cell(0, 8, 'Testator:', 0, 1)
+            pdf.cell(0, 15, '_' * 50, 0, 1)
+
+        def draw_bottom(pdf):
+            pdf.set_font('Arial', '', 11)
+            pdf.cell(0, 8, "Date: _______________", 0, 1)
+            pdf.ln(15)
+            for witness in ('Witness 1:', 'Witness 2:'):
+                pdf.cell(0, 8, witness, 0, 1)
+                pdf.cell(0, 15, '_' * 50, 0, 1)
+                pdf.cell(0, 8, 'Name: _________________________', 0, 1)
+                pdf.cell(0, 8, 'ID: ___________________________', 0, 1)
+                if witness == 'Witness 1:':
+                    pdf.ln(15)
+
+        top = self._template('signature_top', draw_top, self.header_template(WILL_BANNER).end_y)
+        # The testator's name sits in one 8mm line between the two blocks
+        bottom = self._template('signature_bottom', draw_bottom, top.end_y + 8)
+        return top, bottom
+
+    def warm(self):
+        """Build the fixed templates and load font metrics up front"""
+        self.will_title_template()
+        self.signature_templates()
+        self.header_template(MEMORIAL_BANNER)
+        self.footer_template(1)
+
+    # Documents
+
+    def _generated_by(self, pdf, document_id=None):
+        pdf.set_y(-30)
+        pdf.set_font('Arial', 'I', 8)
+        pdf.cell(0, 5, f"Generated by KENFUSE on {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}", 0, 1, 'C')
+        if document_id:
+            pdf.cell(0, 5, f"Document ID: {document_id}", 0, 1, 'C')
+
+    def render_will(self, will, user=None):
+        """Render a will to bytes; accepts Will/User instances or equivalent dicts"""
+        return b''.join(self.stream_will(will, user))
+
+    def render_memorial(self, memorial_data):
+        """Render a memorial to bytes from the dict built by the memorials routes"""
+        return b''.join(self.stream_memorial(memorial_data))
+
+    def stream_will(self, will, user=None):
+        """Yield a will PDF page by page"""
+        return observe_pdf_render('will', self._will_pages(will, user))
+
+    def stream_memorial(self, memorial_data):
+        """Yield a memorial PDF page by page"""
+        return observe_pdf_render('memorial', self._memorial_pages(memorial_data))
+
+    def _will_pages(self, will, user):
+        will = _fields(will)
+        user = _fields(user)
+
+        pdf = EnginePDF(self, WILL_BANNER)
+        pdf.add_page()
+        self.will_title_template().stamp(pdf)
+
+        if user is not None:
+            first_name = getattr(user, 'first_name', None) or ''
+            last_name = getattr(user, 'last_name', None) or ''
+            testator_name = _text(f"{first_name} {last_name}".strip())
+        else:
+            testator_name = 'the Testator'
+
+        # Testator Information
+        if user is not None:
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(0, 10, 'TESTATOR INFORMATION', 0, 1)
+            pdf.set_font('Arial', '', 11)
+            pdf.cell(0, 8, f"Name: {testator_name}", 0, 1)
+            pdf.cell(0, 8, _text(f"Email: {getattr(user, 'email', None) or 'N/A'}"), 0, 1)
+            if getattr(user, 'phone', None):
+                pdf.cell(0, 8, _text(f"Phone: {user.phone}"), 0, 1)
+            pdf.ln(5)
+
+        # Will Details
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'WILL DETAILS', 0, 1)
+        pdf.set_font('Arial', '', 11)
+        pdf.cell(0, 8, _text(f"Title: {getattr(will, 'title', None) or 'N/A'}"), 0, 1)
+        created_at = getattr(will, 'created_at', None)
+        if created_at:
+            if isinstance(created_at, (datetime, date)):
+                created_at = created_at.strftime('%d %B, %Y')
+            pdf.cell(0, 8, _text(f"Created: {created_at}"), 0, 1)
+        if getattr(will, 'status', None):
+            pdf.cell(0, 8, _text(f"Status: {will.status.upper()}"), 0, 1)
+        will_id = getattr(will, 'id', None)
+        if will_id:
+            pdf.cell(0, 8, f"Document ID: {str(will_id)[:8].upper()}", 0, 1)
+        pdf.ln(10)
+
+        # Declaration
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'DECLARATION', 0, 1)
+        pdf.set_font('Arial', '', 11)
+        declaration = (f"I, {testator_name}, being of sound mind and memory, "
+                       f"do hereby make, publish, and declare this to be my Last Will and Testament, "
+                       f"hereby revoking all former Wills and Codicils by me made.")
+        yield from pdf.flow_text(8, declaration)
+        pdf.ln(10)
+
+        # Will Content
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'WILL CONTENT', 0, 1)
+        pdf.set_font('Arial', '', 11)
+        yield from pdf.flow_text(8, _text(getattr(will, 'content', None) or 'No content provided.'))
+        pdf.ln(10)
+
+        # Beneficiaries
+        beneficiaries = getattr(will, 'beneficiaries', None)
+        if beneficiaries:
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(0, 10, 'BENEFICIARIES', 0, 1)
+            pdf.set_font('Arial', '', 11)
+            for beneficiary in beneficiaries:
+                name = beneficiary.get('name', 'N/A')
+                relationship = beneficiary.get('relationship', 'N/A')
+                share = beneficiary.get('share', 'N/A')
+                pdf.cell(0, 8, _text(f"- {name} ({relationship}): {share}"), 0, 1)
+                yield from pdf.drain()
+            pdf.ln(10)
+
+        # Signatures
+        pdf.add_page()
+        yield from pdf.drain()
+        signature_top, signature_bottom = self.signature_templates()
+        signature_top.stamp(pdf)
+        pdf.set_font('Arial', '', 11)
+        pdf.cell(0, 8, testator_name, 0, 1)
+        signature_bottom.stamp(pdf)
+
+        self._generated_by(pdf, will_id)
+        yield from pdf.finish()
+
+    def _memorial_pages(self, memorial_data):
+        pdf = EnginePDF(self, MEMORIAL_BANNER)
+        pdf.add_page()
+
+        # Title
+        pdf.set_font('Arial', 'B', 16)
+        pdf.cell(0, 10, _text(memorial_data.get('title') or 'Memorial'), 0, 1, 'C')
+        pdf.ln(10)
+
+        # Name
+        pdf.set_font('Arial', 'B', 14)
+        pdf.cell(0, 10, _text(f"Name: {memorial_data.get('name') or 'N/A'}"), 0, 1)
+        pdf.ln(5)
+
+        # Dates
+        pdf.set_font('Arial', '', 12)
+        pdf.cell(0, 10, f"Birth Date: {memorial_data.get('birth_date') or 'N/A'}", 0, 1)
+        pdf.cell(0, 10, f"Death Date: {memorial_data.get('death_date') or 'N/A'}", 0, 1)
+        pdf.ln(5)
+
+        # Biography
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, "Biography:", 0, 1)
+        pdf.set_font('Arial', '', 12)
+        yield from pdf.flow_text(10, _text(memorial_data.get('biography') or 'No biography available.'))
+
+        self._generated_by(pdf)
+        yield from pdf.finish()
+
+    def render_test(self):
+        """Small document used to check that PDF generation works"""
+        pdf = EnginePDF(self, WILL_BANNER)
+        pdf.add_page()
+        pdf.set_font('Arial', 'B', 16)
+        pdf.cell(0, 10, 'KENFUSE TEST PDF', 0, 1, 'C')
+        pdf.ln(10)
+        pdf.set_font('Arial', '', 12)
+        pdf.cell(0, 10, f'Generated: {datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")}', 0, 1)
+        pdf.ln(5)
+        pdf.multi_cell(0, 10, 'This is a test PDF document from KENFUSE.')
+        return b''.join(pdf.finish())
+
+
+pdf_engine = PDFEngine()
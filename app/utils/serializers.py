@@ -0,0 +1,105 @@
+from functools import lru_cache
+from sqlalchemy import Date, DateTime, inspect
+
+
+class ModelSerializer:
+    """Response dicts for one model class, from a field list compiled once.
+
+    fields are attribute (or property) names. On first use the list is
+    turned into generated Python functions with the keys inlined and
+    loaded column values read straight from the instance dict, so a row
+    costs one dict literal instead of an ORM descriptor call per field:
+
+    - to_dict(obj): Date/DateTime columns as ISO 8601 strings, safe to
+      store or pass to the standard json module
+    - native(obj) / many(rows): dates left as objects for app.json
+      (see app/utils/json_provider.py) to encode
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+        self._functions = None
+
+    def _compile(self):
+        columns = inspect(self.model).column_attrs
+        mapped = {attr.key for attr in columns}
+        temporal = {attr.key for attr in columns if isinstance(attr.columns[0].type, (Date, DateTime))}
+
+        def items(read, iso):
+            rendered = []
+            for field in self.fields:
+                value = read(field) if field in mapped else f"obj.{field}"
+                if iso and field in temporal:
+                    value = f"(v.isoformat() if (v := {value}) else None)"
+                rendered.append(f"{field!r}: {value}")
+            return '{' + ', '.join(rendered) + '}'
+
+        for field in self.fields:
+            if not field.isidentifier():
+                raise ValueError(f"{self.model.__name__}: invalid serializer field {field!r}")
+
+        # Loaded columns are read from the instance dict, skipping the ORM
+        # descriptor; expired or deferred ones go through it and are loaded
+        fast = lambda field: f"d[{field!r}]"
+        slow = lambda field: f"obj.{field}"
+        source = "\n".join([
+            "def to_dict(obj):",
+            "    d = obj.__dict__",
+            "    if _columns <= d.keys():",
+            f"        return {items(fast, True)}",
+            f"    return {items(slow, True)}",
+            "def native(obj):",
+            "    d = obj.__dict__",
+            "    if _columns <= d.keys():",
+            f"        return {items(fast, False)}",
+            f"    return {items(slow, False)}",
+            "def many(rows):",
+            "    out = []",
+            "    append = out.append",
+            "    for obj in rows:",
+            "        d = obj.__dict__",
+            "        if _columns <= d.keys():",
+            f"            append({items(fast, False)})",
+            "        else:",
+            "            append(native(obj))",
+            "    return out",
+            ""
+        ])
+        namespace = {'_columns': frozenset(field for field in self.fields if field in mapped)}
+        exec(compile(source, f"<serializer {self.model.__name__}>", 'exec'), namespace)
+        self._functions = (namespace['to_dict'], namespace['native'], namespace['many'])
+        return self._functions
+
+    def to_dict(self, obj):
+        return (self._functions or self._compile())[0](obj)
+
+    def native(self, obj):
+        return (self._functions or self._compile())[1](obj)
+
+    def many(self, rows):
+        return (self._functions or self._compile())[2](rows)
+
+
+@lru_cache(maxsize=512)
+def serializer_for(model, fields=None):
+    """Serializer for model's serialize_fields, or the subset fields (from ?fields=)"""
+    if fields is None:
+        return ModelSerializer(model, model.serialize_fields)
+    return ModelSerializer(model, [field for field in model.serialize_fields if field in fields])
+
+
+class Serializable:
+    """Model mixin: to_dict() and dump() generated from serialize_fields"""
+
+    serialize_fields = ()
+    # Columns behind each property in serialize_fields, for ?fields= loading
+    serialize_depends = {}
+
+    def to_dict(self, fields=None):
+        return serializer_for(type(self), fields).to_dict(self)
+
+    @classmethod
+    def dump(cls, rows, fields=None):
+        """Response dicts for rows, for jsonify (dates are encoded by app.json)"""
+        return serializer_for(cls, fields).many(rows)
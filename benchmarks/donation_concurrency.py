@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Concurrency check for POST /api/fundraisers/<id>/donate.
+
+    python benchmarks/donation_concurrency.py [--donations 2000] [--concurrency 64]
+    python benchmarks/donation_concurrency.py --group-commit --replay-rate 0.2
+    DATABASE_URL=postgresql://... python benchmarks/donation_concurrency.py
+
+Fires many donations at one fundraiser in parallel against the backend,
+started in-process on DATABASE_URL (a throwaway SQLite file by default),
+then checks that current_amount equals the sum of the recorded donations,
+that the fundraiser completed exactly when the target was crossed, and
+that no donation was accepted after that. Each donation carries an
+Idempotency-Key; --replay-rate resends that fraction as client retries,
+which must be answered from the idempotency store without a second
+donation. Exits non-zero on a mismatch.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import uuid
+from datetime import datetime, timedelta
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from requests.adapters import HTTPAdapter
+from benchmarks.payments_load import free_port, serve, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--donations', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--target', type=float, help='fundraiser target; default is 90%% of the expected total')
+    parser.add_argument('--group-commit', action='store_true', help='enable DONATION_GROUP_COMMIT')
+    parser.add_argument('--replay-rate', type=float, default=0.1, help='fraction of donations retried with the same key')
+    args = parser.parse_args()
+
+    if args.group_commit:
+        os.environ['DONATION_GROUP_COMMIT'] = 'true'
+
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'donations.db')}")
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    from app import create_app, db
+    from app.models import User, Fundraiser, Donation
+    app = create_app()
+
+    amounts = [random.randint(1, 500) for _ in range(args.donations)]
+    target = args.target or sum(amounts) * 0.9
+
+    with app.app_context():
+        owner = User(email=f"owner-{time.time_ns()}@kenfuse.test", phone='0700000000',
+                     first_name='Fund', last_name='Owner', subscription_plan='premium')
+        owner.set_password('Owner@123')
+        db.session.add(owner)
+        db.session.flush()
+        fundraiser = Fundraiser(user_id=owner.id, title='Concurrency check', description='Load',
+                                target_amount=target, end_date=datetime.utcnow() + timedelta(days=30),
+                                status='active', is_verified=True)
+        db.session.add(fundraiser)
+        db.session.commit()
+        fundraiser_id = fundraiser.id
+
+    url = f"{serve(app, free_port())}/api/fundraisers/{fundraiser_id}/donate"
+    http = requests.Session()
+    http.mount('http://', HTTPAdapter(pool_maxsize=args.concurrency))
+
+    def donate(amount):
+        body = {
+            'amount': amount,
+            'donor_name': 'Load Donor',
+            'donor_phone': '0712345678',
+            'payment_method': 'mpesa'
+        }
+        headers = {'Idempotency-Key': str(uuid.uuid4())}
+        started = time.perf_counter()
+        response = http.post(url, json=body, headers=headers, timeout=120)
+        latency = time.perf_counter() - started
+
+        replay = None
+        if random.random() < args.replay_rate:
+            retried = http.post(url, json=body, headers=headers, timeout=120)
+            replay = (retried.status_code, retried.headers.get('Idempotent-Replayed') == 'true',
+                      retried.json().get('transaction_id') == response.json().get('transaction_id'))
+        return response.status_code, latency, replay
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(donate, amounts))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for status, _, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(latency * 1000 for _, latency, _ in results)
+    replays = [(status, replay) for status, _, replay in results if replay is not None]
+    bad_replays = [
+        replay for status, replay in replays
+        if status == 201 and not (replay[0] == 201 and replay[1] and replay[2])
+    ]
+
+    with app.app_context():
+        fundraiser = Fundraiser.query.get(fundraiser_id)
+        donations = Donation.query.filter_by(fundraiser_id=fundraiser_id).order_by(Donation.created_at).all()
+        recorded = sum(donation.amount for donation in donations)
+        before_last = recorded - donations[-1].amount if donations else 0
+
+        print(f"{len(results)} donations in {elapsed:.2f}s ({len(results) / elapsed:.0f}/s), "
+              f"p50 {percentile(latencies, 50):.1f}ms p99 {percentile(latencies, 99):.1f}ms")
+        print(f"responses: {statuses}, retried with the same key: {len(replays)}")
+        print(f"current_amount {fundraiser.current_amount:.2f}, sum of donations {recorded:.2f}, "
+              f"target {fundraiser.target_amount:.2f}, status {fundraiser.status}")
+
+        errors = []
+        if statuses.get(201, 0) != len(donations):
+            errors.append(f"{statuses.get(201, 0)} donations accepted but {len(donations)} recorded")
+        if abs(fundraiser.current_amount - recorded) > 1e-6:
+            errors.append('current_amount does not match the recorded donations (lost update)')
+        if (fundraiser.status == 'completed') != (recorded >= fundraiser.target_amount):
+            errors.append('status does not match whether the target was reached')
+        if fundraiser.status == 'completed' and before_last >= fundraiser.target_amount:
+            errors.append('donations were accepted after the target was reached')
+        if bad_replays:
+            errors.append(f"{len(bad_replays)} retries were not answered with the original donation")
+        if set(statuses) - {201, 400}:
+            errors.append('unexpected response codes')
+
+    if errors:
+        print('FAIL: ' + '; '.join(errors))
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
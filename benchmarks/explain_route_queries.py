@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Query plan check for the filters used by app/routes/*.py.
+
+    python benchmarks/explain_route_queries.py
+    DATABASE_URL=postgresql://... python benchmarks/explain_route_queries.py
+
+Builds each listing/lookup query the routes run and prints its plan. On
+SQLite that is EXPLAIN QUERY PLAN, and a bare "SCAN <table>" (no index)
+fails the check. On PostgreSQL it is EXPLAIN with enable_seqscan off, so a
+"Seq Scan" only appears when no index can serve the query at all. Sorts
+the index cannot provide are reported but do not fail the check. Exits
+non-zero if any query falls back to a full table scan.
+
+Uses a throwaway SQLite database unless DATABASE_URL is set; with an
+existing database run `flask db upgrade` first so the indexes exist.
+"""
+
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def route_queries(db, models):
+    """(label, select) pairs mirroring the queries in app/routes/*.py"""
+    User, Will, Memorial, Fundraiser, Donation, Payment, VendorProfile, VendorService, MpesaCallback = models
+    now = datetime.utcnow()
+    user_id = '00000000-0000-0000-0000-000000000000'
+    cursor_fundraiser = db.tuple_(Fundraiser.created_at, Fundraiser.id) < db.tuple_(now, user_id)
+    cursor_user = db.tuple_(User.created_at, User.id) < db.tuple_(now, user_id)
+    cursor_vendor = db.tuple_(VendorProfile.rating, VendorProfile.id) < db.tuple_(4.5, user_id)
+
+    active = db.select(Fundraiser).where(
+        Fundraiser.status == 'active', Fundraiser.end_date > now, Fundraiser.is_verified == True
+    )
+    marketplace = db.select(VendorProfile).where(VendorProfile.status == 'verified', VendorProfile.is_featured == True)
+
+    return [
+        ('auth: login by email',
+         db.select(User).where(User.email == 'someone@kenfuse.test').limit(1)),
+        ('fundraisers: active listing',
+         active.order_by(Fundraiser.created_at.desc()).limit(10).offset(20)),
+        ('fundraisers: active listing, cursor',
+         active.where(cursor_fundraiser)
+         .order_by(Fundraiser.created_at.desc(), Fundraiser.id.desc()).limit(11)),
+        ('fundraisers: status=completed listing',
+         db.select(Fundraiser).where(Fundraiser.status == 'completed', Fundraiser.is_verified == True)
+         .order_by(Fundraiser.created_at.desc()).limit(10)),
+        ('fundraisers: status=all listing',
+         db.select(Fundraiser).where(Fundraiser.is_verified == True)
+         .order_by(Fundraiser.created_at.desc()).limit(10)),
+        ('fundraisers: recent donations',
+         db.select(Donation).where(Donation.fundraiser_id == user_id)
+         .order_by(Donation.created_at.desc()).limit(10)),
+        ('fundraisers: user fundraisers',
+         db.select(Fundraiser).where(Fundraiser.user_id == user_id)),
+        ('fundraisers: expiry sweep',
+         db.select(Fundraiser.id).where(Fundraiser.status == 'active', Fundraiser.end_date <= now)
+         .order_by(Fundraiser.end_date).limit(500)),
+        ('wills: user wills',
+         db.select(Will).where(Will.user_id == user_id)),
+        ('memorials: user memorials',
+         db.select(Memorial).where(Memorial.user_id == user_id)),
+        ('vendors: marketplace',
+         marketplace.order_by(VendorProfile.rating.desc()).limit(12)),
+        ('vendors: marketplace, category and county',
+         marketplace.where(VendorProfile.category == 'funeral_home', VendorProfile.county == 'Nairobi')
+         .order_by(VendorProfile.rating.desc()).limit(12)),
+        ('vendors: marketplace, county only',
+         marketplace.where(VendorProfile.county == 'Nairobi')
+         .order_by(VendorProfile.rating.desc()).limit(12)),
+        ('vendors: marketplace, cursor',
+         marketplace.where(cursor_vendor)
+         .order_by(VendorProfile.rating.desc(), VendorProfile.id.desc()).limit(13)),
+        ('vendors: available services',
+         db.select(VendorService).where(VendorService.vendor_id == user_id, VendorService.is_available == True)),
+        ('vendors: profile by user',
+         db.select(VendorProfile).where(VendorProfile.user_id == user_id).limit(1)),
+        ('payments: by transaction ids',
+         db.select(Payment).where(Payment.transaction_id.in_(['ws_CO_1', 'ws_CO_2']))),
+        ('payments: pending callbacks',
+         db.select(MpesaCallback.id).where(MpesaCallback.status == 'pending')
+         .order_by(MpesaCallback.received_at).limit(100)),
+        ('admin: recent payments',
+         db.select(Payment).order_by(Payment.created_at.desc()).limit(10)),
+        ('admin: pending vendors',
+         db.select(VendorProfile).where(VendorProfile.status == 'pending')),
+        ('admin: unverified fundraisers',
+         db.select(Fundraiser).where(Fundraiser.is_verified == False)),
+        ('admin: users',
+         db.select(User).order_by(User.created_at.desc()).limit(20).offset(40)),
+        ('admin: users by role',
+         db.select(User).where(User.role == 'vendor').order_by(User.created_at.desc()).limit(20)),
+        ('admin: users, cursor',
+         db.select(User).where(User.role == 'vendor', cursor_user)
+         .order_by(User.created_at.desc(), User.id.desc()).limit(21)),
+    ]
+
+
+def explain(db, statement):
+    """Return (plan lines, full scans, unindexed sorts) for statement"""
+    compiled = str(statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    dialect = db.engine.dialect.name
+
+    if dialect == 'sqlite':
+        lines = [row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {compiled}"))]
+        scans = [line for line in lines if re.match(r'SCAN \w+$', line)]
+        sorts = [line for line in lines if 'TEMP B-TREE' in line]
+    else:
+        db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+        lines = [row[0] for row in db.session.execute(db.text(f"EXPLAIN {compiled}"))]
+        scans = [line.strip() for line in lines if 'Seq Scan' in line]
+        sorts = [line.strip() for line in lines if line.strip().startswith('->  Sort') or line.startswith('Sort')]
+    return lines, scans, sorts
+
+
+def main():
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'explain.db')}")
+    os.environ['FUNDRAISER_SWEEPER'] = 'false'
+    os.environ['MPESA_CALLBACK_CONSUMER'] = 'false'
+
+    from app import create_app, db
+    from app.models import (User, Will, Memorial, Fundraiser, Donation, Payment,
+                            VendorProfile, VendorService, MpesaCallback)
+
+    app = create_app()
+    failures = []
+    with app.app_context():
+        models = (User, Will, Memorial, Fundraiser, Donation, Payment, VendorProfile, VendorService, MpesaCallback)
+        for label, statement in route_queries(db, models):
+            lines, scans, sorts = explain(db, statement)
+            db.session.rollback()
+
+            verdict = 'FULL SCAN' if scans else ('sort' if sorts else 'ok')
+            print(f"{verdict:>9}  {label}")
+            for line in lines:
+                print(f"           {line}")
+            if scans:
+                failures.append(label)
+
+    if failures:
+        print(f"\nFAIL: {len(failures)} queries scan the whole table: {', '.join(failures)}")
+        sys.exit(1)
+    print('\nOK: every route query is served by an index')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of the fundraiser expiry sweep against table size.
+
+    python benchmarks/fundraiser_sweep_bench.py [--rows 1000000] [--expiring 0,100,1000,10000]
+
+Fills a throwaway SQLite database (or DATABASE_URL) with --rows active
+fundraisers ending in the future, then for each --expiring count moves
+that many end dates into the past and times FundraiserSweeper.sweep().
+Because the sweep range-scans ix_fundraisers_status_end_date, time per
+expired row should stay flat and an empty sweep should cost about the
+same at 100k rows as at 1M; rerun with a different --rows to compare.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--expiring', default='0,100,1000,10000')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'sweep.db')}")
+    os.environ['FUNDRAISER_SWEEPER'] = 'false'
+    os.environ['MPESA_CALLBACK_CONSUMER'] = 'false'
+
+    from app import create_app, db
+    from app.models import User, Fundraiser, FundraiserStatusChange
+    from app.services.fundraiser_sweeper import FundraiserSweeper
+
+    app = create_app()
+    with app.app_context():
+        owner = User(email=f"sweep-{time.time_ns()}@kenfuse.test", phone='0700000000',
+                     first_name='Sweep', last_name='Bench', password_hash='x')
+        db.session.add(owner)
+        db.session.commit()
+
+        print(f"inserting {args.rows} fundraisers...")
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        chunk = 50000
+        for offset in range(0, args.rows, chunk):
+            db.session.execute(db.insert(Fundraiser), [
+                {
+                    'id': str(uuid.uuid4()),
+                    'user_id': owner.id,
+                    'title': f"Fundraiser {offset + i}",
+                    'description': 'Benchmark',
+                    'target_amount': 100000.0,
+                    'current_amount': 0.0,
+                    'status': 'active',
+                    'end_date': now + timedelta(days=random.randint(1, 365)),
+                    'is_verified': True,
+                    'created_at': now,
+                    'updated_at': now
+                }
+                for i in range(min(chunk, args.rows - offset))
+            ])
+            db.session.commit()
+        print(f"  done in {time.perf_counter() - started:.1f}s")
+
+        plan_sql = db.select(Fundraiser.id)\
+            .where(Fundraiser.status == 'active', Fundraiser.end_date <= now)\
+            .order_by(Fundraiser.end_date).limit(args.batch_size)
+        compiled = plan_sql.compile(db.engine, compile_kwargs={'literal_binds': True})
+        if db.engine.dialect.name == 'sqlite':
+            plan = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+            print('query plan:', '; '.join(row[-1] for row in plan))
+
+        sweeper = FundraiserSweeper(batch_size=args.batch_size)
+        print(f"\n{'expiring':>9} {'sweep ms':>10} {'expired':>8} {'us/row':>8}")
+        for expiring in [int(n) for n in args.expiring.split(',')]:
+            if expiring:
+                ids = db.session.execute(
+                    db.select(Fundraiser.id).where(Fundraiser.status == 'active').limit(expiring)
+                ).scalars().all()
+                db.session.execute(
+                    db.update(Fundraiser).where(Fundraiser.id.in_(ids)).values(end_date=now - timedelta(hours=1))
+                )
+                db.session.commit()
+
+            started = time.perf_counter()
+            expired = sweeper.sweep(now)
+            elapsed = time.perf_counter() - started
+            per_row = f"{elapsed / expired * 1e6:>8.1f}" if expired else f"{'-':>8}"
+            print(f"{expiring:>9} {elapsed * 1000:>10.2f} {expired:>8} {per_row}")
+
+        transitions = db.session.query(FundraiserStatusChange).count()
+        print(f"\n{transitions} status changes recorded")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: POST /api/auth/login throughput per core under a login spike.
+
+    python benchmarks/login_throughput.py [--concurrency 64] [--duration 20] [--rounds 12]
+    python benchmarks/login_throughput.py --workers 2 --max-pending 16
+
+Starts the backend in-process on a throwaway SQLite database (or
+DATABASE_URL), creates --users accounts and has --concurrency clients log
+in back to back for --duration seconds. Reports successful logins per
+second and per core, latency of successful logins, and how many requests
+were shed with 503 + Retry-After by the hashing pool. Logins per core
+should stay close to 1 / (bcrypt time at --rounds) however high the
+concurrency goes; extra load turns into 503s rather than longer queues.
+Meanwhile a probe thread times GET / to show that other requests on the
+same worker are still served promptly.
+"""
+
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from requests.adapters import HTTPAdapter
+from benchmarks.payments_load import free_port, serve, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--rounds', type=int, help='BCRYPT_LOG_ROUNDS (default from config)')
+    parser.add_argument('--workers', type=int, help='PASSWORD_HASH_WORKERS')
+    parser.add_argument('--max-pending', type=int, help='PASSWORD_HASH_MAX_PENDING')
+    args = parser.parse_args()
+
+    if args.rounds:
+        os.environ['BCRYPT_LOG_ROUNDS'] = str(args.rounds)
+    if args.workers:
+        os.environ['PASSWORD_HASH_WORKERS'] = str(args.workers)
+    if args.max_pending:
+        os.environ['PASSWORD_HASH_MAX_PENDING'] = str(args.max_pending)
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'login.db')}")
+    os.environ['FUNDRAISER_SWEEPER'] = 'false'
+    os.environ['MPESA_CALLBACK_CONSUMER'] = 'false'
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    from app import create_app, db
+    from app.config import Config
+    from app.models import User
+    from app.services.password_hasher import password_hasher
+
+    app = create_app()
+    password = 'Spike@123'
+    emails = [f"spike-{i}-{time.time_ns()}@kenfuse.test" for i in range(args.users)]
+    with app.app_context():
+        for email in emails:
+            user = User(email=email, phone='0700000000', first_name='Login', last_name='Spike')
+            user.set_password(password)
+            db.session.add(user)
+        db.session.commit()
+
+    base_url = serve(app, free_port())
+    http = requests.Session()
+    http.mount('http://', HTTPAdapter(pool_maxsize=args.concurrency + 1))
+
+    statuses = Counter()
+    latencies = []
+    retry_after = Counter()
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def client(n):
+        email = emails[n % len(emails)]
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = http.post(f"{base_url}/api/auth/login", json={'email': email, 'password': password}, timeout=120)
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[response.status_code] += 1
+                if response.status_code == 200:
+                    latencies.append(elapsed * 1000)
+                elif response.status_code == 503:
+                    retry_after[response.headers.get('Retry-After')] += 1
+            if response.status_code == 503:
+                # Honour Retry-After loosely so shed clients keep pressure on
+                time.sleep(min(float(response.headers.get('Retry-After', 1)), 0.5))
+
+    probe = []
+
+    def probe_other_requests():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            http.get(f"{base_url}/api/auth/test", timeout=120)
+            probe.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.1)
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    print(f"{args.concurrency} clients for {args.duration:.0f}s, bcrypt rounds {Config.BCRYPT_LOG_ROUNDS}, "
+          f"{password_hasher.workers} hash workers, {cores} cores")
+
+    started = time.perf_counter()
+    prober = threading.Thread(target=probe_other_requests, daemon=True)
+    prober.start()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(client, range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    prober.join()
+
+    latencies.sort()
+    probe.sort()
+    rate = statuses[200] / elapsed
+    print(f"logins: {statuses[200]} ok in {elapsed:.1f}s = {rate:.1f}/s, {rate / cores:.1f}/s per core")
+    print(f"responses: {dict(statuses)}, Retry-After values: {dict(retry_after)}")
+    if latencies:
+        print(f"login latency p50 {percentile(latencies, 50):.0f}ms p99 {percentile(latencies, 99):.0f}ms")
+    if probe:
+        print(f"other requests during the spike: p50 {percentile(probe, 50):.1f}ms p99 {percentile(probe, 99):.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
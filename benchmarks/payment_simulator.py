@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Daraja (M-Pesa) and Stripe APIs used by app/routes/payments.py.
+
+    python benchmarks/payment_simulator.py --port 8090 --latency-ms 150 --failure-rate 0.01
+
+Point the backend at it with:
+
+    MPESA_BASE_URL=http://127.0.0.1:8090
+    STRIPE_API_BASE=http://127.0.0.1:8090
+    STRIPE_SECRET_KEY=sk_test_simulator
+    MPESA_CALLBACK_URL=http://127.0.0.1:5000/api/payments/mpesa/callback
+
+STK pushes are answered straight away and the result callback is POSTed to
+the CallBackURL from the request after --callback-delay-ms, like Daraja.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+import requests
+from flask import Flask, request, jsonify
+
+
+class CallbackScheduler:
+    """Delivers STK callbacks once they are due, on a small sender pool"""
+
+    def __init__(self, senders=8):
+        self.pool = ThreadPoolExecutor(max_workers=senders)
+        self.http = requests.Session()
+        self.sent = 0
+        self.failed = 0
+        self._queue = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, name='stk-callbacks', daemon=True).start()
+
+    def schedule(self, delay, url, payload):
+        with self._condition:
+            heapq.heappush(self._queue, (time.monotonic() + delay, next(self._order), url, payload))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    timeout = self._queue[0][0] - time.monotonic() if self._queue else None
+                    self._condition.wait(timeout)
+                _, _, url, payload = heapq.heappop(self._queue)
+            self.pool.submit(self._send, url, payload)
+
+    def _send(self, url, payload):
+        try:
+            self.http.post(url, json=payload, timeout=10)
+            self.sent += 1
+        except requests.RequestException:
+            self.failed += 1
+
+
+def create_simulator(latency_ms=100, jitter_ms=50, failure_rate=0.0, callback_delay_ms=500,
+                     cancel_rate=0.1, duplicate_rate=0.05, token_ttl=3599):
+    """Flask app emulating Daraja OAuth/STK push and Stripe PaymentIntents"""
+    app = Flask(__name__)
+    callbacks = CallbackScheduler()
+    tokens = set()
+    stats = {'oauth': 0, 'stkpush': 0, 'payment_intents': 0, 'injected_failures': 0}
+
+    def delay():
+        time.sleep(max(0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+    def should_fail():
+        if random.random() < failure_rate:
+            stats['injected_failures'] += 1
+            return True
+        return False
+
+    # Daraja
+    @app.route('/oauth/v1/generate', methods=['GET'])
+    def oauth():
+        stats['oauth'] += 1
+        delay()
+        if should_fail():
+            return jsonify({'errorCode': '500.001.1001', 'errorMessage': 'Simulated failure'}), 503
+        if not request.headers.get('Authorization', '').startswith('Basic '):
+            return jsonify({'errorCode': '400.008.01', 'errorMessage': 'Invalid Authentication passed'}), 400
+
+        token = uuid.uuid4().hex
+        tokens.add(token)
+        return jsonify({'access_token': token, 'expires_in': str(token_ttl)})
+
+    @app.route('/mpesa/stkpush/v1/processrequest', methods=['POST'])
+    def stk_push():
+        stats['stkpush'] += 1
+        delay()
+        if request.headers.get('Authorization', '')[len('Bearer '):] not in tokens:
+            return jsonify({'errorCode': '404.001.03', 'errorMessage': 'Invalid Access Token'}), 401
+        if should_fail():
+            return jsonify({'errorCode': '500.001.1001', 'errorMessage': 'Simulated failure'}), 503
+
+        data = request.get_json()
+        checkout_request_id = f"ws_CO_{datetime.now().strftime('%d%m%Y%H%M%S')}{uuid.uuid4().hex[:12]}"
+        merchant_request_id = f"{random.randint(10000, 99999)}-{random.randint(1000000, 9999999)}-1"
+
+        if random.random() < cancel_rate:
+            callback = {'ResultCode': 1032, 'ResultDesc': 'Request cancelled by user'}
+        else:
+            callback = {
+                'ResultCode': 0,
+                'ResultDesc': 'The service request is processed successfully.',
+                'CallbackMetadata': {'Item': [
+                    {'Name': 'Amount', 'Value': data.get('Amount')},
+                    {'Name': 'MpesaReceiptNumber', 'Value': uuid.uuid4().hex[:10].upper()},
+                    {'Name': 'TransactionDate', 'Value': int(datetime.now().strftime('%Y%m%d%H%M%S'))},
+                    {'Name': 'PhoneNumber', 'Value': data.get('PhoneNumber')}
+                ]}
+            }
+        callback.update({'MerchantRequestID': merchant_request_id, 'CheckoutRequestID': checkout_request_id})
+        payload = {'Body': {'stkCallback': callback}}
+
+        if data.get('CallBackURL'):
+            callbacks.schedule(callback_delay_ms / 1000, data['CallBackURL'], payload)
+            # Daraja sometimes delivers the same callback more than once
+            if random.random() < duplicate_rate:
+                callbacks.schedule(callback_delay_ms * 2 / 1000, data['CallBackURL'], payload)
+
+        return jsonify({
+            'MerchantRequestID': merchant_request_id,
+            'CheckoutRequestID': checkout_request_id,
+            'ResponseCode': '0',
+            'ResponseDescription': 'Success. Request accepted for processing',
+            'CustomerMessage': 'Success. Request accepted for processing'
+        })
+
+    # Stripe
+    @app.route('/v1/payment_intents', methods=['POST'])
+    def create_payment_intent():
+        stats['payment_intents'] += 1
+        delay()
+        if not request.headers.get('Authorization', '').startswith('Bearer sk_'):
+            return jsonify({'error': {'type': 'invalid_request_error', 'message': 'Invalid API Key provided'}}), 401
+        if should_fail():
+            return jsonify({'error': {'type': 'api_error', 'message': 'Simulated failure'}}), 500
+
+        form = request.form
+        intent_id = f"pi_{uuid.uuid4().hex[:24]}"
+        metadata = {
+            key[len('metadata['):-1]: value
+            for key, value in form.items() if key.startswith('metadata[')
+        }
+        return jsonify({
+            'id': intent_id,
+            'object': 'payment_intent',
+            'amount': int(form.get('amount', 0)),
+            'currency': form.get('currency', 'kes'),
+            'client_secret': f"{intent_id}_secret_{uuid.uuid4().hex[:24]}",
+            'status': 'requires_payment_method',
+            'livemode': False,
+            'metadata': metadata,
+            'created': int(time.time())
+        })
+
+    @app.route('/_stats', methods=['GET'])
+    def simulator_stats():
+        return jsonify(dict(stats, callbacks_sent=callbacks.sent, callbacks_failed=callbacks.failed))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of calls answered with a 5xx')
+    parser.add_argument('--callback-delay-ms', type=float, default=500)
+    parser.add_argument('--cancel-rate', type=float, default=0.1, help='fraction of STK pushes the customer cancels')
+    parser.add_argument('--duplicate-rate', type=float, default=0.05, help='fraction of callbacks delivered twice')
+    args = parser.parse_args()
+
+    app = create_simulator(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        callback_delay_ms=args.callback_delay_ms,
+        cancel_rate=args.cancel_rate,
+        duplicate_rate=args.duplicate_rate
+    )
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Load test for the payment endpoints: throughput and p50/p95/p99 latency.
+
+    python benchmarks/payments_load.py --scenario mix --rps 50 --duration 30
+
+With no --app-url the payment simulator and the backend are started in this
+process on a throwaway SQLite database, with MPESA_* and STRIPE_* pointing
+at the simulator. To measure a real deployment, start
+benchmarks/payment_simulator.py, point the backend's MPESA_BASE_URL,
+STRIPE_API_BASE and MPESA_CALLBACK_URL at it, and pass --app-url.
+
+An upgrade revokes the caller's tokens, so upgrades run as their own pool
+of --upgrade-users accounts. Each account is used by one request at a time
+and continues with the access_token its upgrade returned. Every other
+request shares one account whose token is never revoked.
+
+Requests are sent open-loop at a fixed rate and latency is measured from
+the moment each request was due, so a backed-up server shows up as
+latency instead of silently lowering the offered load.
+"""
+
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import queue
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve(app, port):
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{port}"
+
+
+def start_local_stack(args):
+    """Run the simulator and the backend in-process; returns (app_url, simulator_url)"""
+    from benchmarks.payment_simulator import create_simulator
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    simulator_url = serve(create_simulator(
+        latency_ms=args.provider_latency_ms,
+        jitter_ms=args.provider_latency_ms / 3,
+        failure_rate=args.failure_rate,
+        callback_delay_ms=args.callback_delay_ms
+    ), free_port())
+
+    app_port = free_port()
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'payments_load.db')}",
+        'MPESA_BASE_URL': simulator_url,
+        'MPESA_CONSUMER_KEY': 'simulator',
+        'MPESA_CONSUMER_SECRET': 'simulator',
+        'MPESA_SHORTCODE': '174379',
+        'MPESA_PASSKEY': 'simulator',
+        'MPESA_CALLBACK_URL': f"http://127.0.0.1:{app_port}/api/payments/mpesa/callback",
+        'STRIPE_API_BASE': simulator_url,
+        'STRIPE_SECRET_KEY': 'sk_test_simulator'
+    })
+
+    from app import create_app
+    return serve(create_app(), app_port), simulator_url
+
+
+def login(http, app_url):
+    email = f"load-{uuid.uuid4().hex[:8]}@kenfuse.test"
+    response = http.post(f"{app_url}/api/auth/register", json={
+        'email': email,
+        'password': 'LoadTest@123',
+        'phone': '0712345678',
+        'first_name': 'Load',
+        'last_name': 'Test'
+    })
+    response.raise_for_status()
+    return response.json()['access_token']
+
+
+def fake_callback():
+    """A callback for an unknown CheckoutRequestID, as Daraja would send it"""
+    return {'Body': {'stkCallback': {
+        'MerchantRequestID': f"{random.randint(10000, 99999)}-1",
+        'CheckoutRequestID': f"ws_CO_load_{uuid.uuid4().hex[:16]}",
+        'ResultCode': 0,
+        'ResultDesc': 'The service request is processed successfully.',
+        'CallbackMetadata': {'Item': [{'Name': 'MpesaReceiptNumber', 'Value': uuid.uuid4().hex[:10].upper()}]}
+    }}}
+
+
+SCENARIOS = {
+    'mpesa': lambda: ('POST', '/api/payments/mpesa', {'amount': 100, 'phone': '0712345678', 'description': 'Load test'}, True),
+    'card': lambda: ('POST', '/api/payments/card', {'amount': 100, 'description': 'Load test'}, True),
+    'upgrade': lambda: ('POST', '/api/payments/subscription/upgrade', {
+        'plan': 'standard',
+        'payment_method': random.choice(['mpesa', 'card']),
+        'phone': '254712345678'
+    }, True),
+    'callback': lambda: ('POST', '/api/payments/mpesa/callback', fake_callback(), False)
+}
+MIX = ['mpesa'] * 4 + ['card'] * 2 + ['upgrade'] + ['callback'] * 3
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run(app_url, token, upgrade_tokens, scenario, rps, duration, concurrency):
+    http = requests.Session()
+    http.mount('http://', HTTPAdapter(pool_maxsize=concurrency))
+    results = []
+    lock = threading.Lock()
+    upgraders = queue.Queue()
+    for upgrade_token in upgrade_tokens:
+        upgraders.put(upgrade_token)
+
+    def fire(name, due):
+        method, path, body, authenticated = SCENARIOS[name]()
+        caller_token = upgraders.get() if name == 'upgrade' else token
+        try:
+            response = http.request(method, app_url + path, json=body, timeout=60,
+                                    headers={'Authorization': f"Bearer {caller_token}"} if authenticated else None)
+            status = response.status_code
+            if name == 'upgrade' and status == 200:
+                # An applied upgrade revokes the token it was made with; card upgrades only return an intent
+                caller_token = response.json().get('access_token', caller_token)
+        except requests.RequestException as e:
+            status = type(e).__name__
+        finally:
+            if name == 'upgrade':
+                upgraders.put(caller_token)
+        with lock:
+            results.append((name, status, time.perf_counter() - due))
+
+    total = int(rps * duration)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            due = start + i / rps
+            pause = due - time.perf_counter()
+            if pause > 0:
+                time.sleep(pause)
+            name = random.choice(MIX) if scenario == 'mix' else scenario
+            pool.submit(fire, name, due)
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def report(results, elapsed, rps):
+    print(f"{'endpoint':<10} {'requests':>9} {'ok':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    names = sorted({name for name, _, _ in results}) + ['all']
+    for name in names:
+        rows = [r for r in results if name == 'all' or r[0] == name]
+        latencies = sorted(latency * 1000 for _, _, latency in rows)
+        ok = sum(1 for _, status, _ in rows if isinstance(status, int) and status < 400)
+        print(f"{name:<10} {len(rows):>9} {ok:>7} {len(rows) / elapsed:>8.1f} "
+              f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 95):>9.1f} "
+              f"{percentile(latencies, 99):>9.1f} {latencies[-1] if latencies else 0:>9.1f}")
+
+    print(f"\ntarget {rps} rps, achieved {len(results) / elapsed:.1f} rps over {elapsed:.1f}s")
+    failures = Counter(status for _, status, _ in results if not (isinstance(status, int) and status < 400))
+    if failures:
+        print('failures:', ', '.join(f"{status} x{count}" for status, count in failures.most_common()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app-url', help='backend to test; default starts one in-process')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS) + ['mix'], default='mix')
+    parser.add_argument('--rps', type=float, default=20)
+    parser.add_argument('--duration', type=float, default=10, help='seconds')
+    parser.add_argument('--concurrency', type=int, default=64, help='maximum requests in flight')
+    parser.add_argument('--upgrade-users', type=int, default=8, help='accounts upgrading concurrently')
+    parser.add_argument('--provider-latency-ms', type=float, default=100, help='in-process simulator only')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='in-process simulator only')
+    parser.add_argument('--callback-delay-ms', type=float, default=500, help='in-process simulator only')
+    args = parser.parse_args()
+
+    simulator_url = None
+    app_url = args.app_url
+    if not app_url:
+        app_url, simulator_url = start_local_stack(args)
+
+    http = requests.Session()
+    token = login(http, app_url)
+    upgrade_tokens = [login(http, app_url) for _ in range(args.upgrade_users)] \
+        if args.scenario in ('upgrade', 'mix') else []
+    results, elapsed = run(app_url, token, upgrade_tokens, args.scenario, args.rps, args.duration, args.concurrency)
+    report(results, elapsed, args.rps)
+
+    if simulator_url:
+        print('simulator:', requests.get(f"{simulator_url}/_stats").json())
+
+
+if __name__ == '__main__':
+    main()
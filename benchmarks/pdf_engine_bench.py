@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pages/second of the shared PDFEngine vs the original FPDF path.
+
+    python benchmarks/pdf_engine_bench.py [--iterations 200] [--paragraphs 40]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpdf import FPDF
+from app.utils.pdf_engine import pdf_engine
+
+
+class WillPDF(FPDF):
+    def header(self):
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 10, 'KENFUSE - End of Life Planning Platform', 0, 1, 'C')
+        self.ln(5)
+    
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+
+def legacy_generate_will_pdf(will, user):
+    """The original inline FPDF generator from app/routes/wills.py"""
+    from datetime import datetime
+    
+    pdf = WillPDF()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    
+    # Title
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, 'LAST WILL AND TESTAMENT', 0, 1, 'C')
+    pdf.ln(5)
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(10)
+    
+    # Testator Information
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'TESTATOR INFORMATION', 0, 1)
+    pdf.set_font('Arial', '', 11)
+    pdf.cell(0, 8, f"Name: {user.first_name} {user.last_name}", 0, 1)
+    pdf.cell(0, 8, f"Email: {user.email}", 0, 1)
+    if user.phone:
+        pdf.cell(0, 8, f"Phone: {user.phone}", 0, 1)
+    pdf.ln(5)
+    
+    # Will Details
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'WILL DETAILS', 0, 1)
+    pdf.set_font('Arial', '', 11)
+    pdf.cell(0, 8, f"Title: {will.title}", 0, 1)
+    pdf.cell(0, 8, f"Created: {will.created_at.strftime('%d %B, %Y')}", 0, 1)
+    pdf.cell(0, 8, f"Status: {will.status.upper()}", 0, 1)
+    pdf.cell(0, 8, f"Document ID: {str(will.id)[:8].upper()}", 0, 1)
+    pdf.ln(10)
+    
+    # Declaration
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'DECLARATION', 0, 1)
+    pdf.set_font('Arial', '', 11)
+    declaration = (f"I, {user.first_name} {user.last_name}, being of sound mind and memory, "
+                   f"do hereby make, publish, and declare this to be my Last Will and Testament, "
+                   f"hereby revoking all former Wills and Codicils by me made.")
+    pdf.multi_cell(0, 8, declaration)
+    pdf.ln(10)
+    
+    # Will Content
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'WILL CONTENT', 0, 1)
+    pdf.set_font('Arial', '', 11)
+    pdf.multi_cell(0, 8, will.content or 'No content provided.')
+    pdf.ln(10)
+    
+    # Beneficiaries
+    if will.beneficiaries:
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'BENEFICIARIES', 0, 1)
+        pdf.set_font('Arial', '', 11)
+        for beneficiary in will.beneficiaries:
+            name = beneficiary.get('name', 'N/A')
+            relationship = beneficiary.get('relationship', 'N/A')
+            share = beneficiary.get('share', 'N/A')
+            pdf.cell(0, 8, f"- {name} ({relationship}): {share}", 0, 1)
+        pdf.ln(10)
+    
+    # Signatures
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'SIGNATURES', 0, 1)
+    pdf.ln(10)
+    
+    pdf.set_font('Arial', '', 11)
+    pdf.cell(0, 8, 'Testator:', 0, 1)
+    pdf.cell(0, 15, '_' * 50, 0, 1)
+    pdf.cell(0, 8, f"{user.first_name} {user.last_name}", 0, 1)
+    pdf.cell(0, 8, f"Date: _______________", 0, 1)
+    pdf.ln(15)
+    
+    pdf.cell(0, 8, 'Witness 1:', 0, 1)
+    pdf.cell(0, 15, '_' * 50, 0, 1)
+    pdf.cell(0, 8, 'Name: _________________________', 0, 1)
+    pdf.cell(0, 8, 'ID: ___________________________', 0, 1)
+    pdf.ln(15)
+    
+    pdf.cell(0, 8, 'Witness 2:', 0, 1)
+    pdf.cell(0, 15, '_' * 50, 0, 1)
+    pdf.cell(0, 8, 'Name: _________________________', 0, 1)
+    pdf.cell(0, 8, 'ID: ___________________________', 0, 1)
+    
+    # Footer info
+    pdf.set_y(-30)
+    pdf.set_font('Arial', 'I', 8)
+    pdf.cell(0, 5, f"Generated by KENFUSE on {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}", 0, 1, 'C')
+    pdf.cell(0, 5, f"Document ID: {will.id}", 0, 1, 'C')
+    
+    # Return PDF as bytes
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def count_pages(pdf_bytes):
+    return pdf_bytes.count(b'/Type /Page\n')
+
+
+def sample_will(paragraphs):
+    will = SimpleNamespace(
+        id='3f2b8c1e-0000-4000-8000-000000000000',
+        title='Last Will of Jane Wanjiku',
+        content='\n\n'.join(
+            f"{i + 1}. I give and bequeath my property at plot {i} in Kiambu county "
+            f"to my children in equal shares, to be held in trust until they attain "
+            f"the age of eighteen years." for i in range(paragraphs)
+        ),
+        status='final',
+        beneficiaries=[
+            {'name': f'Beneficiary {i}', 'relationship': 'child', 'share': '10%'}
+            for i in range(10)
+        ],
+        created_at=datetime(2024, 1, 15)
+    )
+    user = SimpleNamespace(
+        first_name='Jane', last_name='Wanjiku',
+        email='jane@example.com', phone='+254700000000'
+    )
+    return will, user
+
+
+def run(name, render, will, user, iterations):
+    render(will, user)  # warm up
+    pages = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pages += count_pages(render(will, user))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {iterations:>6} docs  {pages:>7} pages  "
+          f"{elapsed:8.3f}s  {pages / elapsed:10.1f} pages/s")
+    return pages / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--paragraphs', type=int, default=40)
+    args = parser.parse_args()
+
+    will, user = sample_will(args.paragraphs)
+    legacy = run('legacy', legacy_generate_will_pdf, will, user, args.iterations)
+    engine = run('engine', pdf_engine.render_will, will, user, args.iterations)
+    print(f"speedup: {engine / legacy:.2f}x")
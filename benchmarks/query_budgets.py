@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Query budget check for the busiest endpoints.
+
+    python benchmarks/query_budgets.py [--rows 25] [--verbose]
+
+Seeds a throwaway SQLite database (or DATABASE_URL) with fundraisers,
+donations, vendors with services, memorials and payments - --rows of each
+per parent so an N+1 load would show up as dozens of extra queries - then
+calls each endpoint in BUDGETS inside query_budget(). Prints the query
+count, DB time and any statement shape repeated QUERY_STATS_N_PLUS_ONE_THRESHOLD
+or more times, and exits non-zero if an endpoint runs more queries than
+its budget. The response cache is disabled so every call reaches the
+database; budgets include the token version check on authenticated routes.
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+import logging
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (label, method, path template, auth, query budget)
+BUDGETS = [
+    ('auth: me', 'GET', '/api/auth/me', 'user', 2),
+    ('fundraisers: listing', 'GET', '/api/fundraisers/?per_page=20', None, 2),
+    ('fundraisers: listing, cursor', 'GET', '/api/fundraisers/?per_page=20&cursor=', None, 2),
+    ('fundraisers: detail', 'GET', '/api/fundraisers/{fundraiser_id}', None, 2),
+    ('fundraisers: user', 'GET', '/api/fundraisers/user', 'user', 2),
+    ('vendors: marketplace', 'GET', '/api/vendors/marketplace?per_page=20', None, 2),
+    ('vendors: detail', 'GET', '/api/vendors/{vendor_id}', None, 2),
+    ('memorials: user', 'GET', '/api/memorials', 'user', 2),
+    ('memorials: detail', 'GET', '/api/memorials/{memorial_id}', 'user', 2),
+    ('search: memorials', 'GET', '/api/search/?q=memo&per_page=20', None, 2),
+    ('search: fundraisers', 'GET', '/api/search/?q=fundraiser&type=fundraisers&per_page=20', None, 2),
+    ('admin: dashboard', 'GET', '/api/admin/dashboard', 'admin', 7),
+    ('admin: users', 'GET', '/api/admin/users?per_page=20', 'admin', 3),
+    ('admin: pending vendors', 'GET', '/api/admin/vendors/pending', 'admin', 2),
+    ('admin: pending fundraisers', 'GET', '/api/admin/fundraisers/pending', 'admin', 2),
+]
+
+
+def seed(db, rows):
+    from app.models import User, Fundraiser, Donation, VendorProfile, VendorService, Memorial, Payment
+
+    stamp = time.time_ns()
+    admin = User(email=f"admin-{stamp}@kenfuse.test", phone='0700000000', first_name='Query', last_name='Admin',
+                 role='admin', subscription_plan='premium')
+    user = User(email=f"owner-{stamp}@kenfuse.test", phone='0700000001', first_name='Query', last_name='Owner',
+                subscription_plan='premium')
+    for account in (admin, user):
+        account.set_password('Budget@123')
+        db.session.add(account)
+    db.session.flush()
+
+    fundraisers = []
+    for i in range(rows):
+        fundraiser = Fundraiser(user_id=user.id, title=f"Fundraiser {i}", description='Funeral costs',
+                                target_amount=100000, end_date=datetime.utcnow() + timedelta(days=30),
+                                is_verified=i % 2 == 0)
+        db.session.add(fundraiser)
+        fundraisers.append(fundraiser)
+    db.session.flush()
+    for i in range(rows):
+        db.session.add(Donation(fundraiser_id=fundraisers[0].id, amount=100 + i, payment_method='mpesa',
+                                transaction_id=f"QB{stamp}{i}", donor_name=f"Donor {i}", donor_phone='0711111111'))
+        db.session.add(Payment(user_id=user.id, amount=100 + i, payment_method='mpesa', description='Donation',
+                               transaction_id=f"QP{stamp}{i}", status='completed'))
+        db.session.add(Memorial(user_id=user.id, deceased_name=f"Memorial {i}", date_of_birth=date(1950, 1, 1),
+                                date_of_passing=date(2024, 1, 1)))
+
+    vendors = []
+    for i in range(rows):
+        owner = User(email=f"vendor-{stamp}-{i}@kenfuse.test", phone='0700000002', first_name='Vendor',
+                     last_name=str(i), role='vendor', password_hash='!')
+        db.session.add(owner)
+        db.session.flush()
+        vendor = VendorProfile(user_id=owner.id, business_name=f"Vendor {i}", business_registration=f"BR{i}",
+                               category='funeral_home', description='Services', years_in_operation=5,
+                               county='Nairobi', town='Nairobi', address='Moi Avenue', phone='0722222222',
+                               email=f"vendor{i}@kenfuse.test", status='verified' if i % 2 == 0 else 'pending',
+                               is_featured=True, rating=4.0 + i / 100)
+        db.session.add(vendor)
+        vendors.append(vendor)
+    db.session.flush()
+    for i in range(rows):
+        db.session.add(VendorService(vendor_id=vendors[0].id, name=f"Service {i}", description='Service',
+                                     price=5000, is_available=True))
+    db.session.commit()
+
+    memorial = Memorial.query.filter_by(user_id=user.id).first()
+    return admin, user, {'fundraiser_id': fundraisers[0].id, 'vendor_id': vendors[0].id, 'memorial_id': memorial.id}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=25, help='children seeded per parent')
+    parser.add_argument('--verbose', action='store_true', help='print every statement shape')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'budgets.db')}")
+    os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+    os.environ['FUNDRAISER_SWEEPER'] = 'false'
+    os.environ['MPESA_CALLBACK_CONSUMER'] = 'false'
+    logging.getLogger('app').setLevel(logging.ERROR)
+
+    from app import create_app, db
+    from app.services.auth_tokens import create_user_token
+    from app.services.query_stats import QueryBudgetExceeded, query_budget
+
+    app = create_app()
+    app.logger.setLevel(logging.ERROR)
+    with app.app_context():
+        admin, user, ids = seed(db, args.rows)
+        tokens = {'admin': create_user_token(admin), 'user': create_user_token(user)}
+
+    client = app.test_client()
+    over = []
+    print(f"{'endpoint':32} {'status':>6} {'queries':>8} {'budget':>7} {'db ms':>8}")
+    for label, method, path, auth, budget in BUDGETS:
+        headers = {'Authorization': f"Bearer {tokens[auth]}"} if auth else {}
+        # Warm the token version cache so the count is the steady state
+        client.open(path.format(**ids), method=method, headers=headers)
+        try:
+            with query_budget(budget) as stats:
+                response = client.open(path.format(**ids), method=method, headers=headers)
+            verdict = ''
+        except QueryBudgetExceeded:
+            over.append(label)
+            verdict = '  OVER BUDGET'
+        print(f"{label:32} {response.status_code:>6} {stats.count:>8} {budget:>7} {stats.total_time * 1000:>8.2f}{verdict}")
+
+        shapes = stats.shapes.most_common() if args.verbose or verdict else stats.repeated().items()
+        for shape, count in shapes:
+            print(f"    {count}x {shape[:160]}")
+
+    if over:
+        print(f"\n{len(over)} endpoint(s) over budget: {', '.join(over)}")
+        sys.exit(1)
+    print('\nAll endpoints within budget')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memorial search over --rows memorials, full-text index vs LIKE.
+
+    python benchmarks/search_bench.py [--rows 1000000] [--repeat 5] [--writes 500]
+
+Bulk-loads --rows public memorials into a throwaway SQLite database (or
+DATABASE_URL) with generated Kenyan names, towns and short biographies,
+then reports:
+
+- how long search_index.rebuild('memorials') takes for the whole table
+- for each query in QUERIES, the median time of one page (20 rows) plus
+  total from search_index.search(), against the naive
+  LIKE '%term%' scan over the same columns (run once; it reads every row)
+- the cost the incremental indexing adds to a committed memorial insert
+  and to an update that renames one, over --writes of each
+"""
+
+import argparse
+from datetime import date
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIRST_NAMES = [
+    'Wanjiku', 'Wanjiru', 'Njeri', 'Nyambura', 'Wambui', 'Akinyi', 'Atieno', 'Achieng', 'Adhiambo', 'Awino',
+    'Chebet', 'Jepkosgei', 'Nafula', 'Nekesa', 'Mwende', 'Mutheu', 'Zawadi', 'Halima', 'Grace', 'Mary',
+    'Kamau', 'Mwangi', 'Kariuki', 'Njoroge', 'Otieno', 'Odhiambo', 'Ochieng', 'Omondi', 'Kiprop', 'Kipchoge',
+    'Cheruiyot', 'Wafula', 'Barasa', 'Mutua', 'Musyoka', 'Kibet', 'Hassan', 'Juma', 'Peter', 'John',
+]
+SURNAMES = [
+    'Kamau', 'Mwangi', 'Kariuki', 'Njoroge', 'Githinji', 'Macharia', 'Waweru', 'Kimani', 'Ndungu', 'Gitau',
+    'Otieno', 'Odhiambo', 'Ochieng', 'Omondi', 'Onyango', 'Owino', 'Okoth', 'Oduor', 'Were', 'Ouma',
+    'Kiprop', 'Kipchoge', 'Cheruiyot', 'Rotich', 'Koech', 'Langat', 'Kirui', 'Ruto', 'Korir', 'Bett',
+    'Wafula', 'Barasa', 'Wekesa', 'Simiyu', 'Mutua', 'Musyoka', 'Kilonzo', 'Mutiso', 'Nzioka', 'Muthama',
+    'Hassan', 'Abdi', 'Mohamed', 'Ali', 'Omar', 'Said', 'Mwamba', 'Chiluba', 'Baraka', 'Kazungu',
+]
+TOWNS = [
+    'Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Nyeri', 'Thika', 'Machakos', 'Kakamega', 'Kericho',
+    'Meru', 'Embu', 'Kitui', 'Garissa', 'Malindi', 'Bungoma', 'Homa Bay', 'Migori', 'Naivasha', 'Nanyuki',
+]
+WORDS = (
+    'teacher farmer nurse pastor trader driver tailor carpenter doctor engineer mother father grandmother '
+    'grandfather church choir community elder village school harambee cattle tea coffee maize football '
+    'athlete runner chief councillor midwife fisherman lake coast highlands family friends generous kind '
+    'humble faithful beloved devoted patient wise cheerful loving'
+).split()
+
+QUERIES = [
+    ('full name', 'wanjiku kamau'),
+    ('rare surname', 'kazungu'),
+    ('name prefix', 'wanj'),
+    ('two prefixes', 'wanj kam'),
+    ('name + town', 'otieno kisumu'),
+    ('biography word', 'midwife'),
+    ('common word', 'family'),
+]
+
+
+def memorial_rows(count, user_id, rng):
+    for _ in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+        town = rng.choice(TOWNS)
+        biography = f"Born in {rng.choice(TOWNS)}, a {rng.choice(WORDS)} and {rng.choice(WORDS)} " + \
+            ' '.join(rng.choice(WORDS) for _ in range(12)) + '.'
+        yield (str(uuid.uuid4()), user_id, name, date(1940, 1, 1), date(2024, 1, 1), biography, 'public', town,
+               None, False)
+
+
+def median_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def like_search(terms, per_page):
+    from sqlalchemy import or_
+    from app.models import Memorial
+
+    columns = (Memorial.deceased_name, Memorial.location, Memorial.biography, Memorial.obituary)
+    query = Memorial.query.filter(Memorial.visibility == 'public')
+    for term in terms:
+        query = query.filter(or_(*[column.ilike(f"%{term}%") for column in columns]))
+    return query.count(), query.order_by(Memorial.deceased_name).limit(per_page).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--writes', type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'search.db')}")
+    os.environ['FUNDRAISER_SWEEPER'] = 'false'
+    os.environ['MPESA_CALLBACK_CONSUMER'] = 'false'
+    os.environ['QUERY_STATS'] = 'false'
+    # The revocation sync thread would only report a locked database during the bulk load
+    os.environ['REVOCATION_SYNC_INTERVAL'] = '3600'
+
+    from app import create_app, db
+    from app.models import Memorial, User
+    from app.services.search import search_index, search_terms
+
+    app = create_app()
+    rng = random.Random(42)
+    with app.app_context():
+        user = User(email=f"search-{time.time_ns()}@kenfuse.test", phone='0700000000', first_name='Search',
+                    last_name='Bench', password_hash='!')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        # Straight into the table: the ORM hooks would index row by row
+        started = time.perf_counter()
+        rows = memorial_rows(args.rows, user_id, rng)
+        table = Memorial.__table__
+        columns = ['id', 'user_id', 'deceased_name', 'date_of_birth', 'date_of_passing', 'biography', 'visibility',
+                   'location', 'obituary', 'is_featured']
+        while True:
+            batch = [dict(zip(columns, row)) for _, row in zip(range(50000), rows)]
+            if not batch:
+                break
+            db.session.execute(table.insert(), batch)
+        db.session.commit()
+        print(f"loaded {args.rows:,} memorials in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        search_index.rebuild('memorials')
+        print(f"rebuilt the memorial index in {time.perf_counter() - started:.1f}s")
+        print()
+
+        print(f"{'query':14} {'q':16} {'matches':>9} {'index ms':>9} {'LIKE ms':>9} {'speedup':>8}")
+        for label, q in QUERIES:
+            indexed, page = median_of(args.repeat, lambda: search_index.search('memorials', q, 1, 20))
+            started = time.perf_counter()
+            like_total, _ = like_search(search_terms(q), 20)
+            like = time.perf_counter() - started
+            db.session.remove()
+            # LIKE matches substrings anywhere, the index whole words and word prefixes
+            matches = f"{page.total:,}" if page.total == like_total else f"{page.total:,}*"
+            print(f"{label:14} {q:16} {matches:>9} {indexed * 1000:>9.1f} {like * 1000:>9.0f} "
+                  f"{like / indexed:>7.0f}x")
+        print('* LIKE also counts substrings inside other words')
+        print()
+
+        def insert_memorials():
+            for row in memorial_rows(args.writes, user_id, rng):
+                db.session.add(Memorial(**dict(zip(columns, row))))
+                db.session.commit()
+
+        def rename_memorials():
+            for memorial in Memorial.query.filter_by(user_id=user_id).limit(args.writes).all():
+                memorial.deceased_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+                db.session.commit()
+
+        backend = search_index.backend
+        for label, write in (('insert', insert_memorials), ('rename', rename_memorials)):
+            timings = {}
+            for indexing in (False, True):
+                search_index.backend = backend if indexing else None
+                started = time.perf_counter()
+                write()
+                timings[indexing] = (time.perf_counter() - started) / args.writes
+            search_index.backend = backend
+            print(f"{label}: {timings[False] * 1000:.2f} ms per commit without indexing, "
+                  f"{timings[True] * 1000:.2f} ms with (+{(timings[True] - timings[False]) * 1000:.2f} ms)")
+
+
+if __name__ == '__main__':
+    main()
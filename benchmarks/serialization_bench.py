@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: serializing list responses of Fundraiser and VendorProfile rows.
+
+    python benchmarks/serialization_bench.py [--rows 10000] [--repeat 5]
+
+Builds --rows in-memory instances of each model and times the response
+body for a list endpoint three ways, best of --repeat:
+
+- handwritten: the per-field to_dict() the models used to have, encoded
+  by Flask's standard-library provider (what jsonify did before)
+- compiled + standard: Model.dump() from serialize_fields, encoded by
+  StandardJSONProvider
+- compiled + orjson: Model.dump() encoded by OrjsonJSONProvider (the
+  default JSON_PROVIDER)
+
+The bodies of all three are checked to decode to the same data first.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import os
+import sys
+import time
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+
+def handwritten_fundraiser(self):
+    progress = (self.current_amount / self.target_amount * 100) if self.target_amount > 0 else 0
+    return {
+        'id': self.id,
+        'title': self.title,
+        'description': self.description,
+        'target_amount': self.target_amount,
+        'current_amount': self.current_amount,
+        'currency': self.currency,
+        'status': self.status,
+        'cover_image': self.cover_image,
+        'end_date': self.end_date.isoformat() if self.end_date else None,
+        'is_verified': self.is_verified,
+        'progress_percentage': min(100, progress),
+        'created_at': self.created_at.isoformat() if self.created_at else None
+    }
+
+
+def handwritten_vendor(self):
+    return {
+        'id': self.id,
+        'business_name': self.business_name,
+        'category': self.category,
+        'description': self.description,
+        'county': self.county,
+        'town': self.town,
+        'phone': self.phone,
+        'email': self.email,
+        'website': self.website,
+        'logo_url': self.logo_url,
+        'status': self.status,
+        'is_featured': self.is_featured,
+        'rating': self.rating,
+        'review_count': self.review_count,
+        'commission_rate': self.commission_rate,
+        'created_at': self.created_at.isoformat() if self.created_at else None
+    }
+
+
+def build_rows(count):
+    from app.models import Fundraiser, VendorProfile
+
+    now = datetime.utcnow()
+    fundraisers = [
+        Fundraiser(id=str(uuid.uuid4()), title=f"Funeral costs for family {i}",
+                   description='Help us give our father a dignified send-off. ' * 3, target_amount=250000.0,
+                   current_amount=float(i * 37 % 250000), currency='KES', status='active', cover_image=None,
+                   end_date=now + timedelta(days=30), is_verified=True, created_at=now - timedelta(minutes=i))
+        for i in range(count)
+    ]
+    vendors = [
+        VendorProfile(id=str(uuid.uuid4()), business_name=f"Vendor {i} Funeral Services", category='funeral_home',
+                      description='Caskets, hearse hire and catering across the county.', county='Nairobi',
+                      town='Westlands', phone='0722000000', email=f"vendor{i}@kenfuse.test", website=None,
+                      logo_url=None, status='verified', is_featured=True, rating=4.0 + i % 10 / 10,
+                      review_count=i % 50, commission_rate=10.0, created_at=now - timedelta(hours=i))
+        for i in range(count)
+    ]
+    return fundraisers, vendors
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from app.models import Fundraiser, VendorProfile
+    from app.utils.json_provider import OrjsonJSONProvider, StandardJSONProvider
+
+    app = Flask(__name__)
+    flask_default = DefaultJSONProvider(app)
+    standard = StandardJSONProvider(app)
+    fast = OrjsonJSONProvider(app)
+
+    fundraisers, vendors = build_rows(args.rows)
+    cases = [
+        ('Fundraiser', 'fundraisers', Fundraiser, fundraisers, handwritten_fundraiser),
+        ('VendorProfile', 'vendors', VendorProfile, vendors, handwritten_vendor),
+    ]
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    print(f"{'model':14} {'approach':22} {'ms':>9} {'rows/s':>11} {'speedup':>8}")
+    with app.app_context():
+        for name, key, model, rows, handwritten in cases:
+            approaches = [
+                ('handwritten + stdlib', lambda: flask_default.response({key: [handwritten(row) for row in rows]})),
+                ('compiled + stdlib', lambda: standard.response({key: model.dump(rows)})),
+                ('compiled + orjson', lambda: fast.response({key: model.dump(rows)})),
+            ]
+            baseline = None
+            decoded = None
+            for label, fn in approaches:
+                elapsed, response = best_of(args.repeat, fn)
+                data = fast.loads(response.get_data())
+                if decoded is None:
+                    decoded = data
+                elif data != decoded:
+                    sys.exit(f"{name}: {label} produced a different body")
+                baseline = baseline or elapsed
+                print(f"{name:14} {label:22} {elapsed * 1000:>9.1f} {args.rows / elapsed:>11,.0f} "
+                      f"{baseline / elapsed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+import glob
+import os
+
+
+def on_starting(server):
+    # Metric snapshots from a previous run would otherwise be summed into this one
+    directory = os.environ.get('METRICS_MULTIPROC_DIR')
+    if directory:
+        for path in glob.glob(os.path.join(directory, 'metrics_*.json*')):
+            os.remove(path)
@@ -0,0 +1,39 @@
+"""add users.token_version
+
+Access tokens carry the user's token_version as a claim; bumping it
+revokes every token issued before.
+
+Revision ID: 210f973a8dbb
+Revises: 3d3dcf1ddeb4
+Create Date: 2026-10-18 09:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '210f973a8dbb'
+down_revision = '3d3dcf1ddeb4'
+branch_labels = None
+depends_on = None
+
+
+def _has_token_version():
+    # create_app()'s db.create_all() may already have added it on a fresh database
+    columns = sa.inspect(op.get_bind()).get_columns('users')
+    return any(column['name'] == 'token_version' for column in columns)
+
+
+def upgrade():
+    if _has_token_version():
+        return
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    if not _has_token_version():
+        return
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,62 @@
+"""add listing and lookup indexes
+
+Tables are still created by db.create_all(), which also creates these
+indexes on a fresh database but never adds indexes to tables that already
+exist. This revision adds them to existing databases; if_not_exists makes
+it a no-op where create_all() got there first.
+
+Revision ID: 3d3dcf1ddeb4
+Revises:
+Create Date: 2026-10-17 23:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d3dcf1ddeb4'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    # GET /api/admin/users, with and without ?role=
+    ('ix_users_created_at_id', 'users', ['created_at', 'id']),
+    ('ix_users_role_created_at_id', 'users', ['role', 'created_at', 'id']),
+
+    # GET /api/wills, GET /api/memorials, GET /api/exports/documents
+    ('ix_wills_user_id', 'wills', ['user_id']),
+    ('ix_memorials_user_id', 'memorials', ['user_id']),
+
+    # GET /api/fundraisers/ (by status, or status=all), GET /api/admin/fundraisers/pending,
+    # GET /api/fundraisers/user and the expiry sweep
+    ('ix_fundraisers_status_verified_created_at', 'fundraisers', ['status', 'is_verified', 'created_at', 'id']),
+    ('ix_fundraisers_verified_created_at', 'fundraisers', ['is_verified', 'created_at', 'id']),
+    ('ix_fundraisers_user_id', 'fundraisers', ['user_id']),
+    ('ix_fundraisers_status_end_date', 'fundraisers', ['status', 'end_date']),
+
+    # GET /api/fundraisers/<id> recent donations
+    ('ix_donations_fundraiser_created_at', 'donations', ['fundraiser_id', 'created_at']),
+
+    # GET /api/admin/dashboard recent payments
+    ('ix_payments_created_at', 'payments', ['created_at']),
+
+    # GET /api/vendors/marketplace and GET /api/admin/vendors/pending
+    ('ix_vendor_profiles_marketplace', 'vendor_profiles', ['status', 'is_featured', 'category', 'county', 'rating', 'id']),
+    ('ix_vendor_profiles_featured_rating', 'vendor_profiles', ['status', 'is_featured', 'rating', 'id']),
+
+    # GET /api/vendors/<id> available services
+    ('ix_vendor_services_vendor_available', 'vendor_services', ['vendor_id', 'is_available']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)